@@ -0,0 +1,113 @@
+"""
+Report the startup import cost of the entry points with `python -X importtime`.
+
+Each module is imported in a fresh interpreter `--repeat` times and the best
+run is reported, with its heaviest direct imports. Heavy optional
+subsystems (Selenium, BeautifulSoup, SMTP, keyboard) are only meant to load
+on first use; the run fails if one of them is imported at startup, or if an
+import takes longer than `--budget-ms`.
+
+Usage:
+    python -m benchmarks.import_time [--modules stock_checker daemon cli] [--repeat 5] [--budget-ms 300]
+"""
+import argparse
+import subprocess
+import sys
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+# Loaded on first use only
+DEFERRED_MODULES = ('selenium', 'bs4', 'smtplib', 'email.mime', 'keyboard', 'multiprocessing')
+
+
+def import_times(module: str) -> List[Tuple[int, int, int, str]]:
+    """
+    Import a module in a fresh interpreter and collect the -X importtime report.
+
+    Args:
+        module (str): The module to import
+
+    Returns:
+        List[Tuple[int, int, int, str]]: (depth, self_us, cumulative_us, name) per imported module,
+        in the order the report lists them
+    """
+    output = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    ).stderr
+    entries = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((depth, int(self_us), int(cumulative_us), name.strip()))
+    return entries
+
+
+def measure(module: str, repeat: int) -> Tuple[float, List[Tuple[int, int, int, str]]]:
+    """Return the best cumulative import time in milliseconds and the report of that run."""
+    best: Optional[Tuple[float, list]] = None
+    for _ in range(repeat):
+        entries = import_times(module)
+        total = next(cumulative for depth, _, cumulative, name in reversed(entries)
+                     if name == module and depth == 0) / 1000
+        if best is None or total < best[0]:
+            best = (total, entries)
+    return best
+
+
+def deferred_imports(entries: List[Tuple[int, int, int, str]]) -> List[str]:
+    """Return the deferred subsystems that were imported."""
+    names = {name for _, _, _, name in entries}
+    return [module for module in DEFERRED_MODULES
+            if module in names or any(name.startswith(f'{module}.') for name in names)]
+
+
+def direct_imports(module: str, entries: List[Tuple[int, int, int, str]]) -> List[Tuple[str, float]]:
+    """Return the module's direct imports with their cumulative times in milliseconds, heaviest first."""
+    # importtime lists children before their parent
+    children, pending = [], []
+    for depth, _, cumulative, name in entries:
+        if depth == 0:
+            if name == module:
+                children = pending
+            pending = []
+        elif depth == 1:
+            pending.append((name, cumulative / 1000))
+    return sorted(children, key=lambda child: child[1], reverse=True)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modules', nargs='+', default=['stock_checker', 'daemon', 'cli'])
+    parser.add_argument('--repeat', type=int, default=5, help='Imports per module; the best is reported')
+    parser.add_argument('--top', type=int, default=8, help='Direct imports to list per module')
+    parser.add_argument('--budget-ms', type=float, default=None, help='Fail if an import takes longer')
+    args = parser.parse_args(argv)
+
+    failures = []
+    for module in args.modules:
+        try:
+            total, entries = measure(module, args.repeat)
+        except subprocess.CalledProcessError as e:
+            failures.append(f"{module}: import failed\n{e.stderr.strip().splitlines()[-1]}")
+            continue
+        print(f"\n{module}: {total:.1f} ms, {len(entries)} modules")
+        for name, cumulative in direct_imports(module, entries)[:args.top]:
+            print(f"    {name:<40}{cumulative:>8.1f} ms")
+        loaded = deferred_imports(entries)
+        if loaded:
+            failures.append(f"{module}: imports {', '.join(loaded)} at startup")
+        if args.budget_ms is not None and total > args.budget_ms:
+            failures.append(f"{module}: {total:.1f} ms is over the {args.budget_ms:g} ms budget")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,78 @@
+"""
+Measure sweep parsing throughput with parsing in threads versus a process pool.
+
+Pages are analyzed from `--threads` threads, as a sweep does after fetching.
+With `--workers 0` they are parsed in those threads; otherwise each thread
+hands the raw bytes to a ParsePool, as StockChecker does with PARSE_WORKERS.
+
+Usage:
+    python -m benchmarks.parse_pool [--pages 64] [--cards 400] [--threads 8] [--workers 0 1 2 4] [--soup-only]
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+from bs4 import SoupStrainer
+from benchmarks.parser_backends import build_page
+from page_analysis import PARSE_ONLY_TAGS, analyze_page, decode_page
+from parse_pool import ParsePool
+
+
+def run_sweep(pages: List[bytes], threads: int, workers: int, backend: str, use_fast_parser: bool) -> float:
+    """
+    Analyze every page once and return the throughput in pages per second.
+
+    Args:
+        pages (List[bytes]): UTF-8 encoded pages
+        threads (int): Checking threads
+        workers (int): Parse worker processes, or 0 to parse in the threads
+        backend (str): The BeautifulSoup backend
+        use_fast_parser (bool): Whether to try the streaming detector first
+
+    Returns:
+        float: Pages per second
+    """
+    if workers:
+        pool = ParsePool(workers, backend, parse_only=True, use_fast_parser=use_fast_parser)
+        analyze = lambda page: pool.analyze(page, 'utf-8', "BenchStore")
+        # Start the worker processes before timing
+        list(ThreadPoolExecutor(workers).map(analyze, pages[:workers]))
+    else:
+        pool = None
+        strainer = SoupStrainer(PARSE_ONLY_TAGS)
+        analyze = lambda page: analyze_page(decode_page(page, 'utf-8'), "BenchStore", backend, strainer, use_fast_parser)
+
+    try:
+        with ThreadPoolExecutor(threads) as executor:
+            start = time.perf_counter()
+            list(executor.map(analyze, pages))
+            return len(pages) / (time.perf_counter() - start)
+    finally:
+        if pool is not None:
+            pool.close()
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, default=64, help='Pages per sweep')
+    parser.add_argument('--cards', type=int, default=400, help='Related product cards per page')
+    parser.add_argument('--threads', type=int, default=8, help='Checking threads')
+    parser.add_argument('--workers', type=int, nargs='+', default=[0, 1, 2, 4], help='Worker counts to compare')
+    parser.add_argument('--backend', default='html.parser', help='BeautifulSoup backend')
+    parser.add_argument('--soup-only', action='store_true', help='Skip the streaming detector')
+    args = parser.parse_args(argv)
+
+    pages = [build_page(args.cards, in_stock=i % 2 == 0).encode('utf-8') for i in range(args.pages)]
+    print(f"{args.pages} pages of {len(pages[0]) / 1024:.0f} KiB, {args.threads} threads, "
+          f"{os.cpu_count()} CPUs, backend {args.backend}")
+    print(f"{'workers':<10}{'pages/s':>10}{'speedup':>10}")
+    baseline = None
+    for workers in args.workers:
+        rate = run_sweep(pages, args.threads, workers, args.backend, not args.soup_only)
+        baseline = baseline or rate
+        print(f"{workers or 'threads':<10}{rate:>10.1f}{rate / baseline:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Compare HTML parser backends on large storefront-style product pages.
+
+Usage:
+    python -m benchmarks.parser_backends [--cards 200] [--repeat 5]
+"""
+import argparse
+import time
+from typing import Callable, List
+from bs4 import BeautifulSoup, SoupStrainer
+from bs4.builder import builder_registry
+from stock_detector import detect_stock_status
+
+PRODUCT_SECTION = """
+<main class="product-template">
+    <div class="product-content">
+        <h1>Test Product Name</h1>
+        <div class="product-form">
+            <form method="post" action="/cart/add">
+                <button type="submit" name="add" class="btn product-form__cart-submit" data-add-to-cart="">
+                    <span data-add-to-cart-text="">{button_text}</span>
+                </button>
+            </form>
+        </div>
+    </div>
+</main>
+"""
+
+CARD = """
+<div class="grid__item product-card" data-product-id="{i}">
+    <a href="/products/related-product-{i}" class="product-card__link">
+        <img src="/cdn/shop/files/related-{i}.jpg" alt="Related product {i}" loading="lazy" width="300" height="300">
+        <span class="product-card__title">Related Product {i}</span>
+        <span class="price"><s>$59.99</s> $49.99</span>
+    </a>
+    <button type="button" class="btn quick-add" data-variant-id="{i}">Quick view</button>
+</div>
+"""
+
+
+def build_page(cards: int, in_stock: bool = True) -> str:
+    """
+    Build a product page padded with navigation, scripts and a product grid.
+
+    Args:
+        cards (int): The number of related product cards before and after the product
+        in_stock (bool): Whether the main product's button should read "Add to cart"
+
+    Returns:
+        str: The HTML page
+    """
+    nav = ''.join(f'<li><a href="/collections/c-{i}">Collection {i}</a></li>' for i in range(cards))
+    scripts = ''.join(f'<script>window.theme_{i} = {{"id": {i}, "lazy": true}};</script>' for i in range(cards // 4))
+    grid = ''.join(CARD.format(i=i) for i in range(cards))
+    product = PRODUCT_SECTION.format(button_text='Add to cart' if in_stock else 'Sold out')
+    return (
+        f'<!DOCTYPE html><html><head><title>Test Product</title>{scripts}</head>'
+        f'<body><header><nav><ul>{nav}</ul></nav></header>'
+        f'<section class="featured">{grid}</section>{product}'
+        f'<section class="recommendations">{grid}</section></body></html>'
+    )
+
+
+def soup_parser(backend: str, parse_only: bool) -> Callable[[str], object]:
+    """Build a callable that parses a page the way parse_stock_status_with_soup does."""
+    strainer = SoupStrainer(['h1', 'button']) if parse_only else None
+
+    def parse(html: str):
+        soup = BeautifulSoup(html, backend, parse_only=strainer)
+        soup.find('h1')
+        return soup.find_all('button', attrs={'type': 'submit'})
+    return parse
+
+
+def time_call(func: Callable[[str], object], html: str, repeat: int) -> float:
+    """Return the best wall time of `repeat` runs, in milliseconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(html)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cards', type=int, default=200, help='Related product cards around the main product')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per backend; the best time is reported')
+    args = parser.parse_args(argv)
+
+    candidates = [('stock_detector', detect_stock_status)]
+    for backend in ('lxml', 'html.parser', 'html5lib'):
+        if builder_registry.lookup(backend) is None:
+            print(f"{backend}: not installed, skipped")
+            continue
+        candidates.append((f'{backend}', soup_parser(backend, parse_only=False)))
+        candidates.append((f'{backend} + SoupStrainer', soup_parser(backend, parse_only=True)))
+
+    for in_stock in (True, False):
+        html = build_page(args.cards, in_stock)
+        print(f"\n{'In stock' if in_stock else 'Out of stock'} page, {len(html) / 1024:.0f} KiB")
+        print(f"{'backend':<28}{'best ms':>10}")
+        for name, func in candidates:
+            print(f"{name:<28}{time_call(func, html, args.repeat):>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+Local stand-in for a storefront, serving product pages for the offline benchmarks.
+
+Pages are the mock pages from `tests/test_data/mock_html_responses.py`,
+padded to a configurable size with related-product markup. Each product's
+stock status flips after every `flip_every` requests for it, so repeated
+checks see both changes and unchanged pages. Unchanged pages answer
+If-None-Match with 304, like a real store behind a CDN.
+
+The server runs in its own process so its request handling does not compete
+with the checker being measured for the GIL.
+
+    python -m benchmarks.storefront --products 100 --latency 0.05
+"""
+import argparse
+import multiprocessing
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from tests.test_data.mock_html_responses import MOCK_IN_STOCK_HTML, MOCK_OUT_OF_STOCK_HTML
+
+FILLER = (
+    '<div class="grid__item product-card"><a href="/products/related-{n}">'
+    '<img src="/cdn/shop/files/related-{n}.jpg" alt="Related product {n}" width="300" height="300">'
+    '<span class="product-card__title">Related Product {n}</span><span class="price">$49.99</span></a>'
+    '<button type="button" class="btn quick-add">Quick view</button></div>\n'
+)
+
+
+def build_product_page(index: int, in_stock: bool, size: int = 0) -> bytes:
+    """
+    Build the page for one product.
+
+    Args:
+        index (int): The product number, used in its name
+        in_stock (bool): Whether the page shows an enabled "Add to cart" button
+        size (int, optional): Pad the page with related products to about this many bytes. Defaults to 0.
+
+    Returns:
+        bytes: The UTF-8 encoded page
+    """
+    html = (MOCK_IN_STOCK_HTML if in_stock else MOCK_OUT_OF_STOCK_HTML).replace(
+        'Test Product Name', f'Test Product {index}'
+    )
+    filler = []
+    padding = size - len(html)
+    n = 0
+    while padding > 0:
+        card = FILLER.format(n=n)
+        filler.append(card)
+        padding -= len(card)
+        n += 1
+    return html.replace('</body>', ''.join(filler) + '</body>').encode('utf-8')
+
+
+def is_in_stock(index: int, hits: int, flip_every: int) -> bool:
+    """Return the stock status of a product after `hits` earlier requests for it."""
+    if flip_every <= 0:
+        return index % 2 == 0
+    return (index + hits // flip_every) % 2 == 0
+
+
+class StorefrontServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, address, products: int, size: int, latency: float, flip_every: int):
+        super().__init__(address, StorefrontHandler)
+        self.products = products
+        self.latency = latency
+        self.flip_every = flip_every
+        # One in-stock and one sold-out page, named per product when served
+        self.pages = {
+            in_stock: build_product_page(0, in_stock, size).replace(b'Test Product 0', b'Test Product {index}')
+            for in_stock in (True, False)
+        }
+        self.hits: Dict[int, int] = {}
+        self.lock = threading.Lock()
+
+
+class StorefrontHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        server = self.server
+        prefix = '/products/p'
+        try:
+            index = int(self.path[len(prefix):]) if self.path.startswith(prefix) else -1
+        except ValueError:
+            index = -1
+        if not 0 <= index < server.products:
+            self.send_error(404)
+            return
+
+        with server.lock:
+            hits = server.hits.get(index, 0)
+            server.hits[index] = hits + 1
+        if server.latency:
+            time.sleep(server.latency)
+
+        in_stock = is_in_stock(index, hits, server.flip_every)
+        etag = f'"p{index}-{int(in_stock)}"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        body = server.pages[in_stock].replace(b'{index}', str(index).encode())
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('ETag', etag)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(connection, products: int, size: int, latency: float, flip_every: int):
+    server = StorefrontServer(('127.0.0.1', 0), products, size, latency, flip_every)
+    connection.send(server.server_address[1])
+    server.serve_forever()
+
+
+class FakeStorefront:
+    """
+    A storefront serving `products` product pages at /products/p<n>.
+
+    Use as a context manager, or call `start` and `close`.
+    """
+
+    def __init__(self, products: int, size: int = 0, latency: float = 0.0, flip_every: int = 0):
+        """
+        Configure the storefront. Nothing is served until `start`.
+
+        Args:
+            products (int): The number of product pages.
+            size (int, optional): The approximate page size in bytes. Defaults to 0, the bare mock page.
+            latency (float, optional): Seconds each request waits before answering. Defaults to 0.0.
+            flip_every (int, optional): Requests per product between stock flips. 0 never flips. Defaults to 0.
+        """
+        self.products = products
+        self.options = (products, size, latency, flip_every)
+        self.process: Optional[multiprocessing.Process] = None
+        self.port: Optional[int] = None
+
+    def start(self) -> 'FakeStorefront':
+        context = multiprocessing.get_context('spawn')
+        receiver, sender = context.Pipe(duplex=False)
+        self.process = context.Process(target=serve, args=(sender, *self.options), daemon=True)
+        self.process.start()
+        self.port = receiver.recv()
+        return self
+
+    def close(self):
+        if self.process is not None:
+            self.process.terminate()
+            self.process.join()
+            self.process = None
+
+    def url(self, index: int) -> str:
+        return f"http://127.0.0.1:{self.port}/products/p{index}"
+
+    def urls(self) -> List[dict]:
+        """Return every product as an entry with 'url' and 'site_name' keys."""
+        return [{'url': self.url(i), 'site_name': "BenchStore"} for i in range(self.products)]
+
+    def __enter__(self) -> 'FakeStorefront':
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def main(argv: List[str] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--products', type=int, default=100, help='Product pages to serve')
+    parser.add_argument('--size', type=int, default=50_000, help='Approximate page size in bytes')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds to wait before each answer')
+    parser.add_argument('--flip-every', type=int, default=3, help='Requests per product between stock flips')
+    args = parser.parse_args(argv)
+
+    with FakeStorefront(args.products, args.size, args.latency, args.flip_every) as storefront:
+        print(f"Serving {args.products} products, e.g. {storefront.url(0)} (Ctrl+C to stop)")
+        try:
+            storefront.process.join()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""
+Measure checker throughput and latency against a local fake storefront.
+
+Runs each scenario in a fresh process, so its peak RSS is its own:
+
+    parse        parse_stock_status over every product page, no network
+    check_stock  check_stock for every URL, `--rounds` times, from `--concurrency` threads
+    monitor      run_monitor_loop over every URL for `--duration` seconds
+
+and reports checks per second, p50/p99 latency per check and peak RSS.
+Nothing leaves the machine. Save a run with `--output` and pass it as
+`--baseline` on a later commit to flag regressions beyond `--tolerance`:
+
+    python -m benchmarks.throughput --output baseline.json
+    python -m benchmarks.throughput --baseline baseline.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+from typing import Callable, Dict, List, Optional
+from benchmarks.storefront import FakeStorefront, build_product_page, is_in_stock
+
+SCENARIOS = ('parse', 'check_stock', 'monitor')
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))] if samples else 0.0
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def summarize(latencies: List[float], seconds: float) -> dict:
+    return {
+        'checks': len(latencies),
+        'seconds': round(seconds, 3),
+        'checks_per_sec': round(len(latencies) / seconds, 1) if seconds else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 3),
+    }
+
+
+def timed(func: Callable, latencies: List[float]) -> Callable:
+    """Wrap a check method to record each call's wall time."""
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - start)
+    return wrapper
+
+
+def create_checker(options: dict):
+    """Build a StockChecker configured for a single local host and no side effects."""
+    os.environ.update({
+        'STATE_DB': os.path.join(tempfile.mkdtemp(prefix='stock-bench-'), 'state.db'),
+        # Every URL is on 127.0.0.1, so per-host politeness would cap the whole run
+        'HOST_RATE_LIMIT': '1000000',
+        'HOST_RATE_BURST': '1000000',
+        'HOST_MAX_CONCURRENCY': str(options['concurrency']),
+        'HTTP_POOL_MAXSIZE': str(options['concurrency']),
+        'HTTP_MAX_RETRIES': '0',
+        'METRICS_PORT': '0',
+        'METRICS_SUMMARY_FILE': '',
+        'FETCH_MODE': 'requests',
+        'PRODUCT_JSON_SITES': '',
+    })
+    from stock_checker import StockChecker
+    return StockChecker(check_interval=1, max_concurrency=options['concurrency'])
+
+
+def run_parse(options: dict) -> dict:
+    pages = [
+        build_product_page(i, is_in_stock(i, 0, options['flip_every']), options['size']).decode('utf-8')
+        for i in range(options['products'])
+    ]
+    checker = create_checker(options)
+    try:
+        latencies = []
+        parse = timed(checker.parse_stock_status, latencies)
+        start = time.perf_counter()
+        for page in pages:
+            parse(page, "BenchStore")
+        return summarize(latencies, time.perf_counter() - start)
+    finally:
+        checker.close()
+
+
+def run_check_stock(options: dict) -> dict:
+    with FakeStorefront(options['products'], options['size'], options['latency'],
+                        options['flip_every']) as storefront:
+        checker = create_checker(options)
+        try:
+            latencies = []
+            check = timed(checker.check_stock, latencies)
+            urls = storefront.urls() * options['rounds']
+            with ThreadPoolExecutor(options['concurrency']) as executor:
+                start = time.perf_counter()
+                list(executor.map(lambda entry: check(entry['url'], entry['site_name']), urls))
+                return summarize(latencies, time.perf_counter() - start)
+        finally:
+            checker.close()
+
+
+def run_monitor(options: dict) -> dict:
+    with FakeStorefront(options['products'], options['size'], options['latency'],
+                        options['flip_every']) as storefront:
+        checker = create_checker(options)
+        try:
+            latencies = []
+            # Keep every URL due so the loop runs flat out
+            checker.poll_config.update({'min_interval': 0.001, 'max_interval': 1, 'jitter': 0})
+            checker.check_stock = timed(checker.check_stock, latencies)
+            checker.report_stock_status = lambda result, notification_email=None: None
+            start = time.perf_counter()
+            deadline = start + options['duration']
+            checker.run_monitor_loop(storefront.urls(), should_stop=lambda: time.perf_counter() >= deadline)
+            result = summarize(latencies, time.perf_counter() - start)
+            result['drift_p95_ms'] = round(checker.get_schedule_drift()['p95'] * 1000, 3)
+            return result
+        finally:
+            checker.close()
+
+
+def run_scenario(name: str, options: dict) -> dict:
+    """Run one scenario in this process and return its measurements."""
+    logging.basicConfig(stream=sys.stderr, level=logging.WARNING)
+    result = {'parse': run_parse, 'check_stock': run_check_stock, 'monitor': run_monitor}[name](options)
+    result['peak_rss_mb'] = round(peak_rss_mb(), 1)
+    return result
+
+
+def run_isolated(name: str, options: dict) -> dict:
+    """Run one scenario in a fresh process."""
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+        return executor.submit(run_scenario, name, options).result()
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], tolerance: float) -> List[str]:
+    """
+    Find scenarios that got slower than the baseline.
+
+    Args:
+        results (Dict[str, dict]): This run's results per scenario
+        baseline (Dict[str, dict]): A previous run's results per scenario
+        tolerance (float): The allowed change as a fraction, e.g. 0.1 for 10%
+
+    Returns:
+        List[str]: A description of every regression
+    """
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        if result['checks_per_sec'] < previous['checks_per_sec'] * (1 - tolerance):
+            regressions.append(f"{name}: {result['checks_per_sec']} checks/s, was {previous['checks_per_sec']}")
+        for metric in ('p99_ms', 'peak_rss_mb'):
+            if result[metric] > previous[metric] * (1 + tolerance):
+                regressions.append(f"{name}: {metric} {result[metric]}, was {previous[metric]}")
+    return regressions
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--products', type=int, default=2000, help='Product URLs')
+    parser.add_argument('--size', type=int, default=50_000, help='Approximate page size in bytes')
+    parser.add_argument('--latency', type=float, default=0.005, help='Storefront answer delay in seconds')
+    parser.add_argument('--flip-every', type=int, default=3, help='Requests per product between stock flips')
+    parser.add_argument('--concurrency', type=int, default=16, help='Checks in flight at once')
+    parser.add_argument('--rounds', type=int, default=2, help='check_stock passes over every URL')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds to run the monitor loop')
+    parser.add_argument('--output', help='Write the results to this JSON file')
+    parser.add_argument('--baseline', help='A previous --output file to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.1, help='Allowed regression as a fraction')
+    args = parser.parse_args(argv)
+
+    options = {name: getattr(args, name) for name in
+               ('products', 'size', 'latency', 'flip_every', 'concurrency', 'rounds', 'duration')}
+    print(f"{args.products} products of {args.size / 1024:.0f} KiB, {args.latency * 1000:g} ms latency, "
+          f"concurrency {args.concurrency}, {os.cpu_count()} CPUs")
+    print(f"{'scenario':<14}{'checks':>8}{'checks/s':>11}{'p50 ms':>10}{'p99 ms':>10}{'RSS MiB':>10}")
+    results = {}
+    for name in args.scenarios:
+        result = results[name] = run_isolated(name, options)
+        print(f"{name:<14}{result['checks']:>8}{result['checks_per_sec']:>11.1f}{result['p50_ms']:>10.2f}"
+              f"{result['p99_ms']:>10.2f}{result['peak_rss_mb']:>10.1f}")
+
+    report = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'options': options,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            json.dump(report, output, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+        if baseline.get('options') != options:
+            print("Warning: the baseline was run with different options")
+        regressions = compare(results, baseline['results'], args.tolerance)
+        label = baseline.get('commit') or args.baseline
+        for regression in regressions:
+            print(f"REGRESSION vs {label}: {regression}")
+        if regressions:
+            return 1
+        print(f"No regressions vs {label}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
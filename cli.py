@@ -1,14 +1,15 @@
 import os
 import sys
-import keyboard
 import threading
 from typing import List, Dict, Optional
-import csv
 from pathlib import Path
-from datetime import datetime
 import time
 from config.environment import load_environment, get_email_config, get_app_config  # Added get_app_config
 from stock_checker import StockChecker
+from link_catalog import LinkCatalog, REQUIRED_COLUMNS
+
+# Menu choice standing for every CSV file or every key
+ALL = '*'
 
 class StockCheckerCLI:
     def __init__(self):
@@ -19,6 +20,7 @@ class StockCheckerCLI:
             load_environment()
             self.email_config = get_email_config()
             self.app_config = get_app_config()
+            self.catalog = LinkCatalog(self.app_config['links_directory'])
             self.selected_csv = None
             print("Initialization complete.")
         except Exception as e:
@@ -32,10 +34,10 @@ class StockCheckerCLI:
             print(f"Creating links directory at {links_dir}")
             links_dir.mkdir(parents=True, exist_ok=True)
         
-        return sorted(links_dir.glob('*.csv'))
+        return self.catalog.list_files()
 
     def select_csv_file(self) -> Optional[str]:
-        """Display menu of available CSV files and get user selection."""
+        """Display menu of available CSV files and get user selection, or ALL for every file."""
         self.clear_screen()
         print("Select CSV File")
         print("--------------")
@@ -50,25 +52,27 @@ class StockCheckerCLI:
         for i, file_path in enumerate(csv_files, 1):
             print(f"{i}. {file_path.name}")
         
+        print("A. All CSV files")
         print("\n0. Exit")
         
         try:
-            choice = int(input(f"\nEnter your choice (0-{len(csv_files)}): "))
+            choice_text = input(f"\nEnter your choice (0-{len(csv_files)} or A): ").strip()
+            if choice_text.lower() == 'a':
+                return ALL
+            choice = int(choice_text)
             if choice == 0:
                 return None
             if 1 <= choice <= len(csv_files):
                 selected_file = csv_files[choice - 1]
                 # Verify the file is a valid CSV with required columns
                 try:
-                    with open(selected_file, 'r') as f:
-                        reader = csv.DictReader(f)
-                        # Check for required columns
-                        required_columns = {'key', 'url', 'site_name'}
-                        if not required_columns.issubset(reader.fieldnames):
-                            print(f"\nError: {selected_file.name} is missing required columns.")
-                            print(f"Required columns: {', '.join(required_columns)}")
-                            input("\nPress Enter to try again...")
-                            return self.select_csv_file()
+                    # Loads the file into the catalog, so later lookups do not read it again
+                    self.catalog.get_fieldnames(selected_file.name)
+                except KeyError:
+                    print(f"\nError: {selected_file.name} is missing required columns.")
+                    print(f"Required columns: {', '.join(REQUIRED_COLUMNS)}")
+                    input("\nPress Enter to try again...")
+                    return self.select_csv_file()
                 except Exception as e:
                     print(f"\nError reading {selected_file.name}: {e}")
                     input("\nPress Enter to try again...")
@@ -87,15 +91,21 @@ class StockCheckerCLI:
         os.system('cls' if os.name == 'nt' else 'clear')
 
     def get_available_keys(self) -> List[str]:
-        """Get all unique keys from the selected CSV file."""
+        """Get all unique keys from the selected CSV file, or from every CSV file."""
         if not self.selected_csv:
             raise ValueError("No CSV file selected")
-            
-        csv_path = Path(self.app_config['links_directory']) / self.selected_csv
+
+        if self.selected_csv == ALL:
+            keys = set()
+            for file_path in self.get_csv_files():
+                try:
+                    keys.update(self.catalog.get_keys(file_path.name))
+                except Exception as e:
+                    print(f"Skipping {file_path.name}: {e}")
+            return sorted(keys)
+
         try:
-            with open(csv_path, 'r') as file:
-                reader = csv.DictReader(file)
-                return sorted(list(set(row['key'] for row in reader)))
+            return self.catalog.get_keys(self.selected_csv)
         except Exception as e:
             print(f"Error reading CSV file: {e}")
             return []
@@ -131,8 +141,8 @@ class StockCheckerCLI:
             print("\nInvalid choice. Please try again.")
             return self.get_email_settings()
 
-    def display_key_menu(self, keys: List[str]) -> Optional[str]:
-        """Display menu of available keys and get user selection."""
+    def display_key_menu(self, keys: List[str]) -> Optional[List[str]]:
+        """Display menu of available keys and get the selected keys, or [ALL] for every key."""
         self.clear_screen()
         print("Available Products")
         print("-----------------")
@@ -140,70 +150,81 @@ class StockCheckerCLI:
         for i, key in enumerate(keys, 1):
             print(f"{i}. {key}")
         
+        print("A. All products")
         print("\n0. Exit")
         
         try:
-            choice = int(input("\nEnter your choice (0-{}): ".format(len(keys))))
-            if choice == 0:
+            choice_text = input("\nEnter your choice (0-{}, several separated by commas, or A): ".format(len(keys))).strip()
+            if choice_text.lower() == 'a':
+                return [ALL]
+            choices = [int(choice) for choice in choice_text.split(',')]
+            if choices == [0]:
                 return None
-            if 1 <= choice <= len(keys):
-                return keys[choice - 1]
+            if all(1 <= choice <= len(keys) for choice in choices):
+                return list(dict.fromkeys(keys[choice - 1] for choice in choices))
             raise ValueError()
         except ValueError:
             print("\nInvalid choice. Please try again.")
             input("Press Enter to continue...")
             return self.display_key_menu(keys)
 
-    def monitor_wrapper(self, urls: List[dict], notification_email: str):
-        """Wrapper function for monitoring that can be stopped."""
-        self.checker = StockChecker()
+    def monitor_wrapper(self, urls: List[dict], notification_email: str, watcher=None):
+        """Wrapper function for monitoring that can be stopped, using the checker built in `run`."""
         print("\nMonitoring started. Press 'q' to stop and return to menu.")
         print("--------------------------------------------------")
-        
+
         while not self.stop_monitoring:
             try:
-                for entry in urls:
-                    if self.stop_monitoring:
-                        break
-                    
-                    is_in_stock, product_name, site_name = self.checker.check_stock(
-                        entry['url'],
-                        entry['site_name']
-                    )
-
-                    if is_in_stock:
-                        print(f"\n[{datetime.now()}] {site_name} - {product_name} is in stock!")
-                        if notification_email:
-                            self.checker.send_notification(notification_email, product_name)
-                    else:
-                        print(f"\n[{datetime.now()}] {site_name} - {product_name} is out of stock")
-
-                if not self.stop_monitoring:
-                    time.sleep(self.checker.check_interval)
+                self.checker.run_monitor_loop(
+                    urls,
+                    notification_email,
+                    should_stop=lambda: self.stop_monitoring,
+                    watcher=watcher
+                )
                     
             except Exception as e:
                 print(f"Error during monitoring: {e}")
                 if not self.stop_monitoring:
                     time.sleep(self.checker.check_interval)
+                    if watcher is not None:
+                        urls = watcher.get_urls()
+
+        for key, status in self.checker.get_key_status().items():
+            in_stock = ', '.join(status['in_stock']) or 'nowhere'
+            print(f"{key}: in stock at {in_stock} ({status['checked']} stores checked)")
 
-    def start_monitoring(self, selected_key: str, email_settings: Dict[str, str]):
-        """Start the monitoring process in a separate thread."""
+        # Release pooled connections once monitoring stops
+        self.checker.close()
+
+    def start_monitoring(self, selected_keys: List[str], email_settings: Dict[str, str]):
+        """
+        Start the monitoring process in a separate thread.
+
+        All selected keys are monitored together; a URL listed under several
+        keys, or in several CSV files, is checked once per cycle.
+        """
         self.clear_screen()
         try:
-            urls = self.checker.get_url_list(self.selected_csv, selected_key)
+            # The watcher also picks up edits to the CSV files without restarting
+            watcher = self.checker.watch_links(
+                None if self.selected_csv == ALL else self.selected_csv,
+                None if selected_keys == [ALL] else selected_keys
+            )
+            urls = watcher.get_urls()
             if not urls:
-                print(f"No URLs found for key: {selected_key}")
+                print(f"No URLs found for: {', '.join(selected_keys)}")
                 input("\nPress Enter to continue...")
                 return
 
             self.stop_monitoring = False
             self.monitoring_thread = threading.Thread(
                 target=self.monitor_wrapper,
-                args=(urls, email_settings['receiver_email'])
+                args=(urls, email_settings['receiver_email'], watcher)
             )
             self.monitoring_thread.start()
 
             # Wait for 'q' press
+            import keyboard
             keyboard.wait('q')
             self.stop_monitoring = True
             self.monitoring_thread.join()
@@ -227,8 +248,14 @@ class StockCheckerCLI:
             # Get email settings
             email_settings = self.get_email_settings()
             
-            # Initialize checker with email settings
-            self.checker = StockChecker()
+            # Initialize checker with email settings, releasing the one from the previous selection
+            if self.checker is not None:
+                self.checker.close()
+            self.checker = StockChecker(
+                links_directory=self.app_config['links_directory'],
+                max_concurrency=self.app_config['max_concurrency'],
+                catalog=self.catalog
+            )
             
             # Get available keys from selected CSV file
             keys = self.get_available_keys()
@@ -238,12 +265,15 @@ class StockCheckerCLI:
                 continue
             
             # Display key menu and get selection
-            selected_key = self.display_key_menu(keys)
-            if selected_key is None:
+            selected_keys = self.display_key_menu(keys)
+            if selected_keys is None:
                 continue  # Go back to CSV selection instead of exiting
             
             # Start monitoring
-            self.start_monitoring(selected_key, email_settings)
+            self.start_monitoring(selected_keys, email_settings)
+
+        if self.checker is not None:
+            self.checker.close()
 
 def main():
     try:
@@ -0,0 +1,251 @@
+import bisect
+import hashlib
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from typing import Iterable, List, Optional
+from rate_limiter import get_host
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS nodes (
+    node_id TEXT PRIMARY KEY,
+    started REAL NOT NULL,
+    heartbeat REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS alerts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    node_id TEXT NOT NULL,
+    to_email TEXT NOT NULL,
+    product_name TEXT,
+    url TEXT,
+    site_name TEXT,
+    created REAL NOT NULL
+);
+"""
+
+
+def default_node_id() -> str:
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def stable_hash(value: str) -> int:
+    """Hash a string the same way in every process, unlike the salted built-in hash()."""
+    return int.from_bytes(hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+class HashRing:
+    """
+    Consistent hash ring mapping shard keys to nodes.
+
+    Each node is placed on the ring `replicas` times. When a node joins or
+    leaves, only the keys next to its points move, about 1/n of them,
+    instead of nearly all keys as with `hash(key) % n`.
+    """
+
+    def __init__(self, nodes: Iterable[str], replicas: int = 64):
+        self.nodes = sorted(set(nodes))
+        points = sorted(
+            (stable_hash(f"{node}#{replica}"), node) for node in self.nodes for replica in range(replicas)
+        )
+        self.hashes = [point for point, _ in points]
+        self.owners = [node for _, node in points]
+
+    def owner(self, key: str) -> Optional[str]:
+        """Return the node owning a key, or None if the ring is empty."""
+        if not self.hashes:
+            return None
+        index = bisect.bisect(self.hashes, stable_hash(key)) % len(self.hashes)
+        return self.owners[index]
+
+
+class ClusterStore:
+    """
+    SQLite database shared by the nodes of a monitoring cluster.
+
+    Nodes register and heartbeat in the 'nodes' table; a node whose last
+    heartbeat is older than the TTL is considered dead. In-stock alerts from
+    every node are appended to the 'alerts' table and taken out in batches by
+    one node, so they go out as a single notification stream. The database is
+    in WAL mode and every node opens its own connection.
+    """
+
+    def __init__(self, path: str, timeout: float = 10.0):
+        """
+        Open (or create) the coordination database.
+
+        Args:
+            path (str): The SQLite database file, on storage every node can reach
+            timeout (float, optional): Seconds to wait for another node's write lock. Defaults to 10.0.
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, timeout=timeout, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SCHEMA)
+
+    def heartbeat(self, node_id: str, now: Optional[float] = None):
+        """Register a node, or record that it is still alive."""
+        now = time.time() if now is None else now
+        with self.lock:
+            self.connection.execute(
+                "INSERT INTO nodes (node_id, started, heartbeat) VALUES (?, ?, ?) "
+                "ON CONFLICT(node_id) DO UPDATE SET heartbeat = excluded.heartbeat",
+                (node_id, now, now)
+            )
+
+    def remove_node(self, node_id: str):
+        with self.lock:
+            self.connection.execute("DELETE FROM nodes WHERE node_id = ?", (node_id,))
+
+    def live_nodes(self, ttl: float, now: Optional[float] = None) -> List[str]:
+        """Return the nodes that sent a heartbeat within the last `ttl` seconds, sorted."""
+        now = time.time() if now is None else now
+        with self.lock:
+            rows = self.connection.execute(
+                "SELECT node_id FROM nodes WHERE heartbeat >= ? ORDER BY node_id", (now - ttl,)
+            ).fetchall()
+        return [node_id for node_id, in rows]
+
+    def publish_alert(self, node_id: str, to_email: str, product_name: str, url: Optional[str] = None,
+                      site_name: Optional[str] = None):
+        """Append an in-stock alert to the shared stream."""
+        with self.lock:
+            self.connection.execute(
+                "INSERT INTO alerts (node_id, to_email, product_name, url, site_name, created) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (node_id, to_email, product_name, url, site_name, time.time())
+            )
+
+    def take_alerts(self, limit: int = 100) -> List[dict]:
+        """
+        Remove and return the oldest queued alerts.
+
+        The read and delete happen in one write transaction, so every alert is
+        handed to exactly one caller even if several nodes call this at once.
+
+        Returns:
+            List[dict]: Alerts with 'to_email', 'product_name', 'url' and 'site_name' keys
+        """
+        with self.lock:
+            # Only take the write lock when there is something to take
+            if self.connection.execute("SELECT 1 FROM alerts LIMIT 1").fetchone() is None:
+                return []
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                rows = self.connection.execute(
+                    "SELECT id, to_email, product_name, url, site_name FROM alerts ORDER BY id LIMIT ?", (limit,)
+                ).fetchall()
+                if rows:
+                    self.connection.executemany("DELETE FROM alerts WHERE id = ?", [(row[0],) for row in rows])
+                self.connection.execute("COMMIT")
+            except sqlite3.Error:
+                self.connection.execute("ROLLBACK")
+                raise
+        return [
+            {'to_email': to_email, 'product_name': product_name, 'url': url, 'site_name': site_name}
+            for _, to_email, product_name, url, site_name in rows
+        ]
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+
+class ClusterNode:
+    """
+    One checker process's view of the cluster.
+
+    URLs are sharded on a consistent hash ring of the live nodes. By default
+    the shard key is the URL's host, so every request to a host comes from
+    one node and that node's per-host rate limiter is the only one pacing it;
+    with `shard_by='url'` a single large store is spread over all nodes
+    instead. When a node stops heartbeating for `node_ttl` seconds, or leaves,
+    the ring is rebuilt and its URLs move to the remaining nodes. Nodes notice
+    changes at their next heartbeat, so for up to one heartbeat interval a
+    URL that is changing hands can be checked by both nodes.
+
+    The live node with the smallest id is the leader and sends the combined
+    notification stream.
+    """
+
+    def __init__(self, store: ClusterStore, node_id: Optional[str] = None, heartbeat_interval: float = 5.0,
+                 node_ttl: float = 15.0, shard_by: str = 'host', replicas: int = 64):
+        """
+        Set up the node. Call `join` to register it.
+
+        Args:
+            store (ClusterStore): The shared coordination database.
+            node_id (Optional[str]): A name unique within the cluster. Defaults to '<hostname>-<pid>'.
+            heartbeat_interval (float, optional): Seconds between heartbeats. Defaults to 5.0.
+            node_ttl (float, optional): Seconds without a heartbeat before a node is considered dead,
+                at least two heartbeat intervals. Defaults to 15.0.
+            shard_by (str, optional): 'host' or 'url'. Defaults to 'host'.
+            replicas (int, optional): Points per node on the hash ring. Defaults to 64.
+        """
+        if shard_by not in ('host', 'url'):
+            raise ValueError(f"Unknown shard key: {shard_by}")
+        self.store = store
+        self.node_id = node_id or default_node_id()
+        self.heartbeat_interval = heartbeat_interval
+        self.node_ttl = max(node_ttl, heartbeat_interval * 2)
+        self.shard_by = shard_by
+        self.replicas = replicas
+        self.ring = HashRing([self.node_id], replicas)
+        self.last_heartbeat: Optional[float] = None
+
+    def shard_key(self, entry: dict) -> str:
+        return get_host(entry['url']) if self.shard_by == 'host' else entry['url']
+
+    def join(self, now: Optional[float] = None):
+        """Register the node and take its share of the ring."""
+        self.refresh(now, force=True)
+        logging.info(f"Node {self.node_id} joined a cluster of {len(self.ring.nodes)} nodes")
+
+    def leave(self):
+        """Deregister the node so the others take over its URLs without waiting for the TTL."""
+        self.store.remove_node(self.node_id)
+        logging.info(f"Node {self.node_id} left the cluster")
+
+    def refresh(self, now: Optional[float] = None, force: bool = False) -> bool:
+        """
+        Send a heartbeat if one is due and rebuild the ring from the live nodes.
+
+        Args:
+            now (Optional[float]): The current time, for tests. Defaults to time.time().
+            force (bool, optional): Heartbeat even if `heartbeat_interval` has not passed. Defaults to False.
+
+        Returns:
+            bool: True if the set of live nodes changed
+        """
+        now = time.time() if now is None else now
+        if not force and self.last_heartbeat is not None and now - self.last_heartbeat < self.heartbeat_interval:
+            return False
+        self.store.heartbeat(self.node_id, now)
+        self.last_heartbeat = now
+        nodes = self.store.live_nodes(self.node_ttl, now)
+        if nodes == self.ring.nodes:
+            return False
+        self.ring = HashRing(nodes, self.replicas)
+        return True
+
+    def owns(self, entry: dict) -> bool:
+        return self.ring.owner(self.shard_key(entry)) == self.node_id
+
+    def assign(self, urls: List[dict]) -> List[dict]:
+        """Return the entries this node is responsible for."""
+        return [entry for entry in urls if self.owns(entry)]
+
+    def is_leader(self) -> bool:
+        return bool(self.ring.nodes) and self.ring.nodes[0] == self.node_id
+
+    def publish_alert(self, to_email: str, product_name: str, url: Optional[str] = None,
+                      site_name: Optional[str] = None):
+        """Add an in-stock alert to the cluster's notification stream."""
+        self.store.publish_alert(self.node_id, to_email, product_name, url, site_name)
+
+    def take_alerts(self) -> List[dict]:
+        """Return the queued alerts of every node to send, if this node is the leader."""
+        return self.store.take_alerts() if self.is_leader() else []
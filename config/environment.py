@@ -14,6 +14,15 @@ def get_email_config():
         'smtp_port': int(os.getenv('SMTP_PORT', 587)),
         'sender_email': os.getenv('SENDER_EMAIL'),
         'sender_password': os.getenv('SENDER_PASSWORD'),
+        'use_tls': os.getenv('SMTP_STARTTLS', 'true').lower() in ('1', 'true', 'yes'),
+    }
+
+def get_notification_config():
+    """Get notification batching configuration from environment variables"""
+    return {
+        'digest_window': float(os.getenv('NOTIFY_DIGEST_WINDOW', 2.0)),
+        'idle_timeout': float(os.getenv('SMTP_IDLE_TIMEOUT', 60)),
+        'max_attempts': int(os.getenv('SMTP_MAX_ATTEMPTS', 3)),
     }
 
 def get_request_headers():
@@ -24,6 +33,83 @@ def get_request_headers():
         'Accept-Language': os.getenv('ACCEPT_LANGUAGE', 'en-US,en;q=0.5'),
     }
 
+def get_http_config():
+    """Get HTTP session pooling and retry configuration from environment variables"""
+    return {
+        'pool_connections': int(os.getenv('HTTP_POOL_CONNECTIONS', 10)),
+        'pool_maxsize': int(os.getenv('HTTP_POOL_MAXSIZE', 10)),
+        'max_retries': int(os.getenv('HTTP_MAX_RETRIES', 3)),
+        'backoff_factor': float(os.getenv('HTTP_BACKOFF_FACTOR', 0.5)),
+        'timeout': float(os.getenv('HTTP_TIMEOUT', 30)),
+    }
+
+def get_poll_config():
+    """Get adaptive polling configuration from environment variables"""
+    return {
+        'min_interval': float(os.getenv('POLL_MIN_INTERVAL', 60)),
+        'max_interval': float(os.getenv('POLL_MAX_INTERVAL', 3600)),
+        'jitter': float(os.getenv('POLL_JITTER', 0.1)),
+        'backoff': float(os.getenv('POLL_BACKOFF', 1.5)),
+        'stable_ratio': float(os.getenv('POLL_STABLE_RATIO', 0.01)),
+        'drop_lead': float(os.getenv('DROP_LEAD_TIME', 900)),
+        'drop_window': float(os.getenv('DROP_WINDOW', 3600)),
+    }
+
+def get_rate_limit_config():
+    """Get per-host rate limiting configuration from environment variables"""
+    return {
+        'rate': float(os.getenv('HOST_RATE_LIMIT', 2.0)),
+        'burst': int(os.getenv('HOST_RATE_BURST', 4)),
+        'max_concurrency': int(os.getenv('HOST_MAX_CONCURRENCY', 2)),
+        'overrides': os.getenv('HOST_RATE_LIMITS', ''),
+    }
+
+def get_selenium_config():
+    """Get Selenium driver pool configuration from environment variables"""
+    return {
+        'pool_size': int(os.getenv('SELENIUM_POOL_SIZE', 2)),
+        'max_pages': int(os.getenv('SELENIUM_MAX_PAGES', 100)),
+        'max_wait': float(os.getenv('SELENIUM_MAX_WAIT', 10)),
+        'poll_interval': float(os.getenv('SELENIUM_POLL_INTERVAL', 0.1)),
+    }
+
+def get_parser_config():
+    """Get HTML parser backend configuration from environment variables"""
+    return {
+        'backend': os.getenv('HTML_PARSER', 'auto'),
+        'parse_only': os.getenv('SOUP_PARSE_ONLY', 'true').lower() in ('1', 'true', 'yes'),
+        'workers': int(os.getenv('PARSE_WORKERS', 0)),
+    }
+
+def get_metrics_config():
+    """Get metrics endpoint and summary configuration from environment variables"""
+    return {
+        'port': int(os.getenv('METRICS_PORT', 0)),
+        'host': os.getenv('METRICS_HOST', '127.0.0.1'),
+        'summary_file': os.getenv('METRICS_SUMMARY_FILE'),
+        'summary_interval': float(os.getenv('METRICS_SUMMARY_INTERVAL', 60)),
+    }
+
+def get_logging_config():
+    """Get log file and format configuration from environment variables"""
+    return {
+        'level': os.getenv('LOG_LEVEL', 'INFO'),
+        'filename': os.getenv('LOG_FILE', 'stock_checker.log'),
+        'max_bytes': int(os.getenv('LOG_MAX_BYTES', 10 * 1024 * 1024)),
+        'backup_count': int(os.getenv('LOG_BACKUP_COUNT', 5)),
+        'format': os.getenv('LOG_FORMAT', 'json'),
+    }
+
+def get_cluster_config():
+    """Get multi-node monitoring configuration from environment variables"""
+    return {
+        'db': os.getenv('CLUSTER_DB'),
+        'node_id': os.getenv('NODE_ID'),
+        'heartbeat_interval': float(os.getenv('CLUSTER_HEARTBEAT_INTERVAL', 5)),
+        'node_ttl': float(os.getenv('CLUSTER_NODE_TTL', 15)),
+        'shard_by': os.getenv('CLUSTER_SHARD_BY', 'host'),
+    }
+
 def get_receiver_email():
     """Get receiver email from environment variable"""
     return os.getenv('RECEIVER_EMAIL')
@@ -32,7 +118,16 @@ def get_app_config():
     """Get application configuration from environment variables"""
     return {
         'check_interval': int(os.getenv('CHECK_INTERVAL', 300)),
+        'max_concurrency': int(os.getenv('MAX_CONCURRENCY', 1)),
         'links_directory': os.getenv('LINKS_DIRECTORY', './links'),
         'log_level': os.getenv('LOG_LEVEL', 'INFO'),
         'csv_filename': os.getenv('CSV_FILENAME', 'pokemon_products.csv')
-    }
\ No newline at end of file
+    }
+
+def get_daemon_config():
+    """Get headless daemon configuration from environment variables"""
+    return {
+        'csv_filename': os.getenv('MONITOR_CSV', '*'),
+        'keys': os.getenv('MONITOR_KEYS', '*'),
+        'receiver_email': get_receiver_email(),
+    }
@@ -0,0 +1,176 @@
+"""
+Headless entry point for running the stock monitor as a service.
+
+Configured from environment variables and command line arguments only; it
+never prompts, clears the screen or imports the interactive CLI or the
+`keyboard` module. SIGTERM or SIGINT stop dispatching new checks, let
+in-flight checks finish, flush the stock state and send queued notifications
+before exiting. A second signal exits immediately.
+
+    python daemon.py --csv pokemon_products.csv --keys elite_trainer_box,booster_bundle
+
+With --once, every URL is checked a single time and the daemon exits, e.g. from cron.
+
+With --cluster-db, several daemons sharing that SQLite file split the URLs
+between them and send one combined stream of notifications.
+"""
+import argparse
+import logging
+import signal
+import sys
+import threading
+from typing import List, Optional
+from cluster import ClusterNode, ClusterStore
+from config.environment import load_environment, get_app_config, get_daemon_config, get_logging_config, get_cluster_config
+from stock_checker import StockChecker
+from structured_logging import setup_logging
+
+
+def split_list(value: Optional[str]) -> Optional[List[str]]:
+    """Split a comma-separated setting, returning None when it is empty or '*'."""
+    items = [item.strip() for item in (value or '').split(',') if item.strip()]
+    return None if not items or items == ['*'] else items
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """
+    Parse the command line, using environment variables as defaults.
+
+    Args:
+        argv (Optional[List[str]]): The arguments. Defaults to sys.argv[1:].
+
+    Returns:
+        argparse.Namespace: The daemon settings
+    """
+    load_environment()
+    app_config = get_app_config()
+    daemon_config = get_daemon_config()
+    cluster_config = get_cluster_config()
+
+    parser = argparse.ArgumentParser(description="Monitor product stock without an interactive terminal.")
+    parser.add_argument('--links-directory', default=app_config['links_directory'],
+                        help="Directory holding the CSV files (LINKS_DIRECTORY)")
+    parser.add_argument('--csv', default=daemon_config['csv_filename'],
+                        help="CSV file to monitor, or '*' for every CSV file (MONITOR_CSV, default: all)")
+    parser.add_argument('--keys', default=daemon_config['keys'],
+                        help="Comma-separated keys to monitor, or '*' for all (MONITOR_KEYS, default: all)")
+    parser.add_argument('--email', default=daemon_config['receiver_email'],
+                        help="Address to notify when a product comes into stock (RECEIVER_EMAIL)")
+    parser.add_argument('--max-concurrency', type=int, default=app_config['max_concurrency'],
+                        help="Checks in flight at once (MAX_CONCURRENCY)")
+    parser.add_argument('--check-interval', type=float, default=app_config['check_interval'],
+                        help="Starting polling interval per URL in seconds (CHECK_INTERVAL)")
+    parser.add_argument('--min-interval', type=float, default=None,
+                        help="Shortest polling interval in seconds (POLL_MIN_INTERVAL)")
+    parser.add_argument('--max-interval', type=float, default=None,
+                        help="Longest polling interval in seconds (POLL_MAX_INTERVAL)")
+    parser.add_argument('--fetch-mode', choices=['requests', 'selenium', 'auto'], default=None,
+                        help="How pages are fetched (FETCH_MODE)")
+    parser.add_argument('--log-level', default=app_config['log_level'], help="Logging level (LOG_LEVEL)")
+    parser.add_argument('--once', action='store_true',
+                        help="Check every URL once and exit instead of monitoring")
+    parser.add_argument('--cluster-db', default=cluster_config['db'],
+                        help="SQLite file shared with the other nodes to split the URLs with (CLUSTER_DB)")
+    parser.add_argument('--node-id', default=cluster_config['node_id'],
+                        help="This node's name in the cluster (NODE_ID, default: <hostname>-<pid>)")
+    parser.add_argument('--shard-by', choices=['host', 'url'], default=cluster_config['shard_by'],
+                        help="Split URLs between nodes by store host or by URL (CLUSTER_SHARD_BY)")
+    return parser.parse_args(argv)
+
+
+def install_signal_handlers(stop: threading.Event):
+    """Set `stop` on SIGTERM/SIGINT; a second signal falls back to the default action."""
+    def handle_signal(signum, frame):
+        logging.info(f"Received {signal.Signals(signum).name}, finishing in-flight checks")
+        stop.set()
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+
+    signal.signal(signal.SIGTERM, handle_signal)
+    signal.signal(signal.SIGINT, handle_signal)
+
+
+def run(args: argparse.Namespace, stop: threading.Event) -> int:
+    """
+    Monitor the configured links until `stop` is set, or check them once with --once.
+
+    Args:
+        args (argparse.Namespace): Settings from `parse_args`
+        stop (threading.Event): Set to shut down
+
+    Returns:
+        int: The process exit code
+    """
+    checker = StockChecker(
+        check_interval=args.check_interval,
+        links_directory=args.links_directory,
+        max_concurrency=args.max_concurrency
+    )
+    cluster_store = None
+    try:
+        if args.min_interval is not None:
+            checker.poll_config['min_interval'] = args.min_interval
+        if args.max_interval is not None:
+            checker.poll_config['max_interval'] = args.max_interval
+
+        csv_filename = None if args.csv in (None, '', '*') else args.csv
+        watcher = checker.watch_links(csv_filename, split_list(args.keys))
+        urls = watcher.get_urls()
+        if not urls:
+            logging.error(f"No URLs to monitor in {watcher.name} for keys {args.keys or '*'}")
+            return 1
+        if not args.email:
+            logging.warning("No notification email configured, restocks will only be logged")
+
+        cluster = None
+        if args.cluster_db:
+            cluster_config = get_cluster_config()
+            cluster_store = ClusterStore(args.cluster_db)
+            cluster = ClusterNode(
+                cluster_store,
+                node_id=args.node_id,
+                heartbeat_interval=cluster_config['heartbeat_interval'],
+                node_ttl=cluster_config['node_ttl'],
+                shard_by=args.shard_by
+            )
+            logging.info(f"Sharing {len(urls)} URLs from {watcher.name} with the nodes in {args.cluster_db}")
+
+        if args.once:
+            reported = checker.run_sweep(urls, args.email, should_stop=stop.is_set, fetch_mode=args.fetch_mode)
+            logging.info(f"Checked {reported} of {len(urls)} URLs from {watcher.name}")
+            return 0 if reported == len(urls) else 1
+
+        logging.info(f"Monitoring {len(urls)} URLs from {watcher.name} with up to "
+                     f"{checker.max_concurrency} checks at a time")
+        checker.run_monitor_loop(
+            urls,
+            args.email,
+            should_stop=stop.is_set,
+            fetch_mode=args.fetch_mode,
+            watcher=watcher,
+            cluster=cluster
+        )
+        logging.info("Monitoring stopped")
+        return 0
+    finally:
+        checker.close()
+        if cluster_store is not None:
+            cluster_store.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    logging_config = get_logging_config()
+    setup_logging(
+        filename=None,
+        level=args.log_level,
+        log_format=logging_config['format'],
+        stream=sys.stderr
+    )
+    stop = threading.Event()
+    install_signal_handlers(stop)
+    return run(args, stop)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+import logging
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+
+class DriverPool:
+    """
+    Bounded pool of long-lived Selenium WebDriver instances.
+
+    Drivers are created on demand up to `size`, handed out one caller at a
+    time and returned to the pool after use, so browser startup is paid once
+    per driver instead of once per page. A driver is health-checked before it
+    is handed out, quit after `max_pages` pages, and thrown away if it raises a
+    WebDriverException while in use.
+    """
+
+    def __init__(self, factory: Callable[[], object], size: int = 2, max_pages: int = 100):
+        """
+        Initialize the pool.
+
+        Args:
+            factory (Callable[[], object]): Creates a new WebDriver instance.
+            size (int, optional): The maximum number of drivers alive at once. Defaults to 2.
+            max_pages (int, optional): The number of pages a driver renders before it is recycled. Defaults to 100.
+        """
+        self.factory = factory
+        self.size = max(1, size)
+        self.max_pages = max(1, max_pages)
+        self.idle = queue.LifoQueue()
+        self.slots = threading.BoundedSemaphore(self.size)
+        self.page_counts: Dict[int, int] = {}
+        self.lock = threading.Lock()
+        self.closed = False
+
+    @contextmanager
+    def acquire(self, timeout: Optional[float] = None):
+        """
+        Context manager that lends a driver from the pool.
+
+        Blocks while all `size` drivers are in use.
+
+        Args:
+            timeout (Optional[float]): Seconds to wait for a free driver. Waits forever if None.
+
+        Yields:
+            A healthy WebDriver instance.
+
+        Raises:
+            TimeoutError: If no driver became free within `timeout`.
+        """
+        from selenium.common.exceptions import WebDriverException
+
+        if self.closed:
+            raise RuntimeError("Driver pool is closed")
+        if not self.slots.acquire(timeout=timeout):
+            raise TimeoutError("Timed out waiting for a Selenium driver")
+
+        try:
+            driver = self.checkout()
+            try:
+                yield driver
+            except WebDriverException:
+                # The browser may have crashed; never hand this one out again
+                self.discard(driver)
+                raise
+            except BaseException:
+                self.checkin(driver)
+                raise
+            else:
+                self.checkin(driver)
+        finally:
+            self.slots.release()
+
+    def checkout(self):
+        """Return an idle healthy driver, or create a new one."""
+        while True:
+            try:
+                driver = self.idle.get_nowait()
+            except queue.Empty:
+                break
+            if self.is_healthy(driver):
+                return driver
+            logging.info("Recycling unresponsive Selenium driver")
+            self.discard(driver)
+
+        driver = self.factory()
+        with self.lock:
+            self.page_counts[id(driver)] = 0
+        return driver
+
+    def checkin(self, driver):
+        """Return a driver to the pool, recycling it once it reaches `max_pages`."""
+        with self.lock:
+            pages = self.page_counts.get(id(driver), 0) + 1
+            self.page_counts[id(driver)] = pages
+
+        if self.closed or pages >= self.max_pages:
+            self.discard(driver)
+        else:
+            self.idle.put(driver)
+
+    def discard(self, driver):
+        """Quit a driver and forget about it."""
+        with self.lock:
+            self.page_counts.pop(id(driver), None)
+        try:
+            driver.quit()
+        except Exception as e:
+            logging.debug(f"Error quitting Selenium driver: {e}")
+
+    @staticmethod
+    def is_healthy(driver) -> bool:
+        """Check that the browser behind a driver still responds."""
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def close(self):
+        """Quit all idle drivers. Drivers in use are quit when they are returned."""
+        self.closed = True
+        while True:
+            try:
+                self.discard(self.idle.get_nowait())
+            except queue.Empty:
+                break
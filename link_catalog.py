@@ -0,0 +1,349 @@
+import csv
+import logging
+import os
+import stat
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+REQUIRED_COLUMNS = ('key', 'site_name', 'url')
+
+
+def clean_cell(value: Optional[str]) -> str:
+    """Strip the quotes and whitespace that hand-edited CSV files tend to pick up."""
+    return (value or '').strip('" \'\t')
+
+
+class CatalogFile:
+    """The parsed contents of one links CSV, indexed by key."""
+
+    def __init__(self, signature: Tuple[int, int, int], fieldnames: List[str], index: Dict[str, List[dict]]):
+        self.signature = signature
+        self.fieldnames = fieldnames
+        self.index = index
+        self.keys = sorted(index)
+        self.row_count = sum(len(entries) for entries in index.values())
+
+
+class LinkCatalog:
+    """
+    Cache of the links CSV files in a directory.
+
+    Each file is parsed once into a key -> entries index and parsed again only
+    when its size, modification time or inode changes. The list of CSV files
+    is cached the same way against the directory's modification time.
+    Lookups return copies of the cached entries, so callers may modify them.
+    """
+
+    def __init__(self, directory):
+        """
+        Initialize an empty catalog.
+
+        Args:
+            directory: The directory holding the CSV files.
+        """
+        self.directory = Path(directory)
+        self.files: Dict[Path, CatalogFile] = {}
+        self.listing: Optional[Tuple[int, List[Path]]] = None
+        self.lock = threading.Lock()
+
+    def resolve(self, filename) -> Path:
+        return self.directory / filename
+
+    @staticmethod
+    def signature(file_stat: os.stat_result) -> Tuple[int, int, int]:
+        return file_stat.st_mtime_ns, file_stat.st_size, file_stat.st_ino
+
+    def list_files(self) -> List[Path]:
+        """Return the CSV files in the directory, sorted by name."""
+        try:
+            mtime = self.directory.stat().st_mtime_ns
+        except FileNotFoundError:
+            return []
+        with self.lock:
+            if self.listing is None or self.listing[0] != mtime:
+                self.listing = (mtime, sorted(self.directory.glob('*.csv')))
+            return list(self.listing[1])
+
+    def load(self, filename) -> CatalogFile:
+        """
+        Return the parsed file, reading it again only if it changed on disk.
+
+        Args:
+            filename: The CSV file name, relative to the catalog directory, or an absolute path
+
+        Returns:
+            CatalogFile: The parsed file
+
+        Raises:
+            FileNotFoundError: If the file does not exist
+            KeyError: If the file lacks the 'key', 'site_name' or 'url' column
+            csv.Error: If the file cannot be parsed
+        """
+        path = self.resolve(filename)
+        signature = self.signature(path.stat())
+        with self.lock:
+            cached = self.files.get(path)
+            if cached is not None and cached.signature == signature:
+                return cached
+
+        parsed = self.parse(path, signature)
+        with self.lock:
+            self.files[path] = parsed
+        return parsed
+
+    @staticmethod
+    def parse(path: Path, signature: Tuple[int, int, int]) -> CatalogFile:
+        """Read a CSV file into a key -> entries index."""
+        index: Dict[str, List[dict]] = {}
+        with path.open(mode='r', encoding='utf-8', newline='') as csvfile:
+            reader = csv.DictReader(csvfile)
+            fieldnames = list(reader.fieldnames or [])
+            missing = [column for column in REQUIRED_COLUMNS if column not in fieldnames]
+            if missing:
+                raise KeyError(f"{path.name} is missing required columns: {', '.join(missing)}")
+            has_drop_at = 'drop_at' in fieldnames
+
+            for row in reader:
+                entry = {
+                    'url': clean_cell(row['url']),
+                    'site_name': clean_cell(row['site_name'])
+                }
+                if has_drop_at and clean_cell(row['drop_at']):
+                    entry['drop_at'] = clean_cell(row['drop_at'])
+                index.setdefault(clean_cell(row['key']), []).append(entry)
+
+        logging.info(f"Indexed {sum(len(entries) for entries in index.values())} links "
+                     f"under {len(index)} keys from {path.name}")
+        return CatalogFile(signature, fieldnames, index)
+
+    def get_keys(self, filename) -> List[str]:
+        """Return the sorted unique keys in a file."""
+        return list(self.load(filename).keys)
+
+    def get_fieldnames(self, filename) -> List[str]:
+        """Return the header columns of a file."""
+        return list(self.load(filename).fieldnames)
+
+    def get_entries(self, filename, keys: Optional[Iterable[str]] = None) -> Dict[str, List[dict]]:
+        """
+        Look up the entries for several keys at once.
+
+        Args:
+            filename: The CSV file name
+            keys (Optional[Iterable[str]]): The keys to look up. Every key in the file if None.
+
+        Returns:
+            Dict[str, List[dict]]: Per requested key, in order, copies of its entries.
+            Keys without entries map to an empty list.
+        """
+        index = self.load(filename).index
+        keys = index.keys() if keys is None else keys
+        return {key: [dict(entry) for entry in index.get(key, [])] for key in keys}
+
+    def invalidate(self, filename=None):
+        """Forget the cached contents of one file, or of every file and the listing."""
+        with self.lock:
+            if filename is None:
+                self.files.clear()
+                self.listing = None
+            else:
+                self.files.pop(self.resolve(filename), None)
+
+    def update_urls(self, filename, updates: Dict[Union[str, Tuple[str, str]], str]) -> dict:
+        """
+        Apply many URL changes to a file in one pass and one atomic replace.
+
+        Rows are matched on the 'key' column, or on 'key' and 'site_name' when
+        the update is keyed by a (key, site_name) tuple, which takes precedence
+        over a plain key. Only the 'url' cell is changed; every other column is
+        written back as it was. The new file is written next to the old one and
+        moved over it, so readers see either the old or the new file. Nothing is
+        written if no URL actually changes.
+
+        Args:
+            filename: The CSV file name
+            updates (Dict[Union[str, Tuple[str, str]], str]): New URLs by key or by (key, site_name)
+
+        Returns:
+            dict: 'changed', a list of the changed rows with their key, site_name,
+            old_url and new_url; 'matched', the number of rows that matched an
+            update; and 'missing', the updates that matched no row
+
+        Raises:
+            FileNotFoundError: If the file does not exist
+            KeyError: If the file lacks the 'key', 'site_name' or 'url' column
+        """
+        path = self.resolve(filename)
+        changed: List[dict] = []
+        matched = 0
+        used = set()
+
+        fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix='.tmp')
+        try:
+            with os.fdopen(fd, mode='w', encoding='utf-8', newline='') as output, \
+                    path.open(mode='r', encoding='utf-8', newline='') as csvfile:
+                # mkstemp creates the file owner-only; keep the original permissions
+                mode = stat.S_IMODE(os.fstat(csvfile.fileno()).st_mode)
+                reader = csv.reader(csvfile)
+                header = next(reader, [])
+                columns = [clean_cell(name) for name in header]
+                missing_columns = [column for column in REQUIRED_COLUMNS if column not in columns]
+                if missing_columns:
+                    raise KeyError(f"{path.name} is missing required columns: {', '.join(missing_columns)}")
+                key_col, site_col, url_col = (columns.index(column) for column in REQUIRED_COLUMNS)
+
+                writer = csv.writer(output)
+                writer.writerow(header)
+                for row in reader:
+                    if len(row) > max(key_col, site_col, url_col):
+                        key, site_name = clean_cell(row[key_col]), clean_cell(row[site_col])
+                        update = (key, site_name) if (key, site_name) in updates else key
+                        if update in updates:
+                            matched += 1
+                            used.add(update)
+                            new_url = updates[update]
+                            if clean_cell(row[url_col]) != new_url:
+                                changed.append({
+                                    'key': key,
+                                    'site_name': site_name,
+                                    'old_url': clean_cell(row[url_col]),
+                                    'new_url': new_url,
+                                })
+                                row[url_col] = new_url
+                    writer.writerow(row)
+                output.flush()
+                os.fsync(output.fileno())
+
+            # Both files are closed first: Windows cannot replace a file that is open
+            if changed:
+                os.chmod(temp_name, mode)
+                os.replace(temp_name, path)
+                self.invalidate(filename)
+        finally:
+            if os.path.exists(temp_name):
+                os.unlink(temp_name)
+
+        return {
+            'changed': changed,
+            'matched': matched,
+            'missing': [update for update in updates if update not in used],
+        }
+
+
+class LinkWatcher:
+    """
+    The monitored links, kept up to date while monitoring runs.
+
+    Watches one CSV file, or every CSV file in the catalog directory, and
+    merges the rows for the selected keys (or all keys) into one list with
+    each (url, site_name) pair once. Every merged entry lists the keys that
+    reference it under 'keys', so one check can be reported for all of them.
+
+    Polling costs a stat call per file every `interval`; a file is only parsed
+    again, through the catalog, when its size, mtime or inode changed. A file
+    that cannot be read keeps its last good contents, so a half-written file
+    does not drop its URLs from the schedule.
+    """
+
+    def __init__(self, catalog: LinkCatalog, filename=None, keys: Optional[List[str]] = None,
+                 interval: float = 5.0):
+        """
+        Start watching, taking the current contents as the baseline.
+
+        Args:
+            catalog (LinkCatalog): The catalog the files are read through.
+            filename: The CSV file name. Every CSV file in the directory if None.
+            keys (Optional[List[str]]): The keys being monitored. Every key if None.
+            interval (float, optional): Minimum seconds between checks of the files. Defaults to 5.0.
+        """
+        self.catalog = catalog
+        self.filename = filename
+        self.keys = keys
+        self.interval = interval
+        self.name = str(filename) if filename else str(catalog.directory)
+        self.loaded: Dict[str, CatalogFile] = {}
+        self.failed: Dict[str, Tuple[int, int, int]] = {}
+        self.last_poll = time.monotonic()
+        self.refresh()
+
+    def filenames(self) -> List[str]:
+        if self.filename:
+            return [self.filename]
+        return [path.name for path in self.catalog.list_files()]
+
+    def refresh(self) -> bool:
+        """
+        Load every watched file that changed.
+
+        Returns:
+            bool: True if the set of files or any file's contents changed
+        """
+        loaded = {}
+        for filename in self.filenames():
+            previous = self.loaded.get(filename)
+            try:
+                signature = self.catalog.signature(self.catalog.resolve(filename).stat())
+            except OSError as e:
+                logging.warning(f"Could not load {filename}: {e}")
+                signature = None
+            if signature is not None and self.failed.get(filename) != signature:
+                try:
+                    loaded[filename] = self.catalog.load(filename)
+                    self.failed.pop(filename, None)
+                    continue
+                except (OSError, KeyError, csv.Error) as e:
+                    # Not retried until the file changes again
+                    logging.warning(f"Could not load {filename}: {e}")
+                    self.failed[filename] = signature
+            if previous is not None:
+                loaded[filename] = previous
+
+        changed = loaded.keys() != self.loaded.keys() or any(
+            loaded[filename] is not self.loaded[filename] for filename in loaded
+        )
+        self.loaded = loaded
+        return changed
+
+    def get_urls(self) -> List[dict]:
+        """
+        Return the watched entries, merged by URL.
+
+        A URL listed under several site names is checked once, under the
+        first site name found (by file name, then key order).
+
+        Returns:
+            List[dict]: Entries with 'url', 'site_name', 'keys' and, if any row has one, 'drop_at'
+        """
+        merged: Dict[str, dict] = {}
+        for filename in sorted(self.loaded):
+            catalog_file = self.loaded[filename]
+            for key in (catalog_file.keys if self.keys is None else self.keys):
+                for row in catalog_file.index.get(key, []):
+                    entry = merged.get(row['url'])
+                    if entry is None:
+                        entry = merged[row['url']] = dict(row, keys=[])
+                    elif 'drop_at' in row and 'drop_at' not in entry:
+                        entry['drop_at'] = row['drop_at']
+                    if key not in entry['keys']:
+                        entry['keys'].append(key)
+        return list(merged.values())
+
+    def poll(self, force: bool = False) -> Optional[List[dict]]:
+        """
+        Return the watched entries if any watched file changed since the last poll.
+
+        Args:
+            force (bool, optional): Check the files even if `interval` has not passed. Defaults to False.
+
+        Returns:
+            Optional[List[dict]]: The new list of entries, or None if nothing changed
+            or the files were checked too recently
+        """
+        now = time.monotonic()
+        if not force and now - self.last_poll < self.interval:
+            return None
+        self.last_poll = now
+        return self.get_urls() if self.refresh() else None
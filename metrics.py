@@ -0,0 +1,231 @@
+import bisect
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+
+# Latency buckets in seconds, from a warm keep-alive request to a slow Selenium render
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+DESCRIPTIONS = {
+    'phase_seconds': 'Time spent in each phase of a stock check',
+    'requests_total': 'HTTP responses received, by host and status code',
+    'response_bytes_total': 'Response body bytes received',
+    'not_modified_total': '304 Not Modified responses',
+    'retries_total': 'Requests retried after a 5xx, 429 or 503 answer',
+    'errors_total': 'Exceptions raised in a phase',
+    'checks_total': 'Completed stock checks, by result',
+    'notifications_total': 'Notification emails, by outcome',
+}
+
+
+class Histogram:
+    """Cumulative latency histogram with fixed buckets."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """
+    Thread-safe counters and latency histograms for the checker's hot paths.
+
+    Metrics are keyed by name and a sorted tuple of label pairs. `render`
+    produces the Prometheus text exposition format and `snapshot` a plain dict
+    for sweep summaries.
+    """
+
+    def __init__(self, prefix: str = 'stock_checker', buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.prefix = prefix
+        self.buckets = buckets
+        self.counters: Dict[str, Dict[tuple, float]] = {}
+        self.histograms: Dict[str, Dict[tuple, Histogram]] = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def label_key(labels: dict) -> tuple:
+        return tuple(sorted((name, str(value)) for name, value in labels.items() if value is not None))
+
+    def inc(self, name: str, value: float = 1, **labels):
+        """Add `value` to a counter."""
+        key = self.label_key(labels)
+        with self.lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        """Record a value, in seconds, in a histogram."""
+        key = self.label_key(labels)
+        with self.lock:
+            series = self.histograms.setdefault(name, {})
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    @contextmanager
+    def span(self, phase: str, **labels):
+        """
+        Time a block as one phase of a check.
+
+        The duration is recorded in the 'phase_seconds' histogram; an exception
+        raised in the block is also counted in 'errors_total' before it propagates.
+
+        Args:
+            phase (str): The phase name, e.g. 'request' or 'parse'
+            **labels: Extra labels, typically host
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.inc('errors_total', phase=phase, error=type(e).__name__, **labels)
+            raise
+        finally:
+            self.observe('phase_seconds', time.perf_counter() - start, phase=phase, **labels)
+
+    def snapshot(self) -> dict:
+        """
+        Return the current values as plain data.
+
+        Returns:
+            dict: 'counters' maps each counter to {label string: value}; 'phases' maps
+            each phase to its 'count' and total 'seconds', summed over hosts
+        """
+        with self.lock:
+            counters = {
+                name: {self.format_labels(key): value for key, value in series.items()}
+                for name, series in self.counters.items()
+            }
+            phases: Dict[str, dict] = {}
+            for key, histogram in self.histograms.get('phase_seconds', {}).items():
+                phase = dict(key)['phase']
+                totals = phases.setdefault(phase, {'count': 0, 'seconds': 0.0})
+                totals['count'] += histogram.count
+                totals['seconds'] += histogram.sum
+        return {'counters': counters, 'phases': phases}
+
+    @staticmethod
+    def summarize(before: dict, after: dict) -> dict:
+        """
+        Compute what happened between two snapshots.
+
+        Returns:
+            dict: Counter increases (dropping series that did not change), and per phase
+            the count, total seconds and mean seconds
+        """
+        counters = {}
+        for name, series in after['counters'].items():
+            previous = before['counters'].get(name, {})
+            changed = {labels: value - previous.get(labels, 0) for labels, value in series.items()
+                       if value != previous.get(labels, 0)}
+            if changed:
+                counters[name] = changed
+        phases = {}
+        for phase, totals in after['phases'].items():
+            previous = before['phases'].get(phase, {'count': 0, 'seconds': 0.0})
+            count = totals['count'] - previous['count']
+            if count:
+                seconds = totals['seconds'] - previous['seconds']
+                phases[phase] = {'count': count, 'seconds': round(seconds, 6), 'mean': round(seconds / count, 6)}
+        return {'counters': counters, 'phases': phases}
+
+    @staticmethod
+    def format_labels(key: tuple, extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = list(key) + ([extra] if extra else [])
+        if not pairs:
+            return ''
+        escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+        return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+    def render(self) -> str:
+        """Return every metric in the Prometheus text exposition format."""
+        lines = []
+        with self.lock:
+            for name, series in sorted(self.counters.items()):
+                metric = f"{self.prefix}_{name}"
+                lines.append(f"# HELP {metric} {DESCRIPTIONS.get(name, name)}")
+                lines.append(f"# TYPE {metric} counter")
+                for key, value in sorted(series.items()):
+                    lines.append(f"{metric}{self.format_labels(key)} {value:g}")
+            for name, series in sorted(self.histograms.items()):
+                metric = f"{self.prefix}_{name}"
+                lines.append(f"# HELP {metric} {DESCRIPTIONS.get(name, name)}")
+                lines.append(f"# TYPE {metric} histogram")
+                for key, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f"{metric}_bucket{self.format_labels(key, ('le', f'{bound:g}'))} {cumulative}")
+                    lines.append(f"{metric}_bucket{self.format_labels(key, ('le', '+Inf'))} {histogram.count}")
+                    lines.append(f"{metric}_sum{self.format_labels(key)} {histogram.sum:.6f}")
+                    lines.append(f"{metric}_count{self.format_labels(key)} {histogram.count}")
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsServer:
+    """
+    Local HTTP endpoint for a metrics registry.
+
+    Serves the Prometheus text format on /metrics and a JSON snapshot on
+    /summary from a daemon thread.
+    """
+
+    def __init__(self, registry: MetricsRegistry, host: str = '127.0.0.1', port: int = 9108):
+        """
+        Bind the endpoint. Call `start` to begin serving.
+
+        Args:
+            registry (MetricsRegistry): The metrics to expose.
+            host (str, optional): The interface to listen on. Defaults to '127.0.0.1'.
+            port (int, optional): The port to listen on, or 0 for any free port. Defaults to 9108.
+        """
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split('?', 1)[0]
+                if path == '/metrics':
+                    body = registry.render().encode()
+                    content_type = 'text/plain; version=0.0.4; charset=utf-8'
+                elif path == '/summary':
+                    body = json.dumps(registry.snapshot()).encode()
+                    content_type = 'application/json'
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logging.debug(f"Metrics request: {format % args}")
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name='metrics-server', daemon=True)
+        self.thread.start()
+        logging.info(f"Serving metrics on http://{self.server.server_address[0]}:{self.port}/metrics")
+
+    def close(self):
+        if self.thread is not None:
+            self.server.shutdown()
+        self.server.server_close()
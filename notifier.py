@@ -0,0 +1,270 @@
+import logging
+import queue
+import smtplib
+import threading
+import time
+from email.mime.text import MIMEText
+from typing import Callable, Dict, List, Optional
+from metrics import MetricsRegistry
+
+
+class NotificationDispatcher:
+    """
+    Background sender for stock alert emails.
+
+    `notify` only queues an alert and returns at once, so checks never wait on
+    email delivery. A single worker thread keeps one authenticated SMTP
+    connection open, reconnecting after `idle_timeout` seconds without mail or
+    when the server drops it. Alerts for the same recipient that arrive within
+    `digest_window` seconds of each other are merged into one digest email.
+    """
+
+    def __init__(self, smtp_server: str, smtp_port: int, sender_email: Optional[str],
+                 sender_password: Optional[str], use_tls: bool = True, digest_window: float = 2.0,
+                 idle_timeout: float = 60.0, max_attempts: int = 3, timeout: float = 30.0,
+                 metrics: Optional[MetricsRegistry] = None,
+                 on_failure: Optional[Callable[[List[dict]], None]] = None):
+        """
+        Initialize the dispatcher. The worker thread starts with the first alert.
+
+        Args:
+            smtp_server (str): The SMTP server host.
+            smtp_port (int): The SMTP server port.
+            sender_email (Optional[str]): The From address, also used as the login name.
+            sender_password (Optional[str]): The SMTP password. No login is attempted without one.
+            use_tls (bool, optional): Whether to upgrade the connection with STARTTLS. Defaults to True.
+            digest_window (float, optional): Seconds to wait for more alerts before sending. Defaults to 2.0.
+            idle_timeout (float, optional): Seconds without mail before the connection is closed. Defaults to 60.0.
+            max_attempts (int, optional): Connection attempts per email before it is dropped. Defaults to 3.
+            timeout (float, optional): The socket timeout in seconds for SMTP commands. Defaults to 30.0.
+            metrics (Optional[MetricsRegistry]): Records send times and outcomes. A private registry if None.
+            on_failure (Optional[Callable[[List[dict]], None]]): Called from the worker thread with the alerts
+                of an email that could not be sent, or that were dropped after `close`.
+        """
+        self.smtp_server = smtp_server
+        self.smtp_port = smtp_port
+        self.sender_email = sender_email
+        self.sender_password = sender_password
+        self.use_tls = use_tls
+        self.digest_window = max(0.0, digest_window)
+        self.idle_timeout = idle_timeout
+        self.max_attempts = max(1, max_attempts)
+        self.timeout = timeout
+        self.metrics = metrics or MetricsRegistry()
+        self.on_failure = on_failure
+
+        self.queue = queue.Queue()
+        self.connection: Optional[smtplib.SMTP] = None
+        self.last_used = 0.0
+        self.worker: Optional[threading.Thread] = None
+        self.lock = threading.Lock()
+        self.idle = threading.Condition(self.lock)
+        self.unsent = 0
+        self.closed = False
+        self.stats = {'queued': 0, 'emails': 0, 'failed': 0, 'connections': 0}
+
+    def notify(self, to_email: str, product_name: str, url: Optional[str] = None,
+               site_name: Optional[str] = None):
+        """
+        Queue an in-stock alert without waiting for it to be sent.
+
+        Args:
+            to_email (str): The email address to send the alert to.
+            product_name (str): The name of the product that is now in stock.
+            url (Optional[str]): The product URL.
+            site_name (Optional[str]): The store the product was found on.
+        """
+        alert = {'to_email': to_email, 'product_name': product_name, 'url': url, 'site_name': site_name}
+        with self.lock:
+            closed = self.closed
+            if not closed:
+                self.unsent += 1
+                self.stats['queued'] += 1
+                if self.worker is None:
+                    self.worker = threading.Thread(target=self.run, name="notification-dispatcher", daemon=True)
+                    self.worker.start()
+        if closed:
+            logging.warning(f"Notification dispatcher is closed, dropping alert for {product_name}")
+            self.report_failure([alert])
+            return
+        self.queue.put(alert)
+
+    def report_failure(self, alerts: List[dict]):
+        """Hand alerts that will never be sent to `on_failure`."""
+        if self.on_failure is None:
+            return
+        try:
+            self.on_failure(alerts)
+        except Exception as e:
+            logging.error(f"Error handling undelivered notifications: {str(e)}")
+
+    def run(self):
+        """Worker loop: collect alerts into digests and send them."""
+        while True:
+            try:
+                alert = self.queue.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                self.disconnect()
+                continue
+            if alert is None:
+                break
+
+            batch = [alert]
+            stop = self.collect(batch)
+            self.send_batch(batch)
+            with self.idle:
+                self.unsent -= len(batch)
+                self.idle.notify_all()
+            if stop:
+                break
+        self.disconnect()
+
+    def collect(self, batch: List[dict]) -> bool:
+        """
+        Add alerts arriving within the digest window to the batch.
+
+        Returns:
+            bool: True if the stop sentinel was received
+        """
+        deadline = time.monotonic() + self.digest_window
+        while True:
+            remaining = deadline - time.monotonic()
+            try:
+                alert = self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait()
+            except queue.Empty:
+                return False
+            if alert is None:
+                return True
+            batch.append(alert)
+
+    def send_batch(self, batch: List[dict]):
+        """Send one email per recipient in the batch."""
+        by_recipient: Dict[str, List[dict]] = {}
+        for alert in batch:
+            by_recipient.setdefault(alert['to_email'], []).append(alert)
+
+        for to_email, alerts in by_recipient.items():
+            message = self.build_message(to_email, alerts)
+            with self.metrics.span('smtp_send'):
+                sent = self.deliver(message)
+            if sent:
+                with self.lock:
+                    self.stats['emails'] += 1
+                self.metrics.inc('notifications_total', len(alerts), outcome='sent')
+                logging.info(f"Notification sent to {to_email} ({len(alerts)} products)")
+            else:
+                with self.lock:
+                    self.stats['failed'] += len(alerts)
+                self.metrics.inc('notifications_total', len(alerts), outcome='failed')
+                self.report_failure(alerts)
+
+    def build_message(self, to_email: str, alerts: List[dict]) -> MIMEText:
+        """
+        Build a single alert email, or a digest when there are several alerts.
+
+        Args:
+            to_email (str): The recipient
+            alerts (List[dict]): The alerts for this recipient
+
+        Returns:
+            MIMEText: The message to send
+        """
+        if len(alerts) == 1:
+            alert = alerts[0]
+            msg = MIMEText(f"The product '{alert['product_name']}' is now in stock!\nURL: {alert['url']}")
+            msg['Subject'] = f"Stock Alert: {alert['product_name']}"
+        else:
+            lines = [f"{len(alerts)} products are now in stock:", ""]
+            for alert in alerts:
+                store = f" ({alert['site_name']})" if alert['site_name'] else ""
+                lines.append(f"- {alert['product_name']}{store}")
+                lines.append(f"  URL: {alert['url']}")
+            msg = MIMEText("\n".join(lines))
+            msg['Subject'] = f"Stock Alert: {len(alerts)} products in stock"
+        msg['From'] = self.sender_email
+        msg['To'] = to_email
+        return msg
+
+    def connect(self) -> smtplib.SMTP:
+        """Return the open SMTP connection, opening and authenticating a new one if needed."""
+        if self.connection is not None and time.monotonic() - self.last_used > self.idle_timeout:
+            # The server has probably timed the session out already
+            self.disconnect()
+        if self.connection is None:
+            connection = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=self.timeout)
+            try:
+                if self.use_tls:
+                    connection.starttls()
+                if self.sender_password:
+                    connection.login(self.sender_email, self.sender_password)
+            except Exception:
+                connection.close()
+                raise
+            self.connection = connection
+            with self.lock:
+                self.stats['connections'] += 1
+        return self.connection
+
+    def disconnect(self):
+        """Close the SMTP connection, if one is open."""
+        if self.connection is None:
+            return
+        try:
+            self.connection.quit()
+        except Exception as e:
+            logging.debug(f"Error closing SMTP connection: {e}")
+            self.connection.close()
+        self.connection = None
+
+    def deliver(self, message: MIMEText) -> bool:
+        """
+        Send a message, reconnecting if the connection has gone bad.
+
+        Returns:
+            bool: True if the message was sent
+        """
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                self.connect().send_message(message)
+                self.last_used = time.monotonic()
+                return True
+            except (smtplib.SMTPException, OSError) as e:
+                self.disconnect()
+                if attempt == self.max_attempts:
+                    logging.error(f"Error sending notification: {str(e)}")
+                else:
+                    logging.warning(f"Error sending notification, reconnecting: {str(e)}")
+                    time.sleep(min(2 ** (attempt - 1), 10))
+        return False
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until every queued alert has been sent or dropped.
+
+        Args:
+            timeout (Optional[float]): Seconds to wait. Waits forever if None.
+
+        Returns:
+            bool: True if nothing is left unsent
+        """
+        with self.idle:
+            return self.idle.wait_for(lambda: self.unsent == 0, timeout)
+
+    def close(self, timeout: Optional[float] = None):
+        """Send what is queued, stop the worker and close the SMTP connection."""
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            worker = self.worker
+        if worker is None:
+            return
+        self.queue.put(None)
+        worker.join(timeout)
+        if worker.is_alive():
+            logging.warning(f"{self.unsent} notifications were still unsent at shutdown")
+
+    def get_stats(self) -> dict:
+        """Return the number of alerts queued, emails sent, alerts dropped and SMTP connections opened."""
+        with self.lock:
+            return dict(self.stats, unsent=self.unsent)
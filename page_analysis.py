@@ -0,0 +1,115 @@
+import logging
+from typing import List, Optional, TYPE_CHECKING, Union
+from stock_detector import detect_stock_page
+
+if TYPE_CHECKING:
+    from bs4 import SoupStrainer
+
+# The only elements the stock analysis looks at
+PARSE_ONLY_TAGS = ['h1', 'button']
+
+
+def analyze_page(html_content: Optional[str], site_name: str, parser_backend: str = 'html.parser',
+                 parse_only: Optional[Union['SoupStrainer', List[str]]] = None,
+                 use_fast_parser: bool = True) -> tuple[tuple[bool, str, str], bool]:
+    """
+    Read the stock status from a product page and report whether the page was usable.
+
+    Uses the streaming detector from `stock_detector` first, which only looks
+    at <h1> and submit <button> elements and stops early. Falls back to a full
+    BeautifulSoup parse when the detector is disabled or unsure; BeautifulSoup
+    is only imported then.
+
+    A page is usable when it has a product <h1> and at least one submit
+    button, i.e. the stock status was read from real product markup.
+
+    Args:
+        html_content (Optional[str]): The HTML content to parse
+        site_name (str): The name of the site being checked
+        parser_backend (str, optional): The BeautifulSoup backend. Defaults to 'html.parser'.
+        parse_only (Optional[Union[SoupStrainer, List[str]]]): Restricts which elements the
+            BeautifulSoup fallback builds, as a SoupStrainer or a list of tag names.
+        use_fast_parser (bool, optional): Whether to try the streaming detector first. Defaults to True.
+
+    Returns:
+        tuple[tuple[bool, str, str], bool]: ((is_in_stock, product_name, site_name), usable)
+    """
+    if not html_content:
+        return (None, None, None), False
+
+    if use_fast_parser:
+        detected = detect_stock_page(html_content)
+        if detected is not None:
+            is_in_stock, product_name = detected['is_in_stock'], detected['product_name']
+            logging.debug("Fast path - Site: %s, Product: %s, In stock: %s", site_name, product_name, is_in_stock)
+            usable = detected['has_h1'] and detected['submit_buttons'] > 0
+            return (is_in_stock, product_name, site_name), usable
+
+    return analyze_page_with_soup(html_content, site_name, parser_backend, parse_only)
+
+
+def analyze_page_with_soup(html_content: Optional[str], site_name: str, parser_backend: str = 'html.parser',
+                           parse_only: Optional[Union['SoupStrainer', List[str]]] = None
+                           ) -> tuple[tuple[bool, str, str], bool]:
+    """
+    Parse a product page with BeautifulSoup to determine stock status and page usability.
+
+    When `parse_only` is set, only the matching subtrees are built into the
+    tree. On badly nested markup html.parser can then attach text differently,
+    since the tags that would have closed an <h1> are never created.
+
+    Args:
+        html_content (Optional[str]): The HTML content to parse
+        site_name (str): The name of the site being checked
+        parser_backend (str, optional): The BeautifulSoup backend. Defaults to 'html.parser'.
+        parse_only (Optional[Union[SoupStrainer, List[str]]]): Restricts which elements are built,
+            as a SoupStrainer or a list of tag names.
+
+    Returns:
+        tuple[tuple[bool, str, str], bool]: ((is_in_stock, product_name, site_name), usable)
+    """
+    if not html_content:
+        return (None, None, None), False
+
+    from bs4 import BeautifulSoup, SoupStrainer
+    if parse_only is not None and not isinstance(parse_only, SoupStrainer):
+        parse_only = SoupStrainer(parse_only)
+    soup = BeautifulSoup(html_content, parser_backend, parse_only=parse_only)
+
+    # Get product name from h1 tag
+    heading = soup.find('h1')
+    product_name = heading.text.strip() if heading else 'Product'
+
+    # Find all submit buttons
+    submit_buttons = soup.find_all('button', attrs={'type': 'submit'})
+
+    # Check if any submit button contains "Add to cart" text
+    is_in_stock = False
+    for button in submit_buttons:
+        # Get all text content from the button
+        button_text = button.get_text(strip=True, separator=' ').lower()
+
+        # Check if button is not disabled and contains "add to cart"
+        is_disabled = (
+            button.get('aria-disabled') == 'true' or
+            'disabled' in button.attrs or
+            'sold out' in button_text.lower()
+        )
+
+        if 'add to cart' in button_text and not is_disabled:
+            is_in_stock = True
+            break
+
+    # Log the findings for debugging, formatted only if DEBUG is enabled
+    logging.debug("Site: %s, Product: %s, Submit buttons found: %d, In stock: %s",
+                  site_name, product_name, len(submit_buttons), is_in_stock)
+
+    usable = heading is not None and len(submit_buttons) > 0
+    return (is_in_stock, product_name, site_name), usable
+
+
+def decode_page(content: Optional[bytes], encoding: Optional[str]) -> Optional[str]:
+    """Decode a response body the way `requests.Response.text` does once the encoding is known."""
+    if content is None:
+        return None
+    return str(content, encoding or 'utf-8', errors='replace')
@@ -0,0 +1,90 @@
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional, Union
+from page_analysis import PARSE_ONLY_TAGS, analyze_page, decode_page
+
+# Parser settings of the current worker process, set by `init_worker`
+worker_config = {}
+
+
+def init_worker(parser_backend: str, parse_only: bool, use_fast_parser: bool):
+    """Set up a worker process's parser settings once, instead of sending them with every page."""
+    worker_config.update(
+        parser_backend=parser_backend,
+        parse_only=PARSE_ONLY_TAGS if parse_only else None,
+        use_fast_parser=use_fast_parser,
+    )
+
+
+def analyze_in_worker(page: Union[bytes, str], encoding: Optional[str], site_name: str):
+    """Decode (if needed) and analyze a page inside a worker process."""
+    html_content = page if isinstance(page, str) else decode_page(page, encoding)
+    return analyze_page(html_content, site_name, **worker_config)
+
+
+class ParsePool:
+    """
+    Process pool that reads stock status from pages off the GIL.
+
+    Fetching stays in the caller's threads; only parsing is sent to the
+    worker processes. Response bodies are sent as the raw bytes and decoded in
+    the worker, so the fetching process never builds a str copy of the page.
+    Workers are started with 'forkserver' where available, since forking a
+    process that is running fetch threads is not safe.
+    """
+
+    def __init__(self, workers: int, parser_backend: str, parse_only: bool, use_fast_parser: bool = True):
+        """
+        Initialize the pool. Worker processes start with the first page.
+
+        Args:
+            workers (int): The number of worker processes.
+            parser_backend (str): The BeautifulSoup backend used by the workers.
+            parse_only (bool): Whether the workers build only <h1> and <button> nodes.
+            use_fast_parser (bool, optional): Whether the workers try the streaming detector first. Defaults to True.
+        """
+        self.workers = max(1, workers)
+        self.config = (parser_backend, parse_only, use_fast_parser)
+        methods = multiprocessing.get_all_start_methods()
+        self.context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+        self.executor = self.create_executor()
+
+    def create_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=self.context,
+            initializer=init_worker,
+            initargs=self.config
+        )
+
+    def analyze(self, page: Union[bytes, str], encoding: Optional[str], site_name: str,
+                timeout: Optional[float] = None) -> tuple[tuple[bool, str, str], bool]:
+        """
+        Analyze a page in a worker process and wait for the result.
+
+        Falls back to parsing in the calling process if the pool has broken,
+        e.g. because a worker was killed, and replaces the pool for later pages.
+
+        Args:
+            page (Union[bytes, str]): The response body, or already decoded HTML
+            encoding (Optional[str]): The encoding of a bytes body
+            site_name (str): The name of the site being checked
+            timeout (Optional[float]): Seconds to wait for the result
+
+        Returns:
+            tuple[tuple[bool, str, str], bool]: ((is_in_stock, product_name, site_name), usable)
+        """
+        try:
+            return self.executor.submit(analyze_in_worker, page, encoding, site_name).result(timeout)
+        except BrokenProcessPool:
+            logging.error("Parse worker pool broke, restarting it")
+            broken, self.executor = self.executor, self.create_executor()
+            broken.shutdown(wait=False, cancel_futures=True)
+            init_worker(*self.config)
+            return analyze_in_worker(page, encoding, site_name)
+
+    def close(self):
+        """Stop the worker processes once queued pages are done."""
+        self.executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,268 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+import requests
+
+
+def get_host(url: str) -> str:
+    """Return the lower-cased host of a URL, used as the rate limiting key."""
+    return urlparse(url).netloc.lower()
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header into a number of seconds.
+
+    Args:
+        value (Optional[str]): The header value, either delta-seconds or an HTTP date
+
+    Returns:
+        Optional[float]: Seconds to wait, or None if the header is missing or invalid
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class HostPaused(requests.RequestException):
+    """Raised when a host is paused or busy for longer than the caller is willing to wait."""
+
+
+class HostBucket:
+    """Token bucket and concurrency cap for a single host."""
+
+    def __init__(self, rate: float, burst: int, max_concurrency: int):
+        self.base_rate = rate
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.slots = threading.BoundedSemaphore(max(1, max_concurrency))
+        self.max_concurrency = max(1, max_concurrency)
+        self.throttled = 0
+
+    def refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+class HostRateLimiter:
+    """
+    Per-host politeness scheduler.
+
+    Every host gets a token bucket refilled at `rate` requests per second (up to
+    `burst` tokens) and a cap on requests in flight. A 429 or 503 answer pauses
+    the host for its Retry-After time and halves its rate; successful requests
+    then bring the rate back up step by step.
+    """
+
+    MIN_RATE = 0.05
+
+    def __init__(self, rate: float = 2.0, burst: int = 4, max_concurrency: int = 2,
+                 overrides: Optional[Dict[str, dict]] = None):
+        """
+        Initialize the limiter.
+
+        Args:
+            rate (float, optional): Default requests per second per host. Defaults to 2.0.
+            burst (int, optional): Default number of requests a host may receive back to back. Defaults to 4.
+            max_concurrency (int, optional): Default number of requests in flight per host. Defaults to 2.
+            overrides (Optional[Dict[str, dict]]): Per-host 'rate' and 'max_concurrency' settings.
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrency = max_concurrency
+        self.overrides = overrides or {}
+        self.buckets: Dict[str, HostBucket] = {}
+        self.lock = threading.Lock()
+
+    def get_bucket(self, host: str) -> HostBucket:
+        with self.lock:
+            bucket = self.buckets.get(host)
+            if bucket is None:
+                override = self.overrides.get(host, {})
+                rate = override.get('rate', self.rate)
+                bucket = HostBucket(
+                    rate,
+                    override.get('burst', self.burst),
+                    override.get('max_concurrency', self.max_concurrency)
+                )
+                self.buckets[host] = bucket
+            return bucket
+
+    def wait_for_token(self, bucket: HostBucket, deadline: Optional[float] = None):
+        """
+        Block until the host is not paused and has a token, then take it.
+
+        Raises:
+            HostPaused: If the token would only be available after the monotonic `deadline`
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                bucket.refill(now)
+                if now < bucket.blocked_until:
+                    delay = bucket.blocked_until - now
+                elif bucket.tokens >= 1:
+                    bucket.tokens -= 1
+                    return
+                else:
+                    delay = (1 - bucket.tokens) / bucket.rate
+            if deadline is not None and now + delay > deadline:
+                raise HostPaused(f"Host is paused for another {delay:.1f}s")
+            time.sleep(delay)
+
+    @contextmanager
+    def acquire(self, url: str, max_wait: Optional[float] = None):
+        """
+        Context manager that holds a request slot for the URL's host.
+
+        Blocks until the host's concurrency cap and token bucket allow another request.
+
+        Args:
+            url (str): The URL about to be requested
+            max_wait (Optional[float]): Give up instead of waiting longer than this many seconds,
+                e.g. while the host is paused by a long Retry-After. Defaults to waiting as long as needed.
+
+        Raises:
+            HostPaused: If the request could not start within `max_wait` seconds
+        """
+        bucket = self.get_bucket(get_host(url))
+        deadline = None if max_wait is None else time.monotonic() + max_wait
+        if not bucket.slots.acquire(timeout=max_wait):
+            raise HostPaused(f"No request slot for {get_host(url)} within {max_wait:g}s")
+        try:
+            self.wait_for_token(bucket, deadline)
+            yield
+        finally:
+            bucket.slots.release()
+
+    def paused_for(self, url: str) -> float:
+        """Return how many seconds the URL's host is still paused for."""
+        bucket = self.get_bucket(get_host(url))
+        with self.lock:
+            return max(0.0, bucket.blocked_until - time.monotonic())
+
+    def record_response(self, url: str, status_code: int, retry_after: Optional[str] = None) -> bool:
+        """
+        Adjust the host's pace after a response.
+
+        Args:
+            url (str): The URL that was requested
+            status_code (int): The HTTP status of the response
+            retry_after (Optional[str]): The Retry-After header, if any
+
+        Returns:
+            bool: True if the response was a throttling answer (429/503)
+        """
+        bucket = self.get_bucket(get_host(url))
+        with self.lock:
+            if status_code in (429, 503):
+                delay = parse_retry_after(retry_after)
+                if delay is None:
+                    delay = 2 / bucket.rate
+                bucket.blocked_until = max(bucket.blocked_until, time.monotonic() + delay)
+                bucket.rate = max(self.MIN_RATE, bucket.rate / 2)
+                bucket.tokens = 0
+                bucket.throttled += 1
+                logging.warning(
+                    "%s answered %s, pausing %.1fs and slowing to %.2f req/s",
+                    get_host(url), status_code, delay, bucket.rate
+                )
+                return True
+
+            # Recover gradually towards the configured rate
+            if bucket.rate < bucket.base_rate:
+                bucket.rate = min(bucket.base_rate, bucket.rate + bucket.base_rate * 0.1)
+            return False
+
+    def get_stats(self) -> Dict[str, dict]:
+        """
+        Return the current pace of every host seen so far.
+
+        Returns:
+            Dict[str, dict]: Per host, the configured and current rate, the concurrency
+            cap, the number of throttling answers and seconds left in any pause
+        """
+        now = time.monotonic()
+        with self.lock:
+            return {
+                host: {
+                    'base_rate': bucket.base_rate,
+                    'rate': bucket.rate,
+                    'max_concurrency': bucket.max_concurrency,
+                    'throttled': bucket.throttled,
+                    'paused_for': max(0.0, bucket.blocked_until - now),
+                }
+                for host, bucket in self.buckets.items()
+            }
+
+
+def interleave_by_host(urls: List[dict]) -> List[dict]:
+    """
+    Reorder URL entries round-robin across hosts.
+
+    Keeps checks for one host from queuing up behind each other at the start of
+    a sweep while other hosts sit idle.
+
+    Args:
+        urls (List[dict]): Entries with a 'url' key
+
+    Returns:
+        List[dict]: The same entries, alternating between hosts
+    """
+    by_host: Dict[str, List[dict]] = {}
+    for entry in urls:
+        by_host.setdefault(get_host(entry['url']), []).append(entry)
+
+    queues = list(by_host.values())
+    ordered = []
+    index = 0
+    while len(ordered) < len(urls):
+        for queue in queues:
+            if index < len(queue):
+                ordered.append(queue[index])
+        index += 1
+    return ordered
+
+
+def parse_host_limits(value: str) -> Dict[str, dict]:
+    """
+    Parse per-host limits in the form 'host=rate[:max_concurrency],...'.
+
+    Args:
+        value (str): The configuration string, e.g. 'teststore1.com=0.5:1,teststore2.com=4'
+
+    Returns:
+        Dict[str, dict]: Per host, 'rate' and optionally 'max_concurrency'
+    """
+    overrides = {}
+    for item in value.split(','):
+        if '=' not in item:
+            continue
+        host, limits = item.split('=', 1)
+        rate, _, concurrency = limits.partition(':')
+        try:
+            override = {'rate': float(rate)}
+            if concurrency:
+                override['max_concurrency'] = int(concurrency)
+        except ValueError:
+            logging.warning(f"Ignoring invalid host rate limit: {item}")
+            continue
+        overrides[host.strip().lower()] = override
+    return overrides
@@ -0,0 +1,319 @@
+import heapq
+import itertools
+import logging
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+
+def parse_drop_time(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a known restock/drop time from a CSV cell.
+
+    Args:
+        value (Optional[str]): An ISO 8601 date and time, e.g. '2024-11-01T09:00'. Naive times are local.
+
+    Returns:
+        Optional[float]: The drop time as a Unix timestamp, or None if missing or invalid
+    """
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.strip()).timestamp()
+    except ValueError:
+        logging.warning(f"Ignoring invalid drop time: {value}")
+        return None
+
+EMPTY_DRIFT_STATS = {'count': 0, 'mean': 0.0, 'p50': 0.0, 'p95': 0.0, 'max': 0.0}
+
+
+class AdaptiveScheduler:
+    """
+    Per-URL polling schedule that adapts to how often each page changes.
+
+    URLs are kept in a min-heap keyed on their next due time. `pop_due` hands
+    out due URLs to workers, most overdue first, and records how late each one
+    was dispatched (the schedule drift). The next due time is counted from when
+    a check was dispatched, not when it finished, so slow checks do not
+    stretch the real polling period.
+
+    Every URL starts at the base interval. When a check finds a different
+    result from the previous one, the URL is polled at `min_interval`; each
+    unchanged result stretches its interval by `backoff` up to `max_interval`,
+    but never beyond `stable_ratio` of the time the result has been unchanged,
+    so only pages that have been stable for days are polled rarely. A failed
+    check keeps the current interval.
+    Around a known drop time (the optional 'drop_at' CSV column) the URL is
+    polled at `min_interval`. Every delay is spread by +/- `jitter` so URLs do
+    not fall into lockstep.
+    """
+
+    def __init__(self, urls: List[dict], base_interval: float, min_interval: float, max_interval: float,
+                 jitter: float = 0.1, backoff: float = 1.5, drop_lead: float = 900, drop_window: float = 3600,
+                 stable_ratio: Optional[float] = 0.01, now: Optional[float] = None):
+        """
+        Initialize the schedule with every URL due immediately.
+
+        Args:
+            urls (List[dict]): Entries with 'url' and 'site_name' keys, and optionally 'drop_at'.
+            base_interval (float): The starting interval in seconds.
+            min_interval (float): The shortest interval in seconds.
+            max_interval (float): The longest interval in seconds.
+            jitter (float, optional): Random spread as a fraction of the interval. Defaults to 0.1.
+            backoff (float, optional): Interval growth factor per unchanged result. Defaults to 1.5.
+            drop_lead (float, optional): Seconds before a drop time to start fast polling. Defaults to 900.
+            drop_window (float, optional): Seconds after a drop time to keep fast polling. Defaults to 3600.
+            stable_ratio (Optional[float]): The longest interval above the base interval, as a fraction of
+                the time the result has been unchanged. None to back off per check only. Defaults to 0.01.
+            now (Optional[float]): The current time, for tests. Defaults to time.time().
+        """
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.base_interval = min(max(base_interval, self.min_interval), self.max_interval)
+        self.jitter = jitter
+        self.backoff = backoff
+        self.drop_lead = drop_lead
+        self.drop_window = drop_window
+        self.stable_ratio = stable_ratio
+        self.states: Dict[Tuple[str, str], dict] = {}
+        self.heap: List[tuple] = []
+        self.sequence = itertools.count()
+        self.drift_samples = deque(maxlen=1000)
+        self.lock = threading.Lock()
+
+        now = time.time() if now is None else now
+        for entry in urls:
+            self.add(entry, now)
+
+    def __len__(self) -> int:
+        """Return the number of scheduled entries, including those in flight."""
+        with self.lock:
+            return len(self.states)
+
+    @staticmethod
+    def key(entry: dict) -> Tuple[str, str]:
+        return entry['url'], entry.get('site_name')
+
+    def add(self, entry: dict, now: Optional[float] = None):
+        """Start scheduling an entry, due immediately."""
+        now = time.time() if now is None else now
+        state = {
+            'entry': entry,
+            'interval': self.base_interval,
+            'next_due': now,
+            'dispatched_at': None,
+            'in_flight': False,
+            'last_drift': None,
+            'last_result': None,
+            'last_change': None,
+            'stable_since': None,
+            'drop_at': parse_drop_time(entry.get('drop_at')),
+        }
+        with self.lock:
+            self.states[self.key(entry)] = state
+            self.push(state)
+
+    def remove(self, entry: dict) -> bool:
+        """
+        Stop scheduling an entry. A check already in flight finishes but is not rescheduled.
+
+        Returns:
+            bool: True if the entry was scheduled
+        """
+        with self.lock:
+            # Its heap item is dropped lazily by `peek`
+            return self.states.pop(self.key(entry), None) is not None
+
+    def update(self, entry: dict, now: Optional[float] = None) -> bool:
+        """
+        Replace a scheduled entry's details, keeping its interval and history.
+
+        A new or moved drop time brings the next check forward to the start of
+        its fast polling window if that is earlier than the current due time.
+
+        Returns:
+            bool: True if the entry was scheduled
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            state = self.states.get(self.key(entry))
+            if state is None:
+                return False
+            state['entry'] = entry
+            state['drop_at'] = parse_drop_time(entry.get('drop_at'))
+            if state['drop_at'] is not None and not state['in_flight']:
+                window_start = max(now, state['drop_at'] - self.drop_lead)
+                if window_start < state['next_due'] and now <= state['drop_at'] + self.drop_window:
+                    state['next_due'] = window_start
+                    self.push(state)
+            return True
+
+    def sync(self, urls: List[dict], now: Optional[float] = None) -> Dict[str, List[dict]]:
+        """
+        Bring the schedule in line with a new list of entries.
+
+        New entries are due immediately, missing ones are removed and entries
+        whose details changed are updated in place. Unchanged entries keep
+        their place in the schedule.
+
+        Args:
+            urls (List[dict]): The full list of entries that should be scheduled
+            now (Optional[float]): The current time. Defaults to time.time().
+
+        Returns:
+            Dict[str, List[dict]]: The 'added', 'removed' and 'updated' entries
+        """
+        now = time.time() if now is None else now
+        wanted = {self.key(entry): entry for entry in urls}
+        with self.lock:
+            current = {key: state['entry'] for key, state in self.states.items()}
+
+        changes = {'added': [], 'removed': [], 'updated': []}
+        for key, entry in current.items():
+            if key not in wanted:
+                self.remove(entry)
+                changes['removed'].append(entry)
+        for key, entry in wanted.items():
+            if key not in current:
+                self.add(entry, now)
+                changes['added'].append(entry)
+            elif entry != current[key]:
+                self.update(entry, now)
+                changes['updated'].append(entry)
+        return changes
+
+    def push(self, state: dict):
+        heapq.heappush(self.heap, (state['next_due'], next(self.sequence), self.key(state['entry'])))
+
+    def peek(self) -> Optional[tuple]:
+        """Return the earliest live heap item, dropping stale ones. Call with the lock held."""
+        while self.heap:
+            next_due, _, key = self.heap[0]
+            state = self.states.get(key)
+            if state is not None and not state['in_flight'] and state['next_due'] == next_due:
+                return self.heap[0]
+            heapq.heappop(self.heap)
+        return None
+
+    def in_drop_window(self, state: dict, now: float) -> bool:
+        drop_at = state['drop_at']
+        return drop_at is not None and drop_at - self.drop_lead <= now <= drop_at + self.drop_window
+
+    def pop_due(self, now: Optional[float] = None, limit: Optional[int] = None) -> List[dict]:
+        """
+        Take the entries whose next check is due, most overdue first.
+
+        Taken entries are in flight and are not handed out again until
+        `record_result` reschedules them.
+
+        Args:
+            now (Optional[float]): The current time. Defaults to time.time().
+            limit (Optional[int]): The maximum number of entries to take.
+
+        Returns:
+            List[dict]: The due entries
+        """
+        now = time.time() if now is None else now
+        due = []
+        with self.lock:
+            while limit is None or len(due) < limit:
+                item = self.peek()
+                if item is None or item[0] > now:
+                    break
+                heapq.heappop(self.heap)
+                state = self.states[item[2]]
+                state['in_flight'] = True
+                state['dispatched_at'] = now
+                state['last_drift'] = now - item[0]
+                self.drift_samples.append(state['last_drift'])
+                due.append(state['entry'])
+        return due
+
+    def seconds_until_next(self, now: Optional[float] = None) -> float:
+        """Return how long until the next entry is due, or 0 if one is due already."""
+        now = time.time() if now is None else now
+        with self.lock:
+            item = self.peek()
+        if item is None:
+            return self.base_interval
+        return max(0.0, item[0] - now)
+
+    def record_result(self, entry: dict, result: Optional[tuple], now: Optional[float] = None):
+        """
+        Adjust an entry's interval after a check and schedule its next one.
+
+        Args:
+            entry (dict): The entry that was checked
+            result (Optional[tuple]): (is_in_stock, product_name, site_name), or None if the check failed
+            now (Optional[float]): The current time. Defaults to time.time().
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            state = self.states.get(self.key(entry))
+            if state is None:
+                return
+            self.reschedule(state, result, now)
+
+    def reschedule(self, state: dict, result: Optional[tuple], now: float):
+        """Update a state's interval from a result and push its next due time. Call with the lock held."""
+        # check_stock reports a failed fetch as (None, None, None); neither counts as a result
+        if result is not None and result[0] is not None:
+            status = result[:2]
+            if state['last_result'] is not None and status != state['last_result']:
+                state['interval'] = self.min_interval
+                state['last_change'] = state['stable_since'] = now
+            elif state['last_result'] is not None:
+                longest = self.max_interval
+                if self.stable_ratio is not None:
+                    longest = min(longest, max(self.base_interval, (now - state['stable_since']) * self.stable_ratio))
+                state['interval'] = max(state['interval'], min(longest, state['interval'] * self.backoff))
+            else:
+                state['stable_since'] = now
+            state['last_result'] = status
+
+        interval = state['interval']
+        if self.in_drop_window(state, now):
+            interval = self.min_interval
+        else:
+            drop_at = state['drop_at']
+            if drop_at is not None and now < drop_at - self.drop_lead:
+                # Do not sleep past the start of a known drop window
+                interval = min(interval, drop_at - self.drop_lead - now)
+
+        delay = interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+        delay = min(max(delay, self.min_interval * (1 - self.jitter)), self.max_interval)
+
+        # Count from dispatch so the check's own duration does not add to the period
+        start = state['dispatched_at'] if state['dispatched_at'] is not None else now
+        state['next_due'] = start + delay
+        state['dispatched_at'] = None
+        state['in_flight'] = False
+        self.push(state)
+
+    def get_drift_stats(self) -> dict:
+        """
+        Summarize how late recent checks were dispatched relative to their due time.
+
+        Returns:
+            dict: The number of samples and the mean, median, 95th percentile and
+            maximum drift in seconds
+        """
+        with self.lock:
+            samples = sorted(self.drift_samples)
+        if not samples:
+            return dict(EMPTY_DRIFT_STATS)
+        return {
+            'count': len(samples),
+            'mean': sum(samples) / len(samples),
+            'p50': samples[len(samples) // 2],
+            'p95': samples[min(len(samples) - 1, int(len(samples) * 0.95))],
+            'max': samples[-1],
+        }
+
+    def get_intervals(self) -> Dict[str, float]:
+        """Return the current polling interval per URL."""
+        with self.lock:
+            return {state['entry']['url']: state['interval'] for state in self.states.values()}
@@ -0,0 +1,199 @@
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stock_state (
+    url TEXT NOT NULL,
+    site_name TEXT NOT NULL DEFAULT '',
+    is_in_stock INTEGER NOT NULL,
+    product_name TEXT,
+    content_hash TEXT,
+    first_seen REAL NOT NULL,
+    last_checked REAL NOT NULL,
+    last_changed REAL NOT NULL,
+    PRIMARY KEY (url, site_name)
+)
+"""
+
+
+class StockStateStore:
+    """
+    SQLite-backed record of the last known stock status of every URL.
+
+    The full state is loaded into memory when the store is opened, so
+    transition checks never touch the disk. Results are buffered and written
+    in one transaction by `flush`, with the database in WAL mode so readers
+    are not blocked while a batch is written.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open (or create) the state database and load the stored state.
+
+        Args:
+            path (str): The SQLite database file, or ':memory:'
+        """
+        self.path = path
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(SCHEMA)
+        self.connection.commit()
+
+        self.states: Dict[Tuple[str, str], dict] = {}
+        self.pending: Dict[Tuple[str, str], dict] = {}
+        self.last_flush = time.monotonic()
+        self.load()
+
+    def load(self, entries: Optional[List[dict]] = None):
+        """
+        Load stored rows into memory.
+
+        Args:
+            entries (Optional[List[dict]]): Only reload these entries, e.g. URLs another
+                process has been checking. Every row if None. Entries with buffered
+                results keep them, since those are newer.
+        """
+        query = (
+            "SELECT url, site_name, is_in_stock, product_name, content_hash, first_seen, last_checked, last_changed "
+            "FROM stock_state"
+        )
+        with self.lock:
+            if entries is None:
+                rows = self.connection.execute(query).fetchall()
+            else:
+                rows = []
+                for key in {self.key(entry) for entry in entries} - self.pending.keys():
+                    rows += self.connection.execute(f"{query} WHERE url = ? AND site_name = ?", key).fetchall()
+            for url, site_name, is_in_stock, product_name, content_hash, first_seen, last_checked, last_changed in rows:
+                self.states[(url, site_name)] = {
+                    'url': url,
+                    'site_name': site_name,
+                    'is_in_stock': bool(is_in_stock),
+                    'product_name': product_name,
+                    'content_hash': content_hash,
+                    'first_seen': first_seen,
+                    'last_checked': last_checked,
+                    'last_changed': last_changed,
+                }
+        logging.info(f"Loaded stock state for {len(rows)} URLs from {self.path}")
+
+    @staticmethod
+    def key(entry: dict) -> Tuple[str, str]:
+        return entry['url'], entry.get('site_name') or ''
+
+    def get(self, entry: dict) -> Optional[dict]:
+        """Return the last known state of an entry, or None if it was never checked."""
+        with self.lock:
+            state = self.states.get(self.key(entry))
+            return dict(state) if state else None
+
+    def record(self, entry: dict, result: tuple, content_hash: Optional[str] = None,
+               now: Optional[float] = None) -> bool:
+        """
+        Record a check result and report whether the product just came into stock.
+
+        Args:
+            entry (dict): The entry that was checked, with 'url' and 'site_name' keys
+            result (tuple): (is_in_stock, product_name, site_name)
+            content_hash (Optional[str]): Hash of the page the result was read from
+            now (Optional[float]): The check time. Defaults to time.time().
+
+        Returns:
+            bool: True if the product is in stock and was out of stock (or unknown) before
+        """
+        is_in_stock, product_name, _ = result
+        if is_in_stock is None:
+            return False
+
+        now = time.time() if now is None else now
+        key = self.key(entry)
+        with self.lock:
+            previous = self.states.get(key)
+            changed = previous is None or previous['is_in_stock'] != bool(is_in_stock)
+            state = {
+                'url': key[0],
+                'site_name': key[1],
+                'is_in_stock': bool(is_in_stock),
+                'product_name': product_name,
+                'content_hash': content_hash,
+                'first_seen': previous['first_seen'] if previous else now,
+                'last_checked': now,
+                'last_changed': now if changed else previous['last_changed'],
+            }
+            self.states[key] = state
+            self.pending[key] = state
+
+        return bool(is_in_stock) and (previous is None or not previous['is_in_stock'])
+
+    def mark_undelivered(self, entry: dict, now: Optional[float] = None) -> bool:
+        """
+        Mark an in-stock product as out of stock again because its alert could not be sent.
+
+        The next check that finds it in stock counts as a new transition and
+        alerts again.
+
+        Args:
+            entry (dict): The entry whose alert failed, with 'url' and 'site_name' keys
+            now (Optional[float]): The time of the failure. Defaults to time.time().
+
+        Returns:
+            bool: True if the product was recorded as in stock
+        """
+        now = time.time() if now is None else now
+        key = self.key(entry)
+        with self.lock:
+            previous = self.states.get(key)
+            if previous is None or not previous['is_in_stock']:
+                return False
+            state = dict(previous, is_in_stock=False, last_changed=now)
+            self.states[key] = state
+            self.pending[key] = state
+        return True
+
+    def flush(self) -> int:
+        """
+        Write all buffered results in a single transaction.
+
+        Returns:
+            int: The number of rows written
+        """
+        with self.lock:
+            batch: List[dict] = list(self.pending.values())
+            self.pending = {}
+            self.last_flush = time.monotonic()
+            if not batch:
+                return 0
+            try:
+                with self.connection:
+                    self.connection.executemany(
+                        "INSERT INTO stock_state "
+                        "(url, site_name, is_in_stock, product_name, content_hash, first_seen, last_checked, last_changed) "
+                        "VALUES (:url, :site_name, :is_in_stock, :product_name, :content_hash, "
+                        ":first_seen, :last_checked, :last_changed) "
+                        "ON CONFLICT(url, site_name) DO UPDATE SET "
+                        "is_in_stock = excluded.is_in_stock, product_name = excluded.product_name, "
+                        "content_hash = excluded.content_hash, last_checked = excluded.last_checked, "
+                        "last_changed = excluded.last_changed",
+                        batch
+                    )
+            except sqlite3.Error as e:
+                logging.error(f"Error writing stock state to {self.path}: {e}")
+                # Keep the batch for the next flush, unless newer results replaced it
+                for state in batch:
+                    self.pending.setdefault((state['url'], state['site_name']), state)
+                return 0
+        return len(batch)
+
+    def seconds_since_flush(self) -> float:
+        return time.monotonic() - self.last_flush
+
+    def close(self):
+        """Flush buffered results and close the database."""
+        self.flush()
+        with self.lock:
+            self.connection.close()
@@ -1,23 +1,43 @@
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import time
-import smtplib
-from email.mime.text import MIMEText
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import logging
 from datetime import datetime
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service
-from selenium.common.exceptions import WebDriverException
 from contextlib import contextmanager
+from collections import deque
+from urllib.parse import urlparse, parse_qs
 import csv
+import hashlib
+import importlib.util
+import json
+import re
 import os
 from pathlib import Path
-from typing import List, Optional, Dict
-from config.environment import load_environment, get_email_config, get_request_headers, get_receiver_email
+from typing import List, Optional, Dict, Callable, TYPE_CHECKING
+from page_analysis import PARSE_ONLY_TAGS, analyze_page, analyze_page_with_soup, decode_page
+from metrics import MetricsRegistry, MetricsServer
+from driver_pool import DriverPool
+from rate_limiter import HostRateLimiter, get_host, interleave_by_host, parse_host_limits
+from scheduler import AdaptiveScheduler, EMPTY_DRIFT_STATS
+from state_store import StockStateStore
+from link_catalog import LinkCatalog, LinkWatcher
+from structured_logging import setup_logging
+from config.environment import load_environment, get_email_config, get_request_headers, get_receiver_email, get_http_config, get_parser_config, get_selenium_config, get_rate_limit_config, get_poll_config, get_notification_config, get_metrics_config, get_logging_config
+
+if TYPE_CHECKING:
+    from cluster import ClusterNode
+    from notifier import NotificationDispatcher
+    from parse_pool import ParsePool
+
+# Modules that provide each BeautifulSoup backend, checked without importing bs4
+PARSER_MODULES = {'lxml': 'lxml', 'html5lib': 'html5lib', 'html.parser': 'html.parser'}
 
 class StockChecker:
-    def __init__(self, url=None, check_interval=300, links_directory="./links"):
+    def __init__(self, url=None, check_interval=300, links_directory="./links", max_concurrency=None,
+                 catalog=None):
         """
         Initialize the StockChecker with optional URL, check interval, and links directory.
 
@@ -25,13 +45,60 @@ class StockChecker:
             url (str, optional): The URL to check for stock status. Defaults to None.
             check_interval (int, optional): The interval in seconds between stock checks. Defaults to 300.
             links_directory (str, optional): The directory where CSV files are stored. Defaults to "./links".
+            max_concurrency (int, optional): The maximum number of checks in flight during a sweep.
+                A value of 1 checks URLs one at a time. Defaults to the MAX_CONCURRENCY environment variable.
+            catalog (LinkCatalog, optional): A link catalog to share with other components.
+                Defaults to a new catalog of `links_directory`.
 
         Environment Variables:
             CHECK_INTERVAL (int): The default interval in seconds if not provided.
+            POLL_MIN_INTERVAL (float): The shortest per-URL polling interval in seconds.
+            POLL_MAX_INTERVAL (float): The longest per-URL polling interval in seconds.
+            POLL_JITTER (float): Random spread of each polling delay, as a fraction of the interval.
+            POLL_BACKOFF (float): How much a URL's interval grows after each unchanged result.
+            DROP_LEAD_TIME (float): Seconds before a known drop time to start polling at the minimum interval.
+            DROP_WINDOW (float): Seconds after a known drop time to keep polling at the minimum interval.
+            LINKS_RELOAD_INTERVAL (float): How often in seconds a running monitor checks its CSV file for changes.
+            STATE_DB (str): The SQLite file that keeps each URL's last stock status between runs.
+                Set it to an empty string to notify on every in-stock check instead.
+            STATE_FLUSH_INTERVAL (float): How often in seconds buffered results are written to STATE_DB.
+            SMTP_STARTTLS (bool): Whether to upgrade the SMTP connection with STARTTLS.
+            NOTIFY_DIGEST_WINDOW (float): Seconds to wait for more alerts so they are sent as one digest email.
+            SMTP_IDLE_TIMEOUT (float): Seconds without mail before the SMTP connection is closed.
+            SMTP_MAX_ATTEMPTS (int): The number of connection attempts per email before it is dropped.
+            MAX_CONCURRENCY (int): The default number of concurrent checks if not provided.
+            FETCH_MODE (str): How pages are fetched: 'requests', 'selenium' or 'auto'. Defaults to 'requests'.
+            PRODUCT_JSON_SITES (str): Comma-separated site names whose Shopify `.js` product
+                endpoint is read instead of the product page, or '*' for every site.
             LOG_LEVEL (str): The logging level for the application.
+            LOG_FILE (str): The log file, rotated once it reaches LOG_MAX_BYTES.
+            LOG_MAX_BYTES (int): The log file size in bytes at which it is rotated.
+            LOG_BACKUP_COUNT (int): The number of rotated log files kept.
+            LOG_FORMAT (str): 'json' for one JSON object per line, or 'text'.
+            METRICS_PORT (int): The port of the local Prometheus metrics endpoint. 0 disables it.
+            METRICS_HOST (str): The interface the metrics endpoint listens on.
+            METRICS_SUMMARY_FILE (str): A file each monitor or sweep summary is appended to as a JSON line.
+            METRICS_SUMMARY_INTERVAL (float): How often in seconds the monitor loop writes a summary.
             USER_AGENT (str): The user agent for HTTP requests.
+            HTTP_POOL_CONNECTIONS (int): The number of per-host connection pools to keep.
+            HTTP_POOL_MAXSIZE (int): The maximum number of connections kept open to a single host.
+            HTTP_MAX_RETRIES (int): The number of retries for failed or throttled requests.
+            HTTP_BACKOFF_FACTOR (float): The exponential backoff factor between retries.
+            HTTP_TIMEOUT (float): The timeout in seconds for a single request.
+            HOST_RATE_LIMIT (float): The requests per second allowed to a single host.
+            HOST_RATE_BURST (int): The number of requests a host may receive back to back.
+            HOST_MAX_CONCURRENCY (int): The maximum number of requests in flight to a single host.
+            HOST_RATE_LIMITS (str): Per-host overrides as 'host=rate[:max_concurrency],...'.
+            HTML_PARSER (str): The BeautifulSoup backend: 'auto', 'lxml', 'html.parser' or 'html5lib'.
+            SOUP_PARSE_ONLY (bool): Whether to build only <h1> and <button> nodes into the tree.
+            PARSE_WORKERS (int): The number of processes pages are parsed in. 0 parses in the checking threads.
+            SELENIUM_POOL_SIZE (int): The maximum number of headless Chrome instances kept alive.
+            SELENIUM_MAX_PAGES (int): The number of pages a Chrome instance renders before it is restarted.
+            SELENIUM_MAX_WAIT (float): The longest time in seconds to wait for a rendered page to become ready.
+            SELENIUM_POLL_INTERVAL (float): How often in seconds to check whether a rendered page is ready.
 
-        The method also sets up logging and loads environment variables.
+        The method also sets up logging, loads environment variables and opens a
+        pooled HTTP session that lives as long as the checker.
         """
 
         # load environment variables from .env file
@@ -41,15 +108,240 @@ class StockChecker:
         self.url = url
         self.check_interval = check_interval or int(os.getenv('CHECK_INTERVAL', 300))
         self.links_directory = Path(links_directory)
+        self.catalog = catalog or LinkCatalog(self.links_directory)
+        self.links_reload_interval = float(os.getenv('LINKS_RELOAD_INTERVAL', 5))
+        self.max_concurrency = max(1, max_concurrency or int(os.getenv('MAX_CONCURRENCY', 1)))
+        self.fetch_mode = os.getenv('FETCH_MODE', 'requests')
+        self.product_json_sites = {
+            site.strip() for site in os.getenv('PRODUCT_JSON_SITES', '').split(',') if site.strip()
+        }
         self.headers = get_request_headers()
+        self.poll_config = get_poll_config()
+        self.scheduler = None
+
+        # Last known status per URL, opened on first use
+        self.state_db = os.getenv('STATE_DB', 'stock_state.db')
+        self.state_flush_interval = float(os.getenv('STATE_FLUSH_INTERVAL', 5))
+        self.state_store = None
+        self.state_store_lock = threading.Lock()
+
+        # Alerts are sent from a background thread over one SMTP connection, started on first use
+        self.notifier = None
+        self.notifier_lock = threading.Lock()
+        self.http_config = get_http_config()
+        self.use_fast_parser = True
+        parser_config = get_parser_config()
+        self.parser_backend = self.resolve_parser_backend(parser_config['backend'])
+        # The tags to build soup trees from, turned into a SoupStrainer when BeautifulSoup is first needed
+        self.parse_only = PARSE_ONLY_TAGS if parser_config['parse_only'] else None
+
+        # Worker processes for parsing, started on first use when PARSE_WORKERS > 0
+        self.parse_workers = max(0, parser_config['workers'])
+        self.parse_pool = None
+        self.parse_pool_lock = threading.Lock()
+        self.session = self.create_session()
+
+        # Politeness scheduling per host, slowing down on 429/503
+        rate_config = get_rate_limit_config()
+        self.rate_limiter = HostRateLimiter(
+            rate=rate_config['rate'],
+            burst=rate_config['burst'],
+            max_concurrency=rate_config['max_concurrency'],
+            overrides=parse_host_limits(rate_config['overrides'])
+        )
+
+        # Headless Chrome instances are started on first use and reused across checks
+        self.selenium_config = get_selenium_config()
+        self.driver_pool = None
+        self.driver_pool_lock = threading.Lock()
+
+        # Recent page readiness times per host, for tuning SELENIUM_MAX_WAIT
+        self.ready_times: Dict[str, deque] = {}
+        self.ready_times_lock = threading.Lock()
+
+        # Fetch method that gave a usable page per site, for the 'auto' fetch mode
+        self.site_fetch_methods: Dict[str, str] = {}
+
+        # Sites found not to serve a product JSON endpoint, so it is not tried again
+        self.product_json_unsupported: set = set()
+
+        # Latest result per (url, site_name) for every monitored key, filled in from each
+        # entry's 'keys' so a URL shared by several keys is checked once
+        self.key_results: Dict[str, Dict[tuple, tuple]] = {}
+        self.key_results_lock = threading.Lock()
+
+        # Set while monitoring as one node of a cluster; all monitored URLs, before sharding
+        self.cluster = None
+        self.monitored_urls: List[dict] = []
+
+        # Phase timings and counters, served on METRICS_PORT while monitoring
+        self.metrics = MetricsRegistry()
+        self.metrics_config = get_metrics_config()
+        self.metrics_server = None
+        self.last_summary = None
+
+        # Validators and last parsed result per URL for conditional GETs
+        self.page_cache: Dict[str, dict] = {}
         
-        # Set up logging
-        logging.basicConfig(
-            filename='stock_checker.log',
-            level=os.getenv('LOG_LEVEL', 'INFO'),
-            format='%(asctime)s - %(message)s'
+        # Set up logging through a background writer, unless the application already has
+        logging_config = get_logging_config()
+        setup_logging(
+            filename=logging_config['filename'],
+            level=logging_config['level'],
+            max_bytes=logging_config['max_bytes'],
+            backup_count=logging_config['backup_count'],
+            log_format=logging_config['format']
+        )
+
+    def create_session(self) -> requests.Session:
+        """
+        Create a pooled HTTP session with keep-alive and retry/backoff.
+
+        Connections are pooled per host, so repeated checks against the same
+        store reuse warm TCP/TLS connections. Each host gets at most
+        `pool_maxsize` connections; extra concurrent requests wait for a free one.
+        429 and 503 answers are not retried here; `http_get` leaves those to the
+        per-host rate limiter.
+
+        Returns:
+            requests.Session: The configured session
+        """
+        retry = Retry(
+            total=self.http_config['max_retries'],
+            backoff_factor=self.http_config['backoff_factor'],
+            status_forcelist=(500, 502, 504),
+            allowed_methods=frozenset(['GET', 'HEAD']),
+            respect_retry_after_header=False
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self.http_config['pool_connections'],
+            pool_maxsize=self.http_config['pool_maxsize'],
+            max_retries=retry,
+            pool_block=True
         )
 
+        session = requests.Session()
+        session.headers.update(self.headers)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def close(self):
+        """
+        Close the pooled HTTP session and metrics endpoint, quit any pooled
+        Selenium drivers, stop parse workers, flush the state store and send
+        any queued notifications.
+        """
+        self.session.close()
+        if self.metrics_server:
+            self.metrics_server.close()
+            self.metrics_server = None
+        if self.driver_pool:
+            self.driver_pool.close()
+        if self.parse_pool:
+            self.parse_pool.close()
+            self.parse_pool = None
+        if self.notifier:
+            self.notifier.close(timeout=self.notifier.timeout)
+            self.notifier = None
+        if self.state_store:
+            self.state_store.close()
+            self.state_store = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @staticmethod
+    def resolve_parser_backend(name: str) -> str:
+        """
+        Resolve the BeautifulSoup parser backend to use.
+
+        'auto' picks lxml when it is installed and html.parser otherwise. A named
+        backend that is not installed also falls back to html.parser. The usual
+        backends are looked up without importing BeautifulSoup.
+
+        Args:
+            name (str): The requested backend name
+
+        Returns:
+            str: The name of an available backend
+        """
+        if name == 'auto':
+            return 'lxml' if importlib.util.find_spec('lxml') else 'html.parser'
+        if name in PARSER_MODULES:
+            available = importlib.util.find_spec(PARSER_MODULES[name]) is not None
+        else:
+            from bs4.builder import builder_registry
+            available = builder_registry.lookup(name) is not None
+        if not available:
+            logging.warning(f"HTML parser '{name}' is not available, using html.parser")
+            return 'html.parser'
+        return name
+
+    def http_get(self, url: str, headers: Optional[dict] = None) -> requests.Response:
+        """
+        GET a URL through the session, paced by the per-host rate limiter.
+
+        A 429 or 503 answer pauses and slows down the host, then the request is
+        retried once the host may be contacted again, up to HTTP_MAX_RETRIES times.
+        No worker waits longer than HTTP_TIMEOUT for a paused host: a longer
+        Retry-After returns the throttled response, and requests to the host
+        fail with HostPaused until the pause is over, so the scheduler retries
+        them later instead of a worker sleeping through it.
+
+        Records the time spent waiting for the rate limiter, the time to the
+        response headers (connection setup, TLS and server time) and the body
+        transfer time per host, along with status, byte and retry counters.
+
+        Args:
+            url (str): The URL to fetch
+            headers (Optional[dict]): Extra request headers
+
+        Returns:
+            requests.Response: The last response received
+
+        Raises:
+            HostPaused: If the host is paused for longer than HTTP_TIMEOUT
+        """
+        host = get_host(url)
+        max_wait = self.http_config['timeout']
+        for attempt in range(self.http_config['max_retries'] + 1):
+            wait_start = time.perf_counter()
+            with self.rate_limiter.acquire(url, max_wait=max_wait):
+                self.metrics.observe('phase_seconds', time.perf_counter() - wait_start,
+                                     phase='rate_limit_wait', host=host)
+                with self.metrics.span('request', host=host):
+                    start = time.perf_counter()
+                    response = self.session.get(url, headers=headers, timeout=self.http_config['timeout'])
+                    total = time.perf_counter() - start
+            self.record_response_metrics(host, response, total)
+            throttled = self.rate_limiter.record_response(
+                url,
+                response.status_code,
+                response.headers.get('Retry-After')
+            )
+            if not throttled or self.rate_limiter.paused_for(url) > max_wait:
+                break
+            self.metrics.inc('retries_total', host=host, reason=response.status_code)
+        return response
+
+    def record_response_metrics(self, host: str, response: requests.Response, total: float):
+        """Split a request's time into headers and transfer, and count its status, bytes and retries."""
+        time_to_headers = min(response.elapsed.total_seconds(), total)
+        self.metrics.observe('phase_seconds', time_to_headers, phase='ttfb', host=host)
+        self.metrics.observe('phase_seconds', total - time_to_headers, phase='transfer', host=host)
+        self.metrics.inc('requests_total', host=host, status=response.status_code)
+        self.metrics.inc('response_bytes_total', len(response.content or b''), host=host)
+        if response.status_code == 304:
+            self.metrics.inc('not_modified_total', host=host)
+        # 5xx answers retried inside urllib3
+        retries = getattr(getattr(response.raw, 'retries', None), 'history', None)
+        if retries:
+            self.metrics.inc('retries_total', len(retries), host=host, reason='5xx')
+
     def get_url_list(self, filename: str, key: str) -> List[dict]:
         """
         Retrieves all URLs corresponding to the given key from the CSV file.
@@ -59,41 +351,58 @@ class StockChecker:
             key (str): The key to search for in the CSV file
 
         Returns:
-            List[dict]: A list of dictionaries containing url and site_name for the given key
+            List[dict]: A list of dictionaries containing url and site_name for the given key,
+            plus drop_at when the CSV has a non-empty 'drop_at' column for the row
         """
-        file_path = self.links_directory / filename
-        entries = []
+        entries = self.get_url_lists(filename, [key])[key]
+        if not entries:
+            logging.info(f"No URLs found for key '{key}' in {filename}")
+        else:
+            logging.info(f"Found {len(entries)} URLs for key '{key}' in {filename}")
+        return entries
 
-        try:
-            with file_path.open(mode='r', encoding='utf-8') as csvfile:
-                reader = csv.DictReader(csvfile)
-                entries = [
-                    {
-                        'url': row['url'].strip('" \'\t'),
-                        'site_name': row['site_name'].strip('" \'\t')
-                    }
-                    for row in reader
-                    if row.get('key').strip('" \'\t') == key
-                ]
-
-                if not entries:
-                    logging.info(f"No URLs found for key '{key}' in {filename}")
-                else:
-                    logging.info(f"Found {len(entries)} URLs for key '{key}' in {filename}")
+    def get_url_lists(self, filename: str, keys: Optional[List[str]] = None) -> Dict[str, List[dict]]:
+        """
+        Retrieves the URLs for several keys, or for every key, in one lookup.
+
+        The CSV file is parsed once and cached until it changes on disk.
 
-                return entries
+        Args:
+            filename (str): The name of the CSV file
+            keys (Optional[List[str]]): The keys to look up. Every key in the file if None.
 
+        Returns:
+            Dict[str, List[dict]]: Per key, the entries as returned by `get_url_list`
+        """
+        try:
+            return self.catalog.get_entries(filename, keys)
         except FileNotFoundError:
-            logging.error(f"CSV file not found: {file_path}")
+            logging.error(f"CSV file not found: {self.links_directory / filename}")
             raise
-        except csv.Error as e:
+        except (csv.Error, KeyError) as e:
             logging.error(f"Error reading CSV file {filename}: {e}")
             raise
-        
+
+    def watch_links(self, filename: Optional[str] = None, keys: Optional[List[str]] = None) -> LinkWatcher:
+        """
+        Watch the monitored links so a running monitor picks up changes to them.
+
+        Args:
+            filename (Optional[str]): The name of the CSV file. Every CSV file in the links directory if None.
+            keys (Optional[List[str]]): The monitored keys. Every key if None.
+
+        Returns:
+            LinkWatcher: A watcher to pass to `run_monitor_loop`. Its `get_urls` returns the
+            monitored entries with each URL once, listing every key that references it.
+        """
+        return LinkWatcher(self.catalog, filename, keys, self.links_reload_interval)
+
     def update_url(self, filename: str, key: str, new_url: str) -> bool:
         """
         Updates the URL for a given key in the CSV file.
 
+        Every row with the key gets the new URL; the other columns are kept.
+
         Args:
             filename (str): The name of the CSV file
             key (str): The key to update
@@ -102,42 +411,33 @@ class StockChecker:
         Returns:
             bool: True if update was successful, False otherwise
         """
-        file_path = self.links_directory / filename
-        temp_file = file_path.with_suffix('.tmp')
-        updated = False
+        report = self.update_urls(filename, {key: new_url})
+        return report is not None and report['matched'] > 0
 
-        try:
-            with file_path.open(mode='r', encoding='utf-8') as csvfile, \
-                 temp_file.open(mode='w', encoding='utf-8', newline='') as tempfile:
-                reader = csv.reader(csvfile)
-                writer = csv.writer(tempfile)
-
-                # Write header
-                header = next(reader)
-                writer.writerow(header)
-
-                # Update matching row
-                for row in reader:
-                    if row and row[0] == key:
-                        writer.writerow([key, new_url])
-                        updated = True
-                    else:
-                        writer.writerow(row)
-
-            if updated:
-                temp_file.replace(file_path)
-                logging.info(f"Updated URL for key '{key}' in {filename}")
-            else:
-                temp_file.unlink()
-                logging.info(f"Key '{key}' not found in {filename}")
-
-            return updated
+    def update_urls(self, filename: str, updates: Dict) -> Optional[dict]:
+        """
+        Updates many URLs in the CSV file with a single rewrite.
+
+        Args:
+            filename (str): The name of the CSV file
+            updates (Dict): New URLs keyed by key, or by (key, site_name) to change one store's row
 
+        Returns:
+            Optional[dict]: The changed rows ('changed', each with key, site_name, old_url and
+            new_url), the number of matched rows ('matched') and the updates that matched no
+            row ('missing'), or None if the file could not be updated
+        """
+        try:
+            report = self.catalog.update_urls(filename, updates)
         except Exception as e:
             logging.error(f"Error updating URL in {filename}: {e}")
-            if temp_file.exists():
-                temp_file.unlink()
-            return False
+            return None
+
+        for change in report['changed']:
+            logging.info(f"Updated URL for key '{change['key']}' ({change['site_name']}) in {filename}")
+        for update in report['missing']:
+            logging.info(f"Key '{update}' not found in {filename}")
+        return report
 
     def get_html_from_url(self, url: str) -> Optional[str]:
         """Fetch HTML content from the given URL.
@@ -149,59 +449,294 @@ class StockChecker:
             Optional[str]: The HTML content if successful, None otherwise
         """
         try:
-            response = requests.get(url, headers=self.headers)
+            response = self.http_get(url)
             # DEBUG
             # print(f"\nResponse status code: {response.status_code}")
             response.raise_for_status()
             return response.text
         except requests.RequestException as e:
-            logging.error(f"Error fetching HTML: {str(e)}")
+            logging.error("Error fetching HTML: %s", e, extra={'url': url})
             return None
 
-    @contextmanager
-    def get_selenium_driver(self):
-        """Context manager for a Selenium WebDriver instance.
+    def fetch_page(self, url: str) -> Optional[dict]:
+        """Fetch a page with a conditional GET based on what is cached for the URL.
+
+        Sends `If-None-Match`/`If-Modified-Since` when validators from an earlier
+        response are known. A 304 response is returned without a body.
+
+        Args:
+            url (str): The URL to fetch
+
+        Returns:
+            Optional[dict]: A dictionary with 'content' (the undecoded body), 'encoding',
+            'not_modified', 'etag', 'last_modified' and 'content_hash' keys if successful,
+            None otherwise
+        """
+        cached = self.page_cache.get(url)
+        headers = {}
+        if cached:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+
+        try:
+            response = self.http_get(url, headers=headers)
+            if response.status_code == 304 and cached:
+                return {
+                    'content': None,
+                    'encoding': None,
+                    'not_modified': True,
+                    'etag': response.headers.get('ETag', cached.get('etag')),
+                    'last_modified': response.headers.get('Last-Modified', cached.get('last_modified')),
+                    'content_hash': cached['content_hash'],
+                }
+            response.raise_for_status()
+        except requests.RequestException as e:
+            logging.error("Error fetching HTML: %s", e, extra={'url': url})
+            return None
 
-        Yields a headless Chrome WebDriver instance. The instance is created with a
-        user agent matching the value of the 'User-Agent' header set by the
-        StockChecker instance. The instance is automatically quit when the context
-        manager is exited.
+        return {
+            # Decoded only when the page is parsed, possibly in a parse worker
+            'content': response.content,
+            'encoding': response.encoding or response.apparent_encoding,
+            'not_modified': False,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'content_hash': hashlib.sha256(response.content).hexdigest(),
+        }
 
+    def create_selenium_driver(self):
+        """Start a headless Chrome WebDriver instance.
+
+        The instance is created with a user agent matching the value of the
+        'User-Agent' header set by the StockChecker instance.
         """
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+
         options = Options()
         options.add_argument('--headless')
         options.add_argument('--disable-gpu')
         options.add_argument(f'user-agent={self.headers["User-Agent"]}')
-        
-        driver = None
+        return webdriver.Chrome(options=options)
+
+    def get_driver_pool(self) -> DriverPool:
+        """Return the checker's Selenium driver pool, creating it on first use."""
+        with self.driver_pool_lock:
+            if self.driver_pool is None:
+                self.driver_pool = DriverPool(
+                    self.create_selenium_driver,
+                    size=self.selenium_config['pool_size'],
+                    max_pages=self.selenium_config['max_pages']
+                )
+            return self.driver_pool
+
+    @staticmethod
+    def get_product_json_url(url: str) -> Optional[str]:
+        """
+        Build the Shopify `.js` product endpoint for a `/products/<handle>` URL.
+
+        Args:
+            url (str): The product page URL
+
+        Returns:
+            Optional[str]: The product JSON URL, or None if the URL is not a product page
+        """
+        parsed = urlparse(url)
+        match = re.match(r'^(.*/products/[^/.]+)/?$', parsed.path)
+        if not match:
+            return None
+        return parsed._replace(path=f"{match.group(1)}.js", query='', fragment='').geturl()
+
+    def uses_product_json(self, url: str, site_name: Optional[str]) -> bool:
+        """Return True if the product JSON endpoint should be tried for this site."""
+        site_key = site_name or urlparse(url).netloc
+        if site_key in self.product_json_unsupported:
+            return False
+        return '*' in self.product_json_sites or site_key in self.product_json_sites
+
+    @staticmethod
+    def parse_product_json(product: dict, variant_id: Optional[str] = None) -> Optional[tuple[bool, str]]:
+        """
+        Read stock status from a Shopify product JSON document.
+
+        Args:
+            product (dict): The decoded `.js` (or `.json`) product document
+            variant_id (Optional[str]): Only look at this variant if given
+
+        Returns:
+            Optional[tuple[bool, str]]: (is_in_stock, product_name), or None if the
+            document carries no availability information
+        """
+        product = product.get('product', product)
+        variants = product.get('variants') or []
+        if variant_id:
+            variants = [variant for variant in variants if str(variant.get('id')) == variant_id]
+
+        availability = [variant['available'] for variant in variants if 'available' in variant]
+        if availability:
+            is_in_stock = any(availability)
+        elif 'available' in product and not variant_id:
+            is_in_stock = bool(product['available'])
+        else:
+            return None
+
+        return is_in_stock, (product.get('title') or 'Product').strip()
+
+    def check_stock_with_product_json(self, url: str, site_name: Optional[str] = None) -> Optional[tuple[bool, str, str]]:
+        """
+        Check stock status through the site's Shopify product JSON endpoint.
+
+        The endpoint is a few KB instead of a full product page and needs no
+        HTML parsing. If the site answers without usable product JSON (404 or
+        410, an HTML page, no availability fields), it is remembered as
+        unsupported and later checks go straight to the product page. Other
+        errors, such as 429 or 503, only fall back for this check.
+
+        Args:
+            url (str): The product page URL
+            site_name (Optional[str]): The name of the site being checked
+
+        Returns:
+            Optional[tuple[bool, str, str]]: (is_in_stock, product_name, site_name),
+            or None if the caller should fall back to the product page
+        """
+        json_url = self.get_product_json_url(url)
+        site_key = site_name or urlparse(url).netloc
+        if not json_url:
+            self.product_json_unsupported.add(site_key)
+            return None
+
         try:
-            driver = webdriver.Chrome(options=options)
+            response = self.http_get(json_url, headers={'Accept': 'application/json'})
+        except requests.RequestException as e:
+            logging.error("Error fetching product JSON: %s", e, extra={'url': json_url})
+            return None
+
+        detected = None
+        if response.ok:
+            try:
+                variant_id = parse_qs(urlparse(url).query).get('variant', [None])[0]
+                detected = self.parse_product_json(response.json(), variant_id)
+            except (ValueError, AttributeError, TypeError):
+                detected = None
+
+        if detected is None:
+            if response.ok or response.status_code in (404, 410):
+                logging.info(f"No product JSON endpoint for {site_key}, using product pages")
+                self.product_json_unsupported.add(site_key)
+            return None
+
+        is_in_stock, product_name = detected
+        return is_in_stock, product_name, site_name
+
+    @contextmanager
+    def get_selenium_driver(self):
+        """Context manager for a Selenium WebDriver instance.
+
+        Yields a headless Chrome WebDriver instance borrowed from the checker's
+        driver pool. The instance is returned to the pool when the context
+        manager is exited, and quit instead if it raised a WebDriverException
+        or has rendered SELENIUM_MAX_PAGES pages.
+
+        """
+        with self.get_driver_pool().acquire() as driver:
             yield driver
-        finally:
-            if driver:
-                driver.quit()
+
+    @staticmethod
+    def page_is_ready(driver) -> bool:
+        """Return True once the product <h1> and at least one submit button exist."""
+        from selenium.webdriver.common.by import By
+        return bool(
+            driver.find_elements(By.TAG_NAME, 'h1') and
+            driver.find_elements(By.CSS_SELECTOR, 'button[type="submit"]')
+        )
+
+    def record_ready_time(self, url: str, seconds: float, timed_out: bool):
+        """
+        Record how long a rendered page took to become ready.
+
+        Args:
+            url (str): The URL that was rendered
+            seconds (float): The time from navigation until the page was ready
+            timed_out (bool): Whether the wait gave up at SELENIUM_MAX_WAIT
+        """
+        host = urlparse(url).netloc
+        with self.ready_times_lock:
+            samples = self.ready_times.setdefault(host, deque(maxlen=100))
+            samples.append((seconds, timed_out))
+        logging.info("Page ready after %.2fs%s: %s", seconds, ' (timed out)' if timed_out else '', url)
+
+    def get_ready_time_stats(self) -> Dict[str, dict]:
+        """
+        Summarize recent page readiness times per host.
+
+        Returns:
+            Dict[str, dict]: Per host, the number of samples, the average and
+            maximum ready time in seconds, and how many waits timed out
+        """
+        with self.ready_times_lock:
+            snapshot = {host: list(samples) for host, samples in self.ready_times.items()}
+
+        return {
+            host: {
+                'count': len(samples),
+                'avg': sum(seconds for seconds, _ in samples) / len(samples),
+                'max': max(seconds for seconds, _ in samples),
+                'timeouts': sum(1 for _, timed_out in samples if timed_out),
+            }
+            for host, samples in snapshot.items() if samples
+        }
 
     def get_html_with_selenium(self, url: str) -> Optional[str]:
         """Fetch HTML content from the given URL using Selenium.
 
+        Waits until the product <h1> and submit buttons exist, up to
+        SELENIUM_MAX_WAIT seconds. If the wait times out, whatever has rendered
+        so far is returned.
+
         Args:
             url (str): The URL to fetch
 
         Returns:
             Optional[str]: The HTML content if successful, None otherwise
         """
+        from selenium.common.exceptions import TimeoutException, WebDriverException
+        from selenium.webdriver.support.ui import WebDriverWait
+
         try:
+            host = get_host(url)
+            checkout_start = time.perf_counter()
             with self.get_selenium_driver() as driver:
-                driver.get(url)
-                time.sleep(2)  # Wait for dynamic content
+                self.metrics.observe('phase_seconds', time.perf_counter() - checkout_start,
+                                     phase='driver_checkout', host=host)
+                with self.rate_limiter.acquire(url), self.metrics.span('selenium_load', host=host):
+                    driver.get(url)
+                start = time.monotonic()
+                timed_out = False
+                try:
+                    WebDriverWait(
+                        driver,
+                        self.selenium_config['max_wait'],
+                        poll_frequency=self.selenium_config['poll_interval']
+                    ).until(self.page_is_ready)
+                except TimeoutException:
+                    timed_out = True
+                self.record_ready_time(url, time.monotonic() - start, timed_out)
+                self.metrics.observe('phase_seconds', time.monotonic() - start, phase='selenium_wait', host=host)
                 return driver.page_source
         except WebDriverException as e:
-            logging.error(f"Selenium error: {str(e)}")
+            logging.error("Selenium error: %s", e, extra={'url': url})
             return None
 
     def parse_stock_status(self, html_content: str, site_name: str) -> tuple[bool, str, str]:
         """
         Parse HTML content to determine stock status by looking for add to cart buttons.
+
+        Uses the streaming detector from `stock_detector` first, which only looks
+        at <h1> and submit <button> elements and stops early. Falls back to a full
+        BeautifulSoup parse when the detector is disabled or unsure.
         
         Args:
             html_content (str): The HTML content to parse
@@ -210,48 +745,101 @@ class StockChecker:
         Returns:
             tuple[bool, str, str]: (is_in_stock, product_name, site_name)
         """
-        if not html_content:
-            return None, None, None
+        return self.analyze_stock_page(html_content, site_name)[0]
 
-        soup = BeautifulSoup(html_content, 'html.parser')
-        
-        # Get product name from h1 tag
-        product_name = soup.find('h1').text.strip() if soup.find('h1') else 'Product'
-        
-        # Find all submit buttons
-        submit_buttons = soup.find_all('button', attrs={'type': 'submit'})
-        
-        # Check if any submit button contains "Add to cart" text
-        is_in_stock = False
-        for button in submit_buttons:
-            # Get all text content from the button
-            button_text = button.get_text(strip=True, separator=' ').lower()
-            
-            # Check if button is not disabled and contains "add to cart"
-            is_disabled = (
-                button.get('aria-disabled') == 'true' or
-                'disabled' in button.attrs or
-                'sold out' in button_text.lower()
-            )
-            
-            if 'add to cart' in button_text and not is_disabled:
-                is_in_stock = True
-                break
-        
-        # Log the findings for debugging
-        logging.debug(f"""
-            Site: {site_name}
-            Product: {product_name}
-            Submit buttons found: {len(submit_buttons)}
-            In stock: {is_in_stock}
-        """)
-        
-        return is_in_stock, product_name, site_name
+    def analyze_stock_page(self, html_content: str, site_name: str) -> tuple[tuple[bool, str, str], bool]:
+        """
+        Parse HTML content like `parse_stock_status` and report whether the page was usable.
+
+        A page is usable when it has a product <h1> and at least one submit
+        button, i.e. the stock status was read from real product markup.
+        Parsing runs in the parse worker pool when PARSE_WORKERS is set.
+
+        Args:
+            html_content (str): The HTML content to parse
+            site_name (str): The name of the site being checked
+
+        Returns:
+            tuple[tuple[bool, str, str], bool]: ((is_in_stock, product_name, site_name), usable)
+        """
+        if html_content and self.parse_workers:
+            return self.get_parse_pool().analyze(html_content, None, site_name)
+        return analyze_page(html_content, site_name, self.parser_backend, self.parse_only, self.use_fast_parser)
+
+    def analyze_page_content(self, content: Optional[bytes], encoding: Optional[str],
+                             site_name: str) -> tuple[tuple[bool, str, str], bool]:
+        """
+        Analyze an undecoded response body like `analyze_stock_page`.
+
+        With parse workers the bytes are sent as they are and decoded in the
+        worker; otherwise they are decoded here.
+
+        Args:
+            content (Optional[bytes]): The response body
+            encoding (Optional[str]): The body's character encoding
+            site_name (str): The name of the site being checked
+
+        Returns:
+            tuple[tuple[bool, str, str], bool]: ((is_in_stock, product_name, site_name), usable)
+        """
+        if content and self.parse_workers:
+            return self.get_parse_pool().analyze(content, encoding, site_name)
+        return self.analyze_stock_page(decode_page(content, encoding), site_name)
+
+    def get_parse_pool(self) -> 'ParsePool':
+        """Return the parse worker pool, creating it on first use."""
+        with self.parse_pool_lock:
+            if self.parse_pool is None:
+                from parse_pool import ParsePool
+                self.parse_pool = ParsePool(
+                    self.parse_workers,
+                    self.parser_backend,
+                    self.parse_only is not None,
+                    self.use_fast_parser
+                )
+            return self.parse_pool
+
+    def parse_stock_status_with_soup(self, html_content: str, site_name: str) -> tuple[bool, str, str]:
+        """
+        Parse HTML content with BeautifulSoup to determine stock status.
+
+        Args:
+            html_content (str): The HTML content to parse
+            site_name (str): The name of the site being checked
+
+        Returns:
+            tuple[bool, str, str]: (is_in_stock, product_name, site_name)
+        """
+        return self.analyze_stock_page_with_soup(html_content, site_name)[0]
+
+    def analyze_stock_page_with_soup(self, html_content: str, site_name: str) -> tuple[tuple[bool, str, str], bool]:
+        """
+        Parse HTML content with BeautifulSoup to determine stock status and page usability.
+
+        Uses the configured `parser_backend`. When `parse_only` is set, only <h1>
+        and <button> subtrees are built into the tree. On badly nested markup
+        html.parser can then attach text differently, since the tags that would
+        have closed an <h1> are never created.
+
+        Args:
+            html_content (str): The HTML content to parse
+            site_name (str): The name of the site being checked
+
+        Returns:
+            tuple[tuple[bool, str, str], bool]: ((is_in_stock, product_name, site_name), usable)
+        """
+        return analyze_page_with_soup(html_content, site_name, self.parser_backend, self.parse_only)
 
     def check_stock(self, url: Optional[str] = None, site_name: Optional[str] = None) -> tuple[bool, str, str]:
         """
         Check stock status of a product at a given URL.
 
+        Sites listed in PRODUCT_JSON_SITES are read from their Shopify product
+        JSON endpoint first. Otherwise the page is fetched with a conditional
+        GET. If the server answers 304, or the body hashes the same as last
+        time, the previously parsed result is reused without parsing the page
+        again.
+
         Args:
             url (Optional[str]): The URL of the product to check. Defaults to None.
             site_name (Optional[str]): The name of the site being checked. Defaults to None.
@@ -259,11 +847,54 @@ class StockChecker:
         Returns:
             tuple[bool, str, str]: (is_in_stock, product_name, site_name)
         """
+        return self.check_stock_details(url, site_name)[0]
+
+    def check_stock_details(self, url: Optional[str] = None,
+                            site_name: Optional[str] = None) -> tuple[tuple[bool, str, str], Optional[bool]]:
+        """
+        Check stock status like `check_stock` and report whether the page was usable.
+
+        Args:
+            url (Optional[str]): The URL of the product to check. Defaults to None.
+            site_name (Optional[str]): The name of the site being checked. Defaults to None.
+
+        Returns:
+            tuple[tuple[bool, str, str], Optional[bool]]: ((is_in_stock, product_name, site_name), usable),
+            where usable is None if the page could not be fetched
+        """
         check_url = url or self.url
         if not check_url:
             raise ValueError("No URL provided")
-        html_content = self.get_html_from_url(check_url)
-        return self.parse_stock_status(html_content, site_name)
+
+        if self.uses_product_json(check_url, site_name):
+            result = self.check_stock_with_product_json(check_url, site_name)
+            if result is not None:
+                return result, True
+
+        page = self.fetch_page(check_url)
+        if page is None:
+            return self.analyze_stock_page(None, site_name)[0], None
+
+        cached = self.page_cache.get(check_url)
+        if cached and (page['not_modified'] or page['content_hash'] == cached['content_hash']):
+            cached['etag'] = page['etag']
+            cached['last_modified'] = page['last_modified']
+            logging.debug("Unchanged page for %s, reusing last result", check_url)
+            return (cached['is_in_stock'], cached['product_name'], site_name), cached['usable']
+
+        with self.metrics.span('parse', host=get_host(check_url)):
+            (is_in_stock, product_name, site_name), usable = self.analyze_page_content(
+                page['content'], page['encoding'], site_name
+            )
+        self.page_cache[check_url] = {
+            'etag': page['etag'],
+            'last_modified': page['last_modified'],
+            'content_hash': page['content_hash'],
+            'is_in_stock': is_in_stock,
+            'product_name': product_name,
+            'usable': usable,
+        }
+        return (is_in_stock, product_name, site_name), usable
 
     def check_stock_with_selenium(self, url: Optional[str] = None, site_name: Optional[str] = None) -> tuple[bool, str, str]:
         """
@@ -280,9 +911,469 @@ class StockChecker:
         if not check_url:
             raise ValueError("No URL provided")
         html_content = self.get_html_with_selenium(check_url)
-        return self.parse_stock_status(html_content, site_name)
+        with self.metrics.span('parse', host=get_host(check_url)):
+            return self.parse_stock_status(html_content, site_name)
 
-    def monitor_multiple(self, urls: List[dict], notification_email: Optional[str] = None, use_selenium: bool = False):
+    def check_stock_auto(self, url: Optional[str] = None, site_name: Optional[str] = None) -> tuple[bool, str, str]:
+        """
+        Check stock status with plain requests, escalating to Selenium only when needed.
+
+        The static HTML is tried first. If it has no product <h1> or no submit
+        buttons, the page is rendered with Selenium instead. Sites where only
+        Selenium gave a usable page are remembered by site name and go straight
+        to Selenium on later checks. A failed fetch (timeout, DNS error, 5xx)
+        says nothing about the site's markup, so it is returned as a failed
+        check without escalating or changing what is remembered.
+
+        Args:
+            url (Optional[str]): The URL of the product to check. Defaults to None.
+            site_name (Optional[str]): The name of the site being checked. Defaults to None.
+
+        Returns:
+            tuple[bool, str, str]: (is_in_stock, product_name, site_name)
+        """
+        check_url = url or self.url
+        if not check_url:
+            raise ValueError("No URL provided")
+        site_key = site_name or urlparse(check_url).netloc
+
+        if self.site_fetch_methods.get(site_key) == 'selenium':
+            return self.check_stock_with_selenium(check_url, site_name)
+
+        result, usable = self.check_stock_details(check_url, site_name)
+        if usable is None:
+            return result
+        if usable:
+            self.site_fetch_methods[site_key] = 'requests'
+            return result
+
+        logging.info("No usable static HTML for %s, retrying with Selenium", check_url)
+        html_content = self.get_html_with_selenium(check_url)
+        with self.metrics.span('parse', host=get_host(check_url)):
+            selenium_result, selenium_usable = self.analyze_stock_page(html_content, site_name)
+        if selenium_usable:
+            self.site_fetch_methods[site_key] = 'selenium'
+            logging.info(f"Using Selenium for {site_key} from now on")
+            return selenium_result
+        return result
+
+    def get_check_method(self, use_selenium: bool = False,
+                         fetch_mode: Optional[str] = None) -> Callable[[str, str], tuple[bool, str, str]]:
+        """
+        Pick the stock check method for a fetch mode.
+
+        Args:
+            use_selenium (bool): Forces the 'selenium' mode when True.
+            fetch_mode (Optional[str]): 'requests', 'selenium' or 'auto'. Defaults to the checker's fetch mode.
+
+        Returns:
+            Callable[[str, str], tuple[bool, str, str]]: The check method, taking (url, site_name)
+        """
+        mode = 'selenium' if use_selenium else (fetch_mode or self.fetch_mode)
+        methods = {
+            'requests': self.check_stock,
+            'selenium': self.check_stock_with_selenium,
+            'auto': self.check_stock_auto,
+        }
+        if mode not in methods:
+            raise ValueError(f"Unknown fetch mode: {mode}")
+        return methods[mode]
+
+    def timed_check(self, check: Callable[[str, str], tuple], url: str, site_name: str) -> tuple[bool, str, str]:
+        """Run a check method as the 'check' phase and count its result per host."""
+        host = get_host(url)
+        with self.metrics.span('check', host=host):
+            result = check(url, site_name)
+        status = {True: 'in_stock', False: 'out_of_stock'}.get(result[0] if result else None, 'unknown')
+        self.metrics.inc('checks_total', host=host, result=status)
+        return result
+
+    def report_stock_status(self, result: tuple, notification_email: Optional[str] = None):
+        """
+        Print the stock status for a single check and notify via email if in stock.
+
+        Args:
+            result (tuple): (is_in_stock, product_name, site_name) as returned by `check_stock`.
+            notification_email (Optional[str]): Email address to send notifications if a product is in stock.
+        """
+        is_in_stock, product_name, site_name = result
+        if is_in_stock:
+            print(f"\n[{datetime.now()}] {site_name} - {product_name} is in stock!")
+            if notification_email:
+                self.send_notification(notification_email, product_name, site_name=site_name)
+        else:
+            print(f"\n[{datetime.now()}] {site_name} - {product_name} is out of stock")
+
+    def get_state_store(self) -> Optional[StockStateStore]:
+        """Return the stock state store, opening STATE_DB on first use, or None if disabled."""
+        if not self.state_db:
+            return None
+        with self.state_store_lock:
+            if self.state_store is None:
+                self.state_store = StockStateStore(self.state_db)
+            return self.state_store
+
+    def handle_result(self, entry: dict, result: tuple, notification_email: Optional[str] = None):
+        """
+        Record a check result in the state store and report it.
+
+        The result is also stored for each key listed in the entry's 'keys'.
+
+        An email is only sent when the product has just come into stock,
+        according to the stored state. Without a state store, every in-stock
+        result is notified.
+
+        Args:
+            entry (dict): The entry that was checked, with 'url' and 'site_name' keys.
+            result (tuple): (is_in_stock, product_name, site_name) as returned by `check_stock`.
+            notification_email (Optional[str]): Email address to send notifications if a product is in stock.
+        """
+        if entry.get('keys'):
+            with self.key_results_lock:
+                for key in entry['keys']:
+                    self.key_results.setdefault(key, {})[(entry['url'], entry['site_name'])] = result
+
+        state_store = self.get_state_store()
+        if state_store is not None:
+            content_hash = self.page_cache.get(entry['url'], {}).get('content_hash')
+            if not state_store.record(entry, result, content_hash):
+                notification_email = None
+        self.report_stock_status(result)
+        if notification_email and result[0]:
+            self.send_notification(notification_email, result[1], url=entry['url'], site_name=result[2])
+
+    def get_key_status(self) -> Dict[str, dict]:
+        """
+        Summarize the latest results for every monitored key.
+
+        Returns:
+            Dict[str, dict]: Per key, the number of URLs with a result ('checked') and
+            the sites that have the product in stock ('in_stock')
+        """
+        with self.key_results_lock:
+            return {
+                key: {
+                    'checked': len(results),
+                    'in_stock': sorted(site_name for (_, site_name), result in results.items() if result[0]),
+                }
+                for key, results in sorted(self.key_results.items())
+            }
+
+    def flush_state(self, force: bool = False):
+        """Write buffered results to the state store if STATE_FLUSH_INTERVAL has passed, or now if forced."""
+        if self.state_store is None:
+            return
+        if force or self.state_store.seconds_since_flush() >= self.state_flush_interval:
+            self.state_store.flush()
+
+    def run_sweep(self, urls: List[dict], notification_email: Optional[str] = None, use_selenium: bool = False,
+                  should_stop: Optional[Callable[[], bool]] = None, fetch_mode: Optional[str] = None,
+                  on_result: Optional[Callable[[dict, Optional[tuple]], None]] = None) -> int:
+        """
+        Check every URL once and report each result.
+
+        Runs `run_monitor_loop` for a single pass, so checks are dispatched,
+        recorded in the state store and summarized exactly as while monitoring.
+        Results are reported in the order they complete.
+
+        Args:
+            urls (List[dict]): A list of dictionaries with 'url' and 'site_name' keys to check.
+            notification_email (Optional[str]): Email address to send notifications if a product is in stock.
+            use_selenium (bool): Flag to determine whether to use Selenium for fetching HTML content.
+            should_stop (Optional[Callable[[], bool]]): The sweep stops starting checks when it returns True.
+            fetch_mode (Optional[str]): 'requests', 'selenium' or 'auto'. Defaults to the checker's fetch mode.
+            on_result (Optional[Callable[[dict, Optional[tuple]], None]]): Called with each entry and its
+                result, or None if the check failed.
+
+        Returns:
+            int: The number of results reported.
+        """
+        return self.run_monitor_loop(urls, notification_email, use_selenium, should_stop=should_stop,
+                                     fetch_mode=fetch_mode, on_result=on_result, once=True)
+
+    def start_metrics_server(self) -> Optional[MetricsServer]:
+        """Start serving metrics on METRICS_PORT, once, unless it is 0."""
+        if self.metrics_server is None and self.metrics_config['port']:
+            try:
+                self.metrics_server = MetricsServer(self.metrics, self.metrics_config['host'],
+                                                    self.metrics_config['port'])
+                self.metrics_server.start()
+            except OSError as e:
+                logging.error(f"Could not serve metrics on port {self.metrics_config['port']}: {e}")
+                self.metrics_config['port'] = 0
+        return self.metrics_server
+
+    def write_metrics_summary(self, before: dict, started: float, **details) -> dict:
+        """
+        Summarize the metrics recorded since `before` was taken.
+
+        The summary is logged as one JSON object and, if METRICS_SUMMARY_FILE
+        is set, appended to that file as a JSON line.
+
+        Args:
+            before (dict): A `MetricsRegistry.snapshot` from the start of the period
+            started (float): The `time.monotonic()` value at the start of the period
+            **details: Extra fields, e.g. the number of URLs checked
+
+        Returns:
+            dict: The summary, with the counter increases and per-phase timings
+        """
+        summary = {
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'duration': round(time.monotonic() - started, 3),
+            **details,
+            **MetricsRegistry.summarize(before, self.metrics.snapshot()),
+        }
+        self.last_summary = summary
+        line = json.dumps(summary, sort_keys=True)
+        logging.info("Metrics summary: %s", line)
+        if self.metrics_config['summary_file']:
+            try:
+                with open(self.metrics_config['summary_file'], 'a', encoding='utf-8') as summary_file:
+                    summary_file.write(line + '\n')
+            except OSError as e:
+                logging.error(f"Could not write metrics summary: {e}")
+        return summary
+
+    def create_scheduler(self, urls: List[dict]) -> AdaptiveScheduler:
+        """
+        Build the adaptive per-URL polling schedule for a list of URLs.
+
+        The check interval is the starting point; POLL_MIN_INTERVAL and
+        POLL_MAX_INTERVAL are widened to include it if needed.
+
+        Args:
+            urls (List[dict]): A list of dictionaries with 'url' and 'site_name' keys.
+
+        Returns:
+            AdaptiveScheduler: The schedule, with every URL due immediately, round-robin across hosts
+        """
+        return AdaptiveScheduler(
+            # Hosts take turns when everything is due at once
+            interleave_by_host(urls),
+            base_interval=self.check_interval,
+            min_interval=min(self.poll_config['min_interval'], self.check_interval),
+            max_interval=max(self.poll_config['max_interval'], self.check_interval),
+            jitter=self.poll_config['jitter'],
+            backoff=self.poll_config['backoff'],
+            drop_lead=self.poll_config['drop_lead'],
+            drop_window=self.poll_config['drop_window'],
+            stable_ratio=self.poll_config['stable_ratio']
+        )
+
+    def run_monitor_loop(self, urls: List[dict], notification_email: Optional[str] = None, use_selenium: bool = False,
+                         should_stop: Optional[Callable[[], bool]] = None, fetch_mode: Optional[str] = None,
+                         watcher: Optional[LinkWatcher] = None, cluster: Optional['ClusterNode'] = None,
+                         on_result: Optional[Callable[[dict, Optional[tuple]], None]] = None,
+                         once: bool = False) -> int:
+        """
+        Poll each URL on its own adaptive interval until stopped.
+
+        Due URLs are taken from the scheduler's min-heap and handed to a pool of
+        `max_concurrency` workers as soon as a worker is free, so a slow check
+        only holds up its own worker. The loop sleeps until the next URL is due
+        or a worker finishes, waking up at least every half second to notice
+        `should_stop`. In-flight checks are allowed to finish before returning.
+        The scheduler stays available as `self.scheduler` for drift statistics.
+        A metrics summary of the URLs monitored and the results reported is
+        written every METRICS_SUMMARY_INTERVAL seconds and once more at the end.
+
+        With a `watcher`, changes to the CSV file are applied to the running
+        schedule: added rows are checked right away, removed rows are dropped
+        and rows that did not change keep their place and interval.
+
+        With a `cluster`, only the URLs this node owns are checked, and the
+        schedule is rebalanced when nodes join, leave or die. In-stock alerts
+        go to the cluster's shared stream and are sent by the leader node.
+
+        With `once`, every URL is checked a single time and the loop returns
+        when the last check finishes (see `run_sweep`).
+
+        Args:
+            urls (List[dict]): A list of dictionaries with 'url' and 'site_name' keys to monitor.
+            notification_email (Optional[str]): Email address to send notifications if a product is in stock.
+            use_selenium (bool): Flag to determine whether to use Selenium for fetching HTML content.
+            should_stop (Optional[Callable[[], bool]]): Monitoring ends when it returns True.
+            fetch_mode (Optional[str]): 'requests', 'selenium' or 'auto'. Defaults to the checker's fetch mode.
+            watcher (Optional[LinkWatcher]): Reloads the monitored URLs when their CSV file changes.
+            cluster (Optional[ClusterNode]): Shares the URLs with other nodes.
+            on_result (Optional[Callable[[dict, Optional[tuple]], None]]): Called from the worker with each entry
+                and its result, or None if the check failed.
+            once (bool, optional): Check every URL once and stop. Defaults to False.
+
+        Returns:
+            int: The number of results reported.
+        """
+        should_stop = should_stop or (lambda: False)
+        on_result = on_result or (lambda entry, result: None)
+        check = self.get_check_method(use_selenium, fetch_mode)
+        self.monitored_urls = urls
+        if cluster is not None:
+            self.cluster = cluster
+            cluster.join()
+            urls = cluster.assign(urls)
+        scheduler = self.scheduler = self.create_scheduler(urls)
+        wake = threading.Event()
+        in_flight = 0
+        reported = summarized = 0
+        in_flight_lock = threading.Lock()
+        self.start_metrics_server()
+        before, started = self.metrics.snapshot(), time.monotonic()
+
+        def run_check(entry):
+            nonlocal in_flight, reported
+            result, handled = None, False
+            try:
+                result = self.timed_check(check, entry['url'], entry['site_name'])
+                self.handle_result(entry, result, notification_email)
+                handled = True
+            except Exception as e:
+                logging.error("Error checking %s: %s", entry['url'], e, extra={'url': entry['url']})
+            finally:
+                try:
+                    on_result(entry, result if handled else None)
+                except Exception as e:
+                    logging.error("Error reporting %s: %s", entry['url'], e, extra={'url': entry['url']})
+                if once:
+                    scheduler.remove(entry)
+                else:
+                    scheduler.record_result(entry, result)
+                with in_flight_lock:
+                    in_flight -= 1
+                    reported += handled
+                wake.set()
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='stock-check') as executor:
+            while not should_stop() and not (once and len(scheduler) == 0):
+                wake.clear()
+                with in_flight_lock:
+                    free_workers = self.max_concurrency - in_flight
+
+                if free_workers > 0:
+                    for entry in scheduler.pop_due(limit=free_workers):
+                        with in_flight_lock:
+                            in_flight += 1
+                        executor.submit(run_check, entry)
+                        free_workers -= 1
+
+                # With every worker busy, due URLs wait for a check to finish rather than for the clock
+                if free_workers > 0:
+                    wake.wait(min(scheduler.seconds_until_next(), 0.5))
+                else:
+                    wake.wait(0.5)
+                self.flush_state()
+                if watcher is not None:
+                    self.reload_links(scheduler, watcher)
+                if cluster is not None:
+                    self.rebalance(scheduler, cluster)
+                    self.forward_cluster_alerts(cluster)
+                if time.monotonic() - started >= self.metrics_config['summary_interval']:
+                    with in_flight_lock:
+                        period_reported, summarized = reported - summarized, reported
+                    self.write_metrics_summary(before, started, urls=len(scheduler), reported=period_reported)
+                    before, started = self.metrics.snapshot(), time.monotonic()
+
+        self.flush_state(force=True)
+        if cluster is not None:
+            self.forward_cluster_alerts(cluster)
+            cluster.leave()
+            self.cluster = None
+        # A finished sweep has emptied its schedule
+        self.write_metrics_summary(before, started, urls=len(urls) if once else len(scheduler),
+                                   reported=reported - summarized)
+        drift = scheduler.get_drift_stats()
+        logging.info(f"Schedule drift over {drift['count']} checks: mean {drift['mean']:.2f}s, "
+                     f"p95 {drift['p95']:.2f}s, max {drift['max']:.2f}s")
+        return reported
+
+    def reload_links(self, scheduler: AdaptiveScheduler, watcher: LinkWatcher) -> Optional[dict]:
+        """
+        Apply changes to the watched CSV file to a running schedule.
+
+        Args:
+            scheduler (AdaptiveScheduler): The running schedule
+            watcher (LinkWatcher): The watcher of the monitored CSV file
+
+        Returns:
+            Optional[dict]: The 'added', 'removed' and 'updated' entries, or None if the file did not change
+        """
+        urls = watcher.poll()
+        if urls is None:
+            return None
+        self.monitored_urls = urls
+        if self.cluster is not None:
+            urls = self.cluster.assign(urls)
+        changes = scheduler.sync(urls)
+        self.forget_results(changes)
+        logging.info(f"Reloaded {watcher.name}: {len(changes['added'])} added, "
+                     f"{len(changes['removed'])} removed, {len(changes['updated'])} updated")
+        return changes
+
+    def forget_results(self, changes: dict):
+        """Forget results for keys that no longer reference a URL after a schedule sync."""
+        with self.key_results_lock:
+            stale = [(entry, []) for entry in changes['removed']]
+            stale += [(entry, entry.get('keys', [])) for entry in changes['updated']]
+            for entry, keys in stale:
+                for key, results in self.key_results.items():
+                    if key not in keys:
+                        results.pop((entry['url'], entry['site_name']), None)
+
+    def rebalance(self, scheduler: AdaptiveScheduler, cluster: 'ClusterNode') -> Optional[dict]:
+        """
+        Take over or hand off URLs after a node joined, left or died.
+
+        The stock state of URLs taken over is read again from STATE_DB, which
+        the nodes should share, so a product their previous owner already
+        reported is not reported again. Results for URLs handed off are
+        written out right away for their new owner.
+
+        Args:
+            scheduler (AdaptiveScheduler): The running schedule
+            cluster (ClusterNode): This node
+
+        Returns:
+            Optional[dict]: The 'added', 'removed' and 'updated' entries, or None if no node joined or left
+        """
+        if not cluster.refresh():
+            return None
+        changes = scheduler.sync(cluster.assign(self.monitored_urls))
+        state_store = self.get_state_store()
+        if state_store is not None:
+            if changes['removed']:
+                self.flush_state(force=True)
+            if changes['added']:
+                state_store.load(changes['added'])
+        self.forget_results(changes)
+        logging.info(f"Cluster has {len(cluster.ring.nodes)} nodes: {cluster.node_id} took over "
+                     f"{len(changes['added'])} URLs and handed off {len(changes['removed'])}")
+        return changes
+
+    def forward_cluster_alerts(self, cluster: 'ClusterNode') -> int:
+        """
+        Send the alerts every node queued in the cluster, if this node is the leader.
+
+        Returns:
+            int: The number of alerts handed to the notifier
+        """
+        alerts = cluster.take_alerts()
+        for alert in alerts:
+            self.get_notifier().notify(alert['to_email'], alert['product_name'], alert['url'], alert['site_name'])
+        return len(alerts)
+
+    def get_schedule_drift(self) -> dict:
+        """
+        Return drift statistics for the running (or last) monitoring loop.
+
+        Returns:
+            dict: See `AdaptiveScheduler.get_drift_stats`
+        """
+        if self.scheduler is None:
+            return dict(EMPTY_DRIFT_STATS)
+        return self.scheduler.get_drift_stats()
+
+    def monitor_multiple(self, urls: List[dict], notification_email: Optional[str] = None, use_selenium: bool = False,
+                         fetch_mode: Optional[str] = None):
         """
         Monitor multiple URLs for stock availability and notify via email if in stock.
         
@@ -290,13 +1381,19 @@ class StockChecker:
             urls (List[dict]): A list of dictionaries with 'url' and 'site_name' keys to monitor.
             notification_email (Optional[str]): Email address to send notifications if a product is in stock.
             use_selenium (bool): Flag to determine whether to use Selenium for fetching HTML content.
+            fetch_mode (Optional[str]): 'requests', 'selenium' or 'auto'. Defaults to the checker's fetch mode.
         
         Behavior:
-            - Continuously checks stock status for given URLs at the specified interval.
-            - Uses 'Requests' or 'Selenium' for HTML fetching based on `use_selenium` flag.
+            - Continuously checks stock status for given URLs, each on its own adaptive
+              interval around the check interval (see `create_scheduler`).
+            - Uses 'Requests', 'Selenium' or both ('auto') for HTML fetching based on
+              the `use_selenium` flag and `fetch_mode`.
+            - Checks up to `max_concurrency` URLs at a time.
             - Sends an email notification if a product is found in stock.
             - Allows user to quit monitoring by pressing 'q'.
         """
+        import keyboard
+
         # Create an event to signal when to stop monitoring
         should_exit = threading.Event()
         
@@ -308,91 +1405,89 @@ class StockChecker:
             should_exit.set()
             print("\nExiting...")
         
+        mode_labels = {'requests': 'Requests', 'selenium': 'Selenium', 'auto': 'Requests, with Selenium when needed'}
+
         # Set up keyboard listener
         keyboard.on_press_key('q', lambda _: on_quit())
         
         print(f"Starting stock monitor for {len(urls)} products")
-        print(f"Using {'Selenium' if use_selenium else 'Requests'}")
-        print(f"Checking every {self.check_interval} seconds...")
+        mode = 'selenium' if use_selenium else (fetch_mode or self.fetch_mode)
+        print(f"Using {mode_labels.get(mode, mode)}")
+        print(f"Checking about every {self.check_interval} seconds per product, {self.max_concurrency} at a time...")
         print("\nPress 'q' to quit at any time...")
 
         # Main monitoring loop
-        while not should_exit.is_set():
-            # Check stock for each URL
-            for entry in urls:
-                # Check if monitoring should be stopped
-                if should_exit.is_set():
-                    break
-                    
-                try:
-                    # Check stock
-                    if use_selenium:
-                        is_in_stock, product_name, site_name = self.check_stock_with_selenium(
-                            entry['url'], 
-                            entry['site_name']
-                        )
-                    else:
-                        is_in_stock, product_name, site_name = self.check_stock(
-                            entry['url'], 
-                            entry['site_name']
-                        )
-
-                    # Print stock status
-                    if is_in_stock:
-                        print(f"\n[{datetime.now()}] {site_name} - {product_name} is in stock!")
-                        if notification_email:
-                            self.send_notification(notification_email, product_name)
-                    else:
-                        print(f"\n[{datetime.now()}] {site_name} - {product_name} is out of stock")
-
-                # Handle exceptions
-                except Exception as e:
-                    logging.error(f"Error checking {entry['url']}: {e}")
-            
-            # Sleep for specified interval
-            if not should_exit.is_set():
-                time.sleep(self.check_interval)
+        self.run_monitor_loop(urls, notification_email, use_selenium, should_stop=should_exit.is_set, fetch_mode=fetch_mode)
         
         # Clean up keyboard listener
         keyboard.unhook_all()
 
-    def send_notification(self, to_email: str, product_name: str):
+    def get_notifier(self) -> 'NotificationDispatcher':
+        """Return the notification dispatcher, creating it on first use."""
+        with self.notifier_lock:
+            if self.notifier is None:
+                from notifier import NotificationDispatcher
+                email_config = get_email_config()
+                notification_config = get_notification_config()
+                self.notifier = NotificationDispatcher(
+                    email_config['smtp_server'],
+                    email_config['smtp_port'],
+                    email_config['sender_email'],
+                    email_config['sender_password'],
+                    use_tls=email_config['use_tls'],
+                    digest_window=notification_config['digest_window'],
+                    idle_timeout=notification_config['idle_timeout'],
+                    max_attempts=notification_config['max_attempts'],
+                    timeout=self.http_config['timeout'],
+                    metrics=self.metrics,
+                    on_failure=self.handle_undelivered
+                )
+            return self.notifier
+
+    def handle_undelivered(self, alerts: List[dict]):
         """
-        Send an email notification to the given address when a product is in stock.
+        Forget that undeliverable alerts were sent, so their products alert again.
+
+        Without this, a restock whose email failed would be stored as already
+        notified and nobody would hear about it.
+
+        Args:
+            alerts (List[dict]): Alerts with 'url' and 'site_name' keys, from the notification dispatcher
+        """
+        state_store = self.get_state_store()
+        if state_store is None:
+            return
+        for alert in alerts:
+            if alert['url'] and state_store.mark_undelivered(alert):
+                logging.warning("Alert for %s was not delivered, it will be sent again on the next in-stock check",
+                                alert['url'], extra={'url': alert['url']})
+
+    def send_notification(self, to_email: str, product_name: str, url: Optional[str] = None,
+                          site_name: Optional[str] = None):
+        """
+        Queue an email notification to the given address that a product is in stock.
 
         Args:
             to_email (str): The email address to send the notification to.
             product_name (str): The name of the product that is now in stock.
+            url (Optional[str]): The product URL. Defaults to the checker's URL.
+            site_name (Optional[str]): The store the product was found on.
 
         Behavior:
-            - Uses the email configuration from the environment variables.
+            - Returns immediately; the email is sent by a background thread over a
+              reused SMTP connection configured from the environment variables.
+            - While monitoring as part of a cluster, the alert is queued in the
+              cluster's shared stream instead and sent by the leader node.
             - Sends a plaintext email with the subject "Stock Alert: <product_name>" and
               the message "The product '<product_name>' is now in stock!\nURL: <url>".
-            - Logs an error if there is an issue sending the notification.
+              Alerts for the same address within NOTIFY_DIGEST_WINDOW seconds are
+              merged into one digest email.
+            - Logs an error if the email cannot be sent after SMTP_MAX_ATTEMPTS attempts.
         """
-        # Get email configuration from environment
-        email_config = get_email_config()
-        
-        try:
-            # Send email
-            msg = MIMEText(f"The product '{product_name}' is now in stock!\nURL: {self.url}")
-            msg['Subject'] = f"Stock Alert: {product_name}"
-            msg['From'] = email_config['sender_email']
-            msg['To'] = to_email
-            
-            with smtplib.SMTP(email_config['smtp_server'], email_config['smtp_port']) as server:
-                server.starttls()
-                server.login(
-                    email_config['sender_email'],
-                    email_config['sender_password']
-                )
-                server.send_message(msg)
-                
-            logging.info(f"Notification sent to {to_email}")
-            
-        # Handle exceptions
-        except Exception as e:
-            logging.error(f"Error sending notification: {str(e)}")
+        if self.cluster is not None:
+            self.cluster.publish_alert(to_email, product_name, url or self.url, site_name)
+            return
+        self.get_notifier().notify(to_email, product_name, url or self.url, site_name)
 
 if __name__ == "__main__":
     # DEBUG:
@@ -0,0 +1,220 @@
+from html.parser import HTMLParser
+from typing import Optional, List
+
+# Tags BeautifulSoup treats as empty elements, so they never stay open
+VOID_ELEMENTS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'keygen', 'link',
+    'menuitem', 'meta', 'param', 'source', 'track', 'wbr', 'basefont', 'bgsound',
+    'command', 'frame', 'image', 'isindex', 'nextid', 'spacer',
+}
+
+# Tags whose text, at any depth, BeautifulSoup stores as a special string type
+# that get_text() on an enclosing <h1> or <button> leaves out
+HIDDEN_TEXT_ELEMENTS = {'script', 'style', 'template', 'rt', 'rp'}
+
+# Tags inside which BeautifulSoup keeps whitespace-only strings as they are
+PRESERVE_WHITESPACE_ELEMENTS = {'pre', 'textarea'}
+
+ASCII_SPACES = '\x20\x0a\x09\x0c\x0d'
+
+
+class _StopParsing(Exception):
+    """Raised from a handler once the result is known."""
+
+
+class _Unsure(Exception):
+    """Raised from a handler when the markup could be read differently by BeautifulSoup."""
+
+
+class StockDetector(HTMLParser):
+    """
+    Streaming detector that only looks at the first <h1> and submit <button> elements.
+
+    Mirrors the rules of `StockChecker.parse_stock_status` without building a
+    tree: it tracks the stack of open tags the same way BeautifulSoup's
+    html.parser builder does, collects text only while inside the first <h1> or
+    a submit button, and stops as soon as an enabled "add to cart" button has
+    been seen and the product name is known.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.open_tags: List[str] = []
+        self.pending_data: List[str] = []
+        self.product_name: Optional[str] = None
+        self.h1_parts: Optional[List[str]] = None
+        self.h1_depth: Optional[int] = None
+        self.button: Optional[dict] = None
+        self.submit_buttons = 0
+        self.is_in_stock = False
+
+    def handle_starttag(self, tag, attrs):
+        self.flush_data()
+        if tag == 'template' and (self.h1_depth is not None or self.button):
+            raise _Unsure()
+
+        if tag == 'h1':
+            if self.h1_depth is not None:
+                raise _Unsure()
+            if self.product_name is None:
+                self.h1_parts = []
+                self.h1_depth = len(self.open_tags)
+        elif tag == 'button':
+            if self.button:
+                raise _Unsure()
+            attributes = dict(attrs)
+            if attributes.get('type') == 'submit':
+                self.button = {
+                    'attrs': attributes,
+                    'parts': [],
+                    'depth': len(self.open_tags),
+                }
+
+        if tag in VOID_ELEMENTS:
+            self.handle_endtag(tag, void=True)
+        else:
+            self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        if tag in ('h1', 'button'):
+            raise _Unsure()
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_ELEMENTS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag, void=False):
+        self.flush_data()
+        if not void:
+            if tag not in self.open_tags:
+                return
+            # Pop back to the most recent matching tag, closing anything left open inside it
+            index = len(self.open_tags) - 1 - self.open_tags[::-1].index(tag)
+            del self.open_tags[index:]
+
+        if self.h1_depth is not None and len(self.open_tags) <= self.h1_depth:
+            self.finish_h1()
+        if self.button and len(self.open_tags) <= self.button['depth']:
+            self.finish_button()
+
+        if self.is_in_stock and self.product_name is not None:
+            raise _StopParsing()
+
+    def handle_data(self, data):
+        self.pending_data.append(data)
+
+    def flush_data(self):
+        """Turn buffered text into one string, the way BeautifulSoup ends a text node."""
+        if not self.pending_data:
+            return
+        data = ''.join(self.pending_data)
+        self.pending_data = []
+
+        if any(tag in HIDDEN_TEXT_ELEMENTS for tag in self.open_tags):
+            return
+        if not PRESERVE_WHITESPACE_ELEMENTS.intersection(self.open_tags) and not data.strip(ASCII_SPACES):
+            data = '\n' if '\n' in data else ' '
+
+        if self.h1_depth is not None:
+            self.h1_parts.append(data)
+        if self.button:
+            self.button['parts'].append(data)
+
+    def handle_comment(self, data):
+        self.flush_data()
+
+    def handle_decl(self, decl):
+        self.flush_data()
+
+    def handle_pi(self, data):
+        self.flush_data()
+
+    def unknown_decl(self, data):
+        self.flush_data()
+        if self.h1_depth is not None or self.button:
+            raise _Unsure()
+
+    def finish_h1(self):
+        self.product_name = ''.join(self.h1_parts).strip()
+        self.h1_parts = None
+        self.h1_depth = None
+
+    def finish_button(self):
+        button, self.button = self.button, None
+        self.submit_buttons += 1
+
+        button_text = ' '.join(part.strip() for part in button['parts'] if part.strip()).lower()
+        attributes = button['attrs']
+        is_disabled = (
+            attributes.get('aria-disabled') == 'true' or
+            'disabled' in attributes or
+            'sold out' in button_text
+        )
+        if 'add to cart' in button_text and not is_disabled:
+            self.is_in_stock = True
+
+    def detect(self, html_content: str) -> Optional[dict]:
+        """
+        Run the detector over the given HTML.
+
+        Args:
+            html_content (str): The HTML content to scan
+
+        Returns:
+            Optional[dict]: A dictionary with 'is_in_stock', 'product_name',
+            'has_h1' and 'submit_buttons' keys, or None if the markup is
+            ambiguous and should be parsed with BeautifulSoup instead
+        """
+        try:
+            self.feed(html_content)
+            self.close()
+        except _StopParsing:
+            pass
+        except _Unsure:
+            return None
+        except Exception:
+            return None
+        else:
+            # Anything still open is closed at the end of the document
+            self.flush_data()
+            if self.h1_depth is not None:
+                self.finish_h1()
+            if self.button:
+                self.finish_button()
+
+        return {
+            'is_in_stock': self.is_in_stock,
+            'product_name': self.product_name if self.product_name is not None else 'Product',
+            'has_h1': self.product_name is not None,
+            'submit_buttons': self.submit_buttons,
+        }
+
+
+def detect_stock_page(html_content: str) -> Optional[dict]:
+    """
+    Detect stock status and page structure without building a full BeautifulSoup tree.
+
+    Args:
+        html_content (str): The HTML content to scan
+
+    Returns:
+        Optional[dict]: See `StockDetector.detect`, or None when the caller
+        should fall back to the BeautifulSoup parser
+    """
+    return StockDetector().detect(html_content)
+
+
+def detect_stock_status(html_content: str) -> Optional[tuple[bool, str]]:
+    """
+    Detect stock status from HTML without building a full BeautifulSoup tree.
+
+    Args:
+        html_content (str): The HTML content to scan
+
+    Returns:
+        Optional[tuple[bool, str]]: (is_in_stock, product_name), or None when the
+        caller should fall back to the BeautifulSoup parser
+    """
+    detected = detect_stock_page(html_content)
+    if detected is None:
+        return None
+    return detected['is_in_stock'], detected['product_name']
@@ -0,0 +1,114 @@
+import atexit
+import json
+import logging
+import queue
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, List, Optional, TextIO
+
+TEXT_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+
+# Attributes every LogRecord has; anything else on a record came from `extra`
+RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', None, None))) | {'message', 'asctime'}
+
+# Running writers and the queue handler feeding each, by logger
+writers: Dict[QueueListener, tuple] = {}
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Format records as one JSON object per line.
+
+    Each line has the time, level, logger, thread and message, plus any fields
+    passed with `extra`, e.g. `logging.error("...", extra={'url': url})`.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created).astimezone().isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        for name, value in vars(record).items():
+            if name not in RECORD_ATTRIBUTES and name not in entry:
+                entry[name] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class DeferredQueueHandler(QueueHandler):
+    """
+    Queue handler that leaves all formatting to the writer thread.
+
+    The stock QueueHandler formats the message in the logging thread so the
+    record can be pickled; records here stay in the process, so the calling
+    thread only builds the record and puts it on the queue.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def setup_logging(filename: Optional[str] = 'stock_checker.log', level: str = 'INFO',
+                  max_bytes: int = 10 * 1024 * 1024, backup_count: int = 5, log_format: str = 'json',
+                  stream: Optional[TextIO] = None,
+                  logger: Optional[logging.Logger] = None) -> Optional[QueueListener]:
+    """
+    Send log records through a queue to a background writer thread.
+
+    Logging calls only put the record on an unbounded queue, so checking
+    threads never wait on the log file, its rotation or formatting. Like
+    `logging.basicConfig`, nothing is changed if the logger already has
+    handlers. The writer is stopped, and the queue drained, at exit.
+
+    Args:
+        filename (Optional[str]): The log file, rotated by size. None to not log to a file.
+        level (str, optional): The logging level. Defaults to 'INFO'.
+        max_bytes (int, optional): The size at which the log file is rotated. Defaults to 10 MiB.
+        backup_count (int, optional): The number of rotated files kept. Defaults to 5.
+        log_format (str, optional): 'json' for JSON lines or 'text'. Defaults to 'json'.
+        stream (Optional[TextIO]): A stream to log to as well, e.g. sys.stderr.
+        logger (Optional[logging.Logger]): The logger to configure. Defaults to the root logger.
+
+    Returns:
+        Optional[QueueListener]: The running writer, or None if the logger was already configured
+    """
+    logger = logger or logging.getLogger()
+    if logger.handlers:
+        return None
+
+    formatter = JsonFormatter() if log_format == 'json' else logging.Formatter(TEXT_FORMAT)
+    handlers: List[logging.Handler] = []
+    if filename:
+        handlers.append(RotatingFileHandler(filename, maxBytes=max_bytes, backupCount=backup_count,
+                                            encoding='utf-8'))
+    if stream is not None:
+        handlers.append(logging.StreamHandler(stream))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    records = queue.SimpleQueue()
+    listener = QueueListener(records, *handlers, respect_handler_level=True)
+    queue_handler = DeferredQueueHandler(records)
+    logger.addHandler(queue_handler)
+    logger.setLevel(level)
+    listener.start()
+    writers[listener] = (logger, queue_handler)
+    atexit.register(stop_logging, listener)
+    return listener
+
+
+def stop_logging(listener: Optional[QueueListener] = None):
+    """Write out every queued record and stop one writer, or all of them."""
+    for running in ([listener] if listener else list(writers)):
+        if running not in writers:
+            continue
+        logger, queue_handler = writers.pop(running)
+        logger.removeHandler(queue_handler)
+        running.stop()
+        for handler in running.handlers:
+            handler.close()
+
@@ -33,4 +33,9 @@ def create_test_csv(test_csv_path):
     
     # Cleanup
     if test_csv_path.exists():
-        test_csv_path.unlink()
\ No newline at end of file
+        test_csv_path.unlink()
+
+@pytest.fixture(autouse=True)
+def isolated_state_db(tmp_path, monkeypatch):
+    """Keep each test's stock state database out of the working directory"""
+    monkeypatch.setenv('STATE_DB', str(tmp_path / "stock_state.db"))
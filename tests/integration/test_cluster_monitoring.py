@@ -0,0 +1,78 @@
+import threading
+import time
+import pytest
+from cluster import ClusterNode, ClusterStore
+from stock_checker import StockChecker
+
+URLS = [{'url': f"https://teststore{i}.com/products/test-product-1", 'site_name': f"TestStore{i}"}
+        for i in range(8)]
+
+class FakeNotifier:
+    def __init__(self):
+        self.sent = []
+
+    def notify(self, to_email, product_name, url=None, site_name=None):
+        self.sent.append(site_name)
+
+    def close(self):
+        pass
+
+@pytest.fixture
+def make_node(monkeypatch, tmp_path):
+    """Build StockCheckers sharing a state database and a cluster database"""
+    monkeypatch.setenv('STATE_DB', str(tmp_path / "state.db"))
+    monkeypatch.setenv('POLL_MIN_INTERVAL', '0.1')
+    monkeypatch.setenv('POLL_MAX_INTERVAL', '0.1')
+    monkeypatch.setenv('POLL_JITTER', '0')
+    stores = []
+
+    def make(node_id):
+        checker = StockChecker(check_interval=0.1, max_concurrency=2)
+        checker.notifier = FakeNotifier()
+        checker.checked = []
+        checker.check_stock = lambda url=None, site_name=None: (
+            checker.checked.append(url) or (True, "Test Product Name", site_name))
+        store = ClusterStore(str(tmp_path / "cluster.db"))
+        stores.append(store)
+        return checker, ClusterNode(store, node_id, heartbeat_interval=0.1, node_ttl=0.3, shard_by='host')
+
+    yield make
+    for store in stores:
+        store.close()
+
+def run_nodes(nodes, seconds):
+    deadline = time.monotonic() + seconds
+    threads = [
+        threading.Thread(target=checker.run_monitor_loop, args=(URLS, "test@example.com"),
+                         kwargs={'should_stop': lambda: time.monotonic() >= deadline, 'cluster': cluster})
+        for checker, cluster in nodes
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+def test_nodes_share_urls_and_notify_once(make_node):
+    """Test that two nodes check disjoint URLs and the leader sends every alert once"""
+    (checker_a, cluster_a), (checker_b, cluster_b) = nodes = [make_node("node-a"), make_node("node-b")]
+    # Both nodes are registered before either starts checking
+    cluster_a.join()
+    cluster_b.join()
+    run_nodes(nodes, 1.0)
+
+    checked_a, checked_b = set(checker_a.checked), set(checker_b.checked)
+    assert checked_a and checked_b
+    assert checked_a | checked_b == {entry['url'] for entry in URLS}
+    assert not checked_a & checked_b
+    assert sorted(checker_a.notifier.sent) == sorted(entry['site_name'] for entry in URLS)
+    assert checker_b.notifier.sent == []
+
+def test_surviving_node_takes_over(make_node):
+    """Test that a node picks up the URLs of a node that stopped"""
+    checker_a, cluster_a = make_node("node-a")
+    checker_b, cluster_b = make_node("node-b")
+    cluster_b.join()
+
+    run_nodes([(checker_a, cluster_a)], 1.0)
+
+    assert set(checker_a.checked) == {entry['url'] for entry in URLS}
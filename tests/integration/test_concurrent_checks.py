@@ -0,0 +1,85 @@
+import time
+import pytest
+from stock_checker import StockChecker
+
+URLS = [
+    {'url': f"https://teststore{i}.com/products/test-product", 'site_name': f"TestStore{i}"}
+    for i in range(8)
+]
+
+def make_slow_check(delays):
+    """Build a check_stock replacement that sleeps for a per-URL delay"""
+    def slow_check(url=None, site_name=None):
+        time.sleep(delays[url])
+        return True, "Test Product Name", site_name
+    return slow_check
+
+def test_sweep_time_close_to_slowest_request(monkeypatch):
+    """Test that a concurrent sweep takes about as long as the slowest check"""
+    checker = StockChecker(check_interval=1, max_concurrency=len(URLS))
+    monkeypatch.setattr(checker, 'check_stock', make_slow_check({e['url']: 0.2 for e in URLS}))
+    monkeypatch.setattr(checker, 'report_stock_status', lambda result, email=None: None)
+
+    start = time.monotonic()
+    reported = checker.run_sweep(URLS)
+    elapsed = time.monotonic() - start
+
+    assert reported == len(URLS)
+    assert elapsed < 0.2 * len(URLS) / 2
+
+def test_results_reported_as_completed(monkeypatch):
+    """Test that faster checks are reported before slower ones"""
+    checker = StockChecker(check_interval=1, max_concurrency=len(URLS))
+    delays = {e['url']: 0.05 * (len(URLS) - i) for i, e in enumerate(URLS)}
+    monkeypatch.setattr(checker, 'check_stock', make_slow_check(delays))
+    monkeypatch.setattr(checker, 'report_stock_status', lambda result, email=None: None)
+    order = []
+
+    checker.run_sweep(URLS, on_result=lambda entry, result: order.append(entry['site_name']))
+    assert order == [e['site_name'] for e in reversed(URLS)]
+
+def test_sweep_checks_each_url_once(monkeypatch):
+    """Test that a sweep runs the monitor loop for a single pass, whatever the poll interval"""
+    monkeypatch.setenv('POLL_MIN_INTERVAL', '0.01')
+    checker = StockChecker(check_interval=0.01, max_concurrency=2)
+    checked = []
+    monkeypatch.setattr(checker, 'check_stock', lambda url=None, site_name=None: checked.append(url) or
+                        time.sleep(0.05) or (False, "Test Product Name", site_name))
+    monkeypatch.setattr(checker, 'report_stock_status', lambda result, email=None: None)
+
+    assert checker.run_sweep(URLS) == len(URLS)
+    assert sorted(checked) == sorted(e['url'] for e in URLS)
+
+def test_concurrency_limit_respected(monkeypatch):
+    """Test that no more than max_concurrency checks run at once"""
+    checker = StockChecker(check_interval=1, max_concurrency=3)
+    in_flight = 0
+    peak = 0
+
+    def counting_check(url=None, site_name=None):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        time.sleep(0.05)
+        in_flight -= 1
+        return False, "Test Product Name", site_name
+
+    monkeypatch.setattr(checker, 'check_stock', counting_check)
+    monkeypatch.setattr(checker, 'report_stock_status', lambda result, email=None: None)
+
+    assert checker.run_sweep(URLS) == len(URLS)
+    assert peak <= 3
+
+def test_failed_check_does_not_stop_sweep(monkeypatch):
+    """Test that an exception in one check is logged and the rest still complete"""
+    checker = StockChecker(check_interval=1, max_concurrency=4)
+
+    def flaky_check(url=None, site_name=None):
+        if site_name == "TestStore0":
+            raise RuntimeError("boom")
+        return False, "Test Product Name", site_name
+
+    monkeypatch.setattr(checker, 'check_stock', flaky_check)
+    monkeypatch.setattr(checker, 'report_stock_status', lambda result, email=None: None)
+
+    assert checker.run_sweep(URLS) == len(URLS) - 1
@@ -0,0 +1,64 @@
+import pytest
+import responses
+from tests.test_data.mock_html_responses import MOCK_IN_STOCK_HTML, MOCK_OUT_OF_STOCK_HTML
+
+TEST_URL = "https://teststore1.com/products/test-product-1"
+
+@pytest.fixture
+def count_parses(sample_stock_checker, monkeypatch):
+    """Count how often the checker parses HTML"""
+    calls = []
+    original = sample_stock_checker.analyze_stock_page
+
+    def counting_parse(html_content, site_name):
+        calls.append(site_name)
+        return original(html_content, site_name)
+
+    monkeypatch.setattr(sample_stock_checker, 'analyze_stock_page', counting_parse)
+    return calls
+
+@responses.activate
+def test_not_modified_reuses_last_result(sample_stock_checker, count_parses):
+    """Test that a 304 response returns the cached result without parsing"""
+    responses.add(responses.GET, TEST_URL, body=MOCK_IN_STOCK_HTML, status=200,
+                  headers={'ETag': '"v1"', 'Last-Modified': 'Tue, 01 Oct 2024 10:00:00 GMT'})
+    responses.add(responses.GET, TEST_URL, status=304)
+
+    first = sample_stock_checker.check_stock(TEST_URL, "TestStore1")
+    second = sample_stock_checker.check_stock(TEST_URL, "TestStore1")
+
+    assert first == second == (True, "Test Product Name", "TestStore1")
+    assert len(count_parses) == 1
+    assert responses.calls[1].request.headers['If-None-Match'] == '"v1"'
+    assert responses.calls[1].request.headers['If-Modified-Since'] == 'Tue, 01 Oct 2024 10:00:00 GMT'
+
+@responses.activate
+def test_unchanged_body_skips_parse_without_validators(sample_stock_checker, count_parses):
+    """Test that the content hash is used when the server sends no validators"""
+    responses.add(responses.GET, TEST_URL, body=MOCK_IN_STOCK_HTML, status=200)
+    responses.add(responses.GET, TEST_URL, body=MOCK_IN_STOCK_HTML, status=200)
+
+    sample_stock_checker.check_stock(TEST_URL, "TestStore1")
+    result = sample_stock_checker.check_stock(TEST_URL, "TestStore1")
+
+    assert result == (True, "Test Product Name", "TestStore1")
+    assert len(count_parses) == 1
+    assert 'If-None-Match' not in responses.calls[1].request.headers
+
+@responses.activate
+def test_changed_body_is_parsed_again(sample_stock_checker, count_parses):
+    """Test that a changed page is parsed and replaces the cached result"""
+    responses.add(responses.GET, TEST_URL, body=MOCK_IN_STOCK_HTML, status=200)
+    responses.add(responses.GET, TEST_URL, body=MOCK_OUT_OF_STOCK_HTML, status=200)
+
+    assert sample_stock_checker.check_stock(TEST_URL, "TestStore1")[0] is True
+    assert sample_stock_checker.check_stock(TEST_URL, "TestStore1")[0] is False
+    assert len(count_parses) == 2
+
+@responses.activate
+def test_failed_request_returns_empty_result(sample_stock_checker):
+    """Test that a failed request is not cached and returns no status"""
+    responses.add(responses.GET, TEST_URL, status=404)
+
+    assert sample_stock_checker.check_stock(TEST_URL, "TestStore1") == (None, None, None)
+    assert TEST_URL not in sample_stock_checker.page_cache
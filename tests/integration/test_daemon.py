@@ -0,0 +1,105 @@
+import signal
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import pytest
+from tests.test_data.mock_html_responses import MOCK_IN_STOCK_HTML
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+class SlowProductPage(BaseHTTPRequestHandler):
+    """Serves an in-stock product page after a short delay"""
+
+    def do_GET(self):
+        self.server.started += 1
+        time.sleep(0.5)
+        body = MOCK_IN_STOCK_HTML.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.finished += 1
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def storefront():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowProductPage)
+    server.started = 0
+    server.finished = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def test_daemon_does_not_import_interactive_modules():
+    """Test that the daemon starts without keyboard or the CLI menus"""
+    code = "import sys, daemon; print('keyboard' in sys.modules or 'cli' in sys.modules)"
+    output = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == "False"
+
+def test_sigterm_drains_in_flight_checks(storefront, tmp_path):
+    """Test that SIGTERM lets the running check finish and flushes state before exiting"""
+    links = tmp_path / "links"
+    links.mkdir()
+    url = f"http://127.0.0.1:{storefront.server_address[1]}/products/test-product"
+    (links / "products.csv").write_text(f"key,site_name,url\nelite_trainer_box,LocalStore,{url}\n")
+    state_db = tmp_path / "state.db"
+
+    env = {
+        'PATH': "", 'PYTHONPATH': str(REPO_ROOT), 'STATE_DB': str(state_db),
+        'FETCH_MODE': "requests", 'HTTP_MAX_RETRIES': "0", 'POLL_MIN_INTERVAL': "0.2", 'POLL_JITTER': "0",
+    }
+    process = subprocess.Popen(
+        [sys.executable, str(REPO_ROOT / "daemon.py"), "--links-directory", str(links),
+         "--keys", "elite_trainer_box", "--check-interval", "0.2", "--max-interval", "0.2"],
+        cwd=tmp_path, env=env, stderr=subprocess.PIPE, text=True
+    )
+    try:
+        deadline = time.monotonic() + 15
+        while storefront.started < 2 and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert storefront.started >= 2
+
+        # Signal while a request is being served
+        while storefront.started == storefront.finished:
+            time.sleep(0.01)
+        process.send_signal(signal.SIGTERM)
+        _, stderr = process.communicate(timeout=15)
+    finally:
+        process.kill()
+
+    assert process.returncode == 0, stderr
+    assert "Monitoring stopped" in stderr
+    assert storefront.started == storefront.finished
+    row = sqlite3.connect(state_db).execute("SELECT is_in_stock FROM stock_state").fetchone()
+    assert row == (1,)
+
+def test_once_checks_every_url_and_exits(storefront, tmp_path):
+    """Test that --once runs a single sweep, records it and exits"""
+    links = tmp_path / "links"
+    links.mkdir()
+    base = f"http://127.0.0.1:{storefront.server_address[1]}/products"
+    (links / "products.csv").write_text(
+        f"key,site_name,url\nelite_trainer_box,LocalStore,{base}/etb\nelite_trainer_box,LocalStore,{base}/bundle\n"
+    )
+    state_db = tmp_path / "state.db"
+    env = {'PATH': "", 'PYTHONPATH': str(REPO_ROOT), 'STATE_DB': str(state_db),
+           'FETCH_MODE': "requests", 'HTTP_MAX_RETRIES': "0"}
+
+    process = subprocess.run(
+        [sys.executable, str(REPO_ROOT / "daemon.py"), "--links-directory", str(links), "--once"],
+        cwd=tmp_path, env=env, capture_output=True, text=True, timeout=30
+    )
+
+    assert process.returncode == 0, process.stderr
+    assert "Checked 2 of 2 URLs" in process.stderr
+    assert storefront.finished == 2
+    assert sqlite3.connect(state_db).execute("SELECT COUNT(*) FROM stock_state").fetchone() == (2,)
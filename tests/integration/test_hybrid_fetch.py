@@ -0,0 +1,77 @@
+import pytest
+import requests
+import responses
+from tests.test_data.mock_html_responses import MOCK_IN_STOCK_HTML, MOCK_OUT_OF_STOCK_HTML
+
+STATIC_URL = "https://teststore1.com/products/test-product-1"
+RENDERED_URL = "https://teststore2.com/products/test-product-1"
+APP_SHELL_HTML = "<html><body><div id='app'></div><script src='/app.js'></script></body></html>"
+
+@pytest.fixture
+def selenium_calls(sample_stock_checker, monkeypatch):
+    """Replace Selenium rendering with a stub that records the URLs it renders"""
+    calls = []
+
+    def fake_render(url):
+        calls.append(url)
+        return MOCK_IN_STOCK_HTML
+
+    monkeypatch.setattr(sample_stock_checker, 'get_html_with_selenium', fake_render)
+    return calls
+
+@responses.activate
+def test_static_site_never_uses_selenium(sample_stock_checker, selenium_calls):
+    """Test that a site with usable static HTML is checked with requests only"""
+    responses.add(responses.GET, STATIC_URL, body=MOCK_OUT_OF_STOCK_HTML, status=200)
+
+    for _ in range(2):
+        result = sample_stock_checker.check_stock_auto(STATIC_URL, "TestStore1")
+        assert result == (False, "Test Product Name", "TestStore1")
+
+    assert selenium_calls == []
+    assert sample_stock_checker.site_fetch_methods["TestStore1"] == 'requests'
+
+@responses.activate
+def test_escalates_and_remembers_selenium(sample_stock_checker, selenium_calls):
+    """Test that an app-shell page escalates to Selenium and later checks skip requests"""
+    responses.add(responses.GET, RENDERED_URL, body=APP_SHELL_HTML, status=200)
+
+    first = sample_stock_checker.check_stock_auto(RENDERED_URL, "TestStore2")
+    second = sample_stock_checker.check_stock_auto(RENDERED_URL, "TestStore2")
+
+    assert first == second == (True, "Test Product Name", "TestStore2")
+    assert selenium_calls == [RENDERED_URL, RENDERED_URL]
+    assert len(responses.calls) == 1
+    assert sample_stock_checker.site_fetch_methods["TestStore2"] == 'selenium'
+
+@responses.activate
+def test_unusable_everywhere_keeps_static_result(sample_stock_checker, monkeypatch):
+    """Test that a site is not switched to Selenium if rendering does not help"""
+    responses.add(responses.GET, RENDERED_URL, body=APP_SHELL_HTML, status=200)
+    monkeypatch.setattr(sample_stock_checker, 'get_html_with_selenium', lambda url: APP_SHELL_HTML)
+
+    result = sample_stock_checker.check_stock_auto(RENDERED_URL, "TestStore2")
+
+    assert result == (False, "Product", "TestStore2")
+    assert "TestStore2" not in sample_stock_checker.site_fetch_methods
+
+@responses.activate
+def test_fetch_error_does_not_escalate(sample_stock_checker, selenium_calls):
+    """Test that a failed fetch neither renders with Selenium nor switches the site to it"""
+    responses.add(responses.GET, STATIC_URL, body=MOCK_OUT_OF_STOCK_HTML, status=200)
+    sample_stock_checker.check_stock_auto(STATIC_URL, "TestStore1")
+    responses.replace(responses.GET, STATIC_URL, body=requests.exceptions.ConnectTimeout())
+
+    result = sample_stock_checker.check_stock_auto(STATIC_URL, "TestStore1")
+
+    assert result[0] is None
+    assert selenium_calls == []
+    assert sample_stock_checker.site_fetch_methods["TestStore1"] == 'requests'
+
+def test_get_check_method(sample_stock_checker):
+    """Test that fetch modes map to check methods"""
+    assert sample_stock_checker.get_check_method() == sample_stock_checker.check_stock
+    assert sample_stock_checker.get_check_method(fetch_mode='auto') == sample_stock_checker.check_stock_auto
+    assert sample_stock_checker.get_check_method(use_selenium=True) == sample_stock_checker.check_stock_with_selenium
+    with pytest.raises(ValueError):
+        sample_stock_checker.get_check_method(fetch_mode='carrier-pigeon')
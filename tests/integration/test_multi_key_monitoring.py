@@ -0,0 +1,63 @@
+import threading
+import time
+import pytest
+from link_catalog import LinkCatalog
+from stock_checker import StockChecker
+
+SHARED = "https://teststore1.com/products/shared"
+
+@pytest.fixture
+def links_dir(tmp_path):
+    (tmp_path / "cards.csv").write_text(
+        "key,site_name,url\n"
+        f"elite_trainer_box,TestStore1,{SHARED}\n"
+        "elite_trainer_box,TestStore2,https://teststore2.com/products/etb\n"
+        f"booster_bundle,TestStore1,{SHARED}\n"
+    )
+    (tmp_path / "extra.csv").write_text(
+        "key,site_name,url\n"
+        f"collection_box,TestStore1,{SHARED}\n"
+        "collection_box,TestStore3,https://teststore3.com/products/cb\n"
+    )
+    return tmp_path
+
+def test_shared_url_checked_once_per_sweep(links_dir, monkeypatch):
+    """Test that a URL under several keys and files is fetched once and reported to all keys"""
+    checker = StockChecker(check_interval=1, links_directory=links_dir, catalog=LinkCatalog(links_dir))
+    checked = []
+    lock = threading.Lock()
+
+    def fake_check(url=None, site_name=None):
+        with lock:
+            checked.append(url)
+        return url == SHARED, "Test Product Name", site_name
+
+    monkeypatch.setattr(checker, 'check_stock', fake_check)
+    monkeypatch.setattr(checker, 'report_stock_status', lambda result, email=None: None)
+
+    urls = checker.watch_links().get_urls()
+    assert checker.run_sweep(urls) == 3
+    assert sorted(checked) == sorted([SHARED, "https://teststore2.com/products/etb", "https://teststore3.com/products/cb"])
+
+    status = checker.get_key_status()
+    assert set(status) == {"booster_bundle", "collection_box", "elite_trainer_box"}
+    assert status["elite_trainer_box"] == {'checked': 2, 'in_stock': ["TestStore1"]}
+    assert status["booster_bundle"] == {'checked': 1, 'in_stock': ["TestStore1"]}
+
+def test_selected_keys_monitored_together(links_dir, monkeypatch):
+    """Test that the monitor loop polls the union of the selected keys"""
+    monkeypatch.setenv('POLL_MIN_INTERVAL', '0.1')
+    monkeypatch.setenv('POLL_MAX_INTERVAL', '0.1')
+    monkeypatch.setenv('POLL_JITTER', '0')
+    checker = StockChecker(check_interval=0.1, max_concurrency=2, links_directory=links_dir)
+    checked = []
+    monkeypatch.setattr(checker, 'check_stock',
+                        lambda url=None, site_name=None: checked.append(url) or (False, "Test Product Name", site_name))
+    monkeypatch.setattr(checker, 'report_stock_status', lambda result, email=None: None)
+
+    watcher = checker.watch_links(keys=["booster_bundle", "collection_box"])
+    deadline = time.monotonic() + 0.35
+    checker.run_monitor_loop(watcher.get_urls(), should_stop=lambda: time.monotonic() >= deadline, watcher=watcher)
+
+    assert set(checked) == {SHARED, "https://teststore3.com/products/cb"}
+    assert checked.count(SHARED) <= 4
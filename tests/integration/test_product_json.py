@@ -0,0 +1,93 @@
+import pytest
+import responses
+from stock_checker import StockChecker
+from tests.test_data.mock_html_responses import MOCK_OUT_OF_STOCK_HTML
+
+PRODUCT_URL = "https://teststore1.com/products/test-product-1"
+PRODUCT_JSON_URL = "https://teststore1.com/products/test-product-1.js"
+
+PRODUCT_JSON = {
+    "id": 1,
+    "title": "Test Product Name",
+    "available": True,
+    "variants": [
+        {"id": 11, "title": "Default", "available": False},
+        {"id": 12, "title": "Bundle", "available": True},
+    ],
+}
+
+@pytest.fixture
+def json_checker(monkeypatch):
+    """StockChecker with the product JSON strategy enabled for TestStore1"""
+    monkeypatch.setenv('PRODUCT_JSON_SITES', 'TestStore1')
+    return StockChecker(check_interval=1)
+
+@pytest.mark.parametrize("url,expected", [
+    ("https://teststore1.com/products/test-product-1", "https://teststore1.com/products/test-product-1.js"),
+    ("https://teststore1.com/collections/all/products/box/?variant=12", "https://teststore1.com/collections/all/products/box.js"),
+    ("https://teststore1.com/pages/about", None),
+])
+def test_get_product_json_url(url, expected):
+    """Test building the product JSON URL from a product page URL"""
+    assert StockChecker.get_product_json_url(url) == expected
+
+@responses.activate
+def test_reads_availability_from_json(json_checker):
+    """Test that stock status comes from the JSON endpoint without fetching the page"""
+    responses.add(responses.GET, PRODUCT_JSON_URL, json=PRODUCT_JSON, status=200)
+
+    result = json_checker.check_stock(PRODUCT_URL, "TestStore1")
+
+    assert result == (True, "Test Product Name", "TestStore1")
+    assert [call.request.url for call in responses.calls] == [PRODUCT_JSON_URL]
+
+@responses.activate
+def test_variant_query_checks_that_variant(json_checker):
+    """Test that a ?variant= URL only looks at that variant"""
+    responses.add(responses.GET, PRODUCT_JSON_URL, json=PRODUCT_JSON, status=200)
+
+    result = json_checker.check_stock(f"{PRODUCT_URL}?variant=11", "TestStore1")
+    assert result == (False, "Test Product Name", "TestStore1")
+
+@responses.activate
+def test_missing_endpoint_falls_back_to_html(json_checker):
+    """Test that a 404 falls back to the page and is not retried on later checks"""
+    responses.add(responses.GET, PRODUCT_JSON_URL, status=404)
+    responses.add(responses.GET, PRODUCT_URL, body=MOCK_OUT_OF_STOCK_HTML, status=200)
+
+    assert json_checker.check_stock(PRODUCT_URL, "TestStore1") == (False, "Test Product Name", "TestStore1")
+    json_checker.check_stock(PRODUCT_URL, "TestStore1")
+
+    urls = [call.request.url for call in responses.calls]
+    assert urls.count(PRODUCT_JSON_URL) == 1
+    assert "TestStore1" in json_checker.product_json_unsupported
+
+@pytest.mark.parametrize("status", [429, 503, 403])
+@responses.activate
+def test_transient_error_falls_back_for_one_check(monkeypatch, status):
+    """Test that a throttled or failing endpoint is used again on the next check"""
+    monkeypatch.setenv('PRODUCT_JSON_SITES', 'TestStore1')
+    monkeypatch.setenv('HTTP_MAX_RETRIES', '0')
+    monkeypatch.setenv('HOST_RATE_LIMIT', '1000')
+    json_checker = StockChecker(check_interval=1)
+    responses.add(responses.GET, PRODUCT_JSON_URL, status=status, headers={'Retry-After': '0'})
+    responses.add(responses.GET, PRODUCT_URL, body=MOCK_OUT_OF_STOCK_HTML, status=200)
+
+    assert json_checker.check_stock(PRODUCT_URL, "TestStore1") == (False, "Test Product Name", "TestStore1")
+    assert "TestStore1" not in json_checker.product_json_unsupported
+
+    responses.replace(responses.GET, PRODUCT_JSON_URL, json=PRODUCT_JSON, status=200)
+    assert json_checker.check_stock(PRODUCT_URL, "TestStore1") == (True, "Test Product Name", "TestStore1")
+
+@responses.activate
+def test_sites_not_listed_use_html(sample_stock_checker):
+    """Test that the JSON endpoint is only used for configured sites"""
+    responses.add(responses.GET, PRODUCT_URL, body=MOCK_OUT_OF_STOCK_HTML, status=200)
+
+    sample_stock_checker.check_stock(PRODUCT_URL, "TestStore1")
+    assert [call.request.url for call in responses.calls] == [PRODUCT_URL]
+
+def test_json_without_availability_is_unusable():
+    """Test that the .json format without availability fields is rejected"""
+    document = {"product": {"title": "Test Product Name", "variants": [{"id": 11, "price": "49.99"}]}}
+    assert StockChecker.parse_product_json(document) is None
@@ -0,0 +1,118 @@
+import threading
+import time
+import pytest
+from stock_checker import StockChecker
+
+FAST = {'url': "https://teststore1.com/products/test-product-1", 'site_name': "TestStore1"}
+SLOW = {'url': "https://teststore2.com/products/test-product-1", 'site_name': "TestStore2"}
+
+@pytest.fixture
+def fast_checker(monkeypatch):
+    """StockChecker polling every 0.1s with no jitter or backoff"""
+    monkeypatch.setenv('POLL_MIN_INTERVAL', '0.1')
+    monkeypatch.setenv('POLL_MAX_INTERVAL', '0.1')
+    monkeypatch.setenv('POLL_JITTER', '0')
+    checker = StockChecker(check_interval=0.1, max_concurrency=2)
+    monkeypatch.setattr(checker, 'report_stock_status', lambda result, email=None: None)
+    return checker
+
+def run_for(checker, urls, seconds):
+    deadline = time.monotonic() + seconds
+    checker.run_monitor_loop(urls, should_stop=lambda: time.monotonic() >= deadline)
+
+def test_slow_url_does_not_delay_others(fast_checker, monkeypatch):
+    """Test that a slow check only holds up its own worker"""
+    checks = {FAST['url']: 0, SLOW['url']: 0}
+    lock = threading.Lock()
+
+    def fake_check(url=None, site_name=None):
+        if url == SLOW['url']:
+            time.sleep(0.8)
+        with lock:
+            checks[url] += 1
+        return False, "Test Product Name", site_name
+
+    monkeypatch.setattr(fast_checker, 'check_stock', fake_check)
+    run_for(fast_checker, [SLOW, FAST], 1.0)
+
+    # The fast URL keeps its ~0.1s period while the slow check runs
+    assert checks[FAST['url']] >= 7
+    assert 1 <= checks[SLOW['url']] <= 2
+
+def test_period_not_stretched_by_check_time(fast_checker, monkeypatch):
+    """Test that the polling period counts from dispatch, not completion"""
+    starts = []
+
+    def fake_check(url=None, site_name=None):
+        starts.append(time.monotonic())
+        time.sleep(0.05)
+        return False, "Test Product Name", site_name
+
+    monkeypatch.setattr(fast_checker, 'check_stock', fake_check)
+    run_for(fast_checker, [FAST], 1.0)
+
+    periods = [later - earlier for earlier, later in zip(starts, starts[1:])]
+    assert sum(periods) / len(periods) < 0.13
+
+def test_drift_exposed(fast_checker, monkeypatch):
+    """Test that schedule drift is measured per dispatch"""
+    monkeypatch.setattr(fast_checker, 'check_stock', lambda url=None, site_name=None: (False, "Test Product Name", site_name))
+    assert fast_checker.get_schedule_drift()['count'] == 0
+
+    run_for(fast_checker, [FAST, SLOW], 0.5)
+
+    drift = fast_checker.get_schedule_drift()
+    assert drift['count'] >= 4
+    assert 0 <= drift['p50'] <= drift['max'] < 0.5
+
+def test_csv_changes_applied_while_running(fast_checker, monkeypatch, tmp_path):
+    """Test that rows added to or removed from the CSV are picked up without a restart"""
+    from link_catalog import LinkCatalog
+    csv_path = tmp_path / "links.csv"
+    csv_path.write_text(f"key,site_name,url\netb,{FAST['site_name']},{FAST['url']}\n")
+    fast_checker.catalog = LinkCatalog(tmp_path)
+    fast_checker.links_reload_interval = 0
+    watcher = fast_checker.watch_links("links.csv", ["etb"])
+
+    checked = []
+    monkeypatch.setattr(fast_checker, 'check_stock',
+                        lambda url=None, site_name=None: checked.append(url) or (False, "Test Product Name", site_name))
+
+    def edit_csv():
+        time.sleep(0.3)
+        csv_path.write_text(f"key,site_name,url\netb,{SLOW['site_name']},{SLOW['url']}\n")
+
+    editor = threading.Thread(target=edit_csv)
+    editor.start()
+    deadline = time.monotonic() + 0.8
+    fast_checker.run_monitor_loop(
+        fast_checker.get_url_list("links.csv", "etb"),
+        should_stop=lambda: time.monotonic() >= deadline,
+        watcher=watcher
+    )
+    editor.join()
+
+    switch = checked.index(SLOW['url'])
+    assert switch > 0
+    assert FAST['url'] not in checked[switch + 1:]
+    assert fast_checker.scheduler.get_intervals().keys() == {SLOW['url']}
+
+def test_saturated_workers_do_not_spin(monkeypatch):
+    """Test that the dispatcher sleeps while every worker is busy and URLs are due"""
+    monkeypatch.setenv('POLL_MIN_INTERVAL', '0.1')
+    monkeypatch.setenv('POLL_MAX_INTERVAL', '0.1')
+    monkeypatch.setenv('POLL_JITTER', '0')
+    checker = StockChecker(check_interval=0.1, max_concurrency=1)
+    monkeypatch.setattr(checker, 'report_stock_status', lambda result, email=None: None)
+    urls = [{'url': f"https://teststore{i}.com/products/test-product-1", 'site_name': f"TestStore{i}"}
+            for i in range(4)]
+    monkeypatch.setattr(checker, 'check_stock',
+                        lambda url=None, site_name=None: time.sleep(0.5) or (False, "Test Product Name", site_name))
+    iterations = []
+    flush_state = checker.flush_state
+    monkeypatch.setattr(checker, 'flush_state', lambda force=False: iterations.append(force) or flush_state(force))
+
+    run_for(checker, urls, 1.5)
+
+    # One pass per finished check or 0.5s tick, not a busy loop
+    assert len(iterations) < 20
@@ -0,0 +1,38 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+def loaded_modules(code):
+    """Run code in a fresh interpreter and return the names in sys.modules afterwards"""
+    script = f"{code}\nimport json, sys\nprint(json.dumps(sorted(sys.modules)))"
+    output = subprocess.run([sys.executable, "-c", script], cwd=REPO_ROOT, capture_output=True, text=True, check=True)
+    return set(json.loads(output.stdout))
+
+@pytest.mark.parametrize("module", ["stock_checker", "daemon", "cli"])
+def test_heavy_subsystems_not_imported_at_startup(module):
+    """Test that Selenium, BeautifulSoup, SMTP and keyboard are not loaded by importing an entry point"""
+    modules = loaded_modules(f"import {module}")
+    for heavy in ("selenium", "bs4", "smtplib", "email.mime", "keyboard"):
+        assert heavy not in modules
+
+def test_checker_construction_does_not_import_heavy_subsystems(tmp_path):
+    """Test that creating a checker and reading a page with the fast parser stays light"""
+    code = (
+        f"import os; os.environ['LOG_FILE'] = {str(tmp_path / 'checker.log')!r}\n"
+        "from stock_checker import StockChecker\n"
+        "from tests.test_data.mock_html_responses import MOCK_IN_STOCK_HTML\n"
+        f"checker = StockChecker(check_interval=1, links_directory={str(tmp_path)!r})\n"
+        "assert checker.parse_stock_status(MOCK_IN_STOCK_HTML, 'TestStore')[0] is True\n"
+    )
+    modules = loaded_modules(code)
+    assert "bs4" not in modules and "selenium" not in modules
+
+def test_soup_fallback_imports_bs4_on_first_use(sample_stock_checker):
+    """Test that the BeautifulSoup fallback still works with the lazy import"""
+    sample_stock_checker.use_fast_parser = False
+    result = sample_stock_checker.parse_stock_status("<h1>Name</h1><button type='submit'>Add to cart</button>", "TestStore")
+    assert result == (True, "Name", "TestStore")
@@ -0,0 +1,78 @@
+import pytest
+from cluster import ClusterNode, ClusterStore, HashRing
+
+URLS = [{'url': f"https://teststore{i % 10}.com/products/test-product-{i}", 'site_name': f"TestStore{i % 10}"}
+        for i in range(200)]
+
+@pytest.fixture
+def store(tmp_path):
+    store = ClusterStore(str(tmp_path / "cluster.db"))
+    yield store
+    store.close()
+
+def make_nodes(store, *node_ids, shard_by='url', now=1000.0):
+    nodes = [ClusterNode(store, node_id, heartbeat_interval=5, node_ttl=15, shard_by=shard_by) for node_id in node_ids]
+    for node in nodes:
+        node.join(now)
+    for node in nodes:
+        node.refresh(now, force=True)
+    return nodes
+
+def test_ring_moves_few_keys_when_node_added():
+    """Test that adding a node only moves keys to the new node"""
+    keys = [entry['url'] for entry in URLS]
+    before = HashRing(["node-a", "node-b", "node-c"])
+    after = HashRing(["node-a", "node-b", "node-c", "node-d"])
+
+    moved = [key for key in keys if before.owner(key) != after.owner(key)]
+    assert all(after.owner(key) == "node-d" for key in moved)
+    assert 0 < len(moved) < len(keys) / 2
+
+def test_nodes_split_urls_without_overlap(store):
+    """Test that every URL is owned by exactly one node"""
+    node_a, node_b = make_nodes(store, "node-a", "node-b")
+    owned_a, owned_b = node_a.assign(URLS), node_b.assign(URLS)
+
+    assert owned_a and owned_b
+    assert len(owned_a) + len(owned_b) == len(URLS)
+    assert not {entry['url'] for entry in owned_a} & {entry['url'] for entry in owned_b}
+
+def test_host_sharding_keeps_store_on_one_node(store):
+    """Test that sharding by host gives all URLs of a store to one node"""
+    node_a, node_b = make_nodes(store, "node-a", "node-b", shard_by='host')
+    for owned in (node_a.assign(URLS), node_b.assign(URLS)):
+        for entry in owned:
+            assert all(other in owned for other in URLS if other['site_name'] == entry['site_name'])
+
+def test_dead_node_urls_taken_over(store):
+    """Test that a node that stops heartbeating loses its URLs after the TTL"""
+    node_a, node_b = make_nodes(store, "node-a", "node-b")
+
+    assert node_a.refresh(1010.0) is False
+    assert len(node_a.assign(URLS)) < len(URLS)
+    assert node_a.refresh(1020.0) is True
+    assert node_a.assign(URLS) == URLS
+
+def test_left_node_urls_taken_over_at_next_heartbeat(store):
+    """Test that a node leaving hands its URLs over without waiting for the TTL"""
+    node_a, node_b = make_nodes(store, "node-a", "node-b")
+    node_b.leave()
+
+    assert node_a.refresh(1005.0) is True
+    assert node_a.assign(URLS) == URLS
+
+def test_alerts_sent_once_by_leader(store):
+    """Test that alerts from every node are taken once, by the leader only"""
+    node_a, node_b = make_nodes(store, "node-a", "node-b")
+    node_a.publish_alert("test@example.com", "Product A", URLS[0]['url'], URLS[0]['site_name'])
+    node_b.publish_alert("test@example.com", "Product B", URLS[1]['url'], URLS[1]['site_name'])
+
+    assert node_a.is_leader() and not node_b.is_leader()
+    assert node_b.take_alerts() == []
+    assert [alert['product_name'] for alert in node_a.take_alerts()] == ["Product A", "Product B"]
+    assert node_a.take_alerts() == []
+
+def test_unknown_shard_key_rejected(store):
+    """Test that an unknown shard key is rejected"""
+    with pytest.raises(ValueError):
+        ClusterNode(store, "node-a", shard_by='sku')
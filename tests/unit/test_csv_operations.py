@@ -56,4 +56,64 @@ product_type_3,TestStore3,https://teststore3.com/products/test-product-3"""
     
     test_csv = tmp_path / "test_urls.csv"
     test_csv.write_text(csv_content)
-    return test_csv
\ No newline at end of file
+    return test_csv
+
+
+@pytest.fixture
+def links_checker(tmp_path, create_test_csv):
+    from stock_checker import StockChecker
+    return StockChecker(check_interval=1, links_directory=tmp_path)
+
+def test_update_url_keeps_other_columns(links_checker, tmp_path):
+    """Test that updating a key changes only the url column of its rows"""
+    assert links_checker.update_url("test_urls.csv", "product_type_2", "https://new.example/p2")
+
+    lines = (tmp_path / "test_urls.csv").read_text().splitlines()
+    assert lines[0] == "key,site_name,url"
+    assert "product_type_2,TestStore1,https://new.example/p2" in lines
+    assert "product_type_2,TestStore2,https://new.example/p2" in lines
+    assert len(lines) == 8
+
+def test_update_url_missing_key(links_checker):
+    """Test that updating an unknown key reports failure"""
+    assert links_checker.update_url("test_urls.csv", "nonexistent", "https://new.example") is False
+
+def test_update_urls_bulk_report(links_checker, tmp_path):
+    """Test applying several updates in one pass and the change report"""
+    before = (tmp_path / "test_urls.csv").stat().st_ino
+    report = links_checker.update_urls("test_urls.csv", {
+        ('product_type_1', 'TestStore2'): "https://new.example/p1-store2",
+        'product_type_3': "https://new.example/p3",
+        'product_type_2': "https://teststore1.com/products/test-product-2",
+        'nonexistent': "https://new.example/none",
+    })
+
+    assert report['matched'] == 5
+    assert report['missing'] == ['nonexistent']
+    assert {(c['key'], c['site_name'], c['new_url']) for c in report['changed']} == {
+        ('product_type_1', 'TestStore2', "https://new.example/p1-store2"),
+        ('product_type_3', 'TestStore1', "https://new.example/p3"),
+        ('product_type_3', 'TestStore3', "https://new.example/p3"),
+        ('product_type_2', 'TestStore2', "https://teststore1.com/products/test-product-2"),
+    }
+    # Written once, by replacing the file
+    assert (tmp_path / "test_urls.csv").stat().st_ino != before
+    assert list(tmp_path.glob("*.tmp")) == []
+
+    urls = links_checker.get_url_list("test_urls.csv", "product_type_1")
+    assert [entry['url'] for entry in urls] == [
+        "https://teststore1.com/products/test-product-1",
+        "https://new.example/p1-store2",
+        "https://teststore3.com/products/test-product-1",
+    ]
+
+def test_update_urls_without_changes_leaves_file(links_checker, tmp_path):
+    """Test that the file is not rewritten when no URL changes"""
+    before = (tmp_path / "test_urls.csv").stat()
+    report = links_checker.update_urls("test_urls.csv", {
+        ('product_type_3', 'TestStore1'): "https://teststore1.com/products/test-product-3"
+    })
+
+    assert report == {'changed': [], 'matched': 1, 'missing': []}
+    after = (tmp_path / "test_urls.csv").stat()
+    assert (before.st_ino, before.st_mtime_ns) == (after.st_ino, after.st_mtime_ns)
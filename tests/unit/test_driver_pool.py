@@ -0,0 +1,124 @@
+import threading
+import time
+import pytest
+from selenium.common.exceptions import WebDriverException
+from driver_pool import DriverPool
+
+class FakeDriver:
+    """Stand-in for a WebDriver that records quits"""
+    created = 0
+
+    def __init__(self):
+        FakeDriver.created += 1
+        self.quit_called = False
+        self.alive = True
+
+    @property
+    def current_url(self):
+        if not self.alive:
+            raise WebDriverException("browser gone")
+        return "about:blank"
+
+    def quit(self):
+        self.quit_called = True
+
+@pytest.fixture(autouse=True)
+def reset_counter():
+    FakeDriver.created = 0
+
+def test_driver_reused_between_checkouts():
+    """Test that a returned driver is handed out again"""
+    pool = DriverPool(FakeDriver, size=1)
+    with pool.acquire() as first:
+        pass
+    with pool.acquire() as second:
+        pass
+    assert first is second
+    assert FakeDriver.created == 1
+
+def test_driver_recycled_after_max_pages():
+    """Test that a driver is quit after rendering max_pages pages"""
+    pool = DriverPool(FakeDriver, size=1, max_pages=2)
+    drivers = []
+    for _ in range(3):
+        with pool.acquire() as driver:
+            drivers.append(driver)
+    assert drivers[0] is drivers[1]
+    assert drivers[0].quit_called
+    assert drivers[2] is not drivers[0]
+
+def test_crashed_driver_discarded():
+    """Test that a driver raising WebDriverException is not reused"""
+    pool = DriverPool(FakeDriver, size=1)
+    with pytest.raises(WebDriverException):
+        with pool.acquire() as crashed:
+            raise WebDriverException("tab crashed")
+    with pool.acquire() as driver:
+        pass
+    assert crashed.quit_called
+    assert driver is not crashed
+
+def test_unhealthy_idle_driver_replaced():
+    """Test that a dead idle driver fails the health check and is replaced"""
+    pool = DriverPool(FakeDriver, size=1)
+    with pool.acquire() as driver:
+        pass
+    driver.alive = False
+    with pool.acquire() as replacement:
+        pass
+    assert replacement is not driver
+    assert driver.quit_called
+
+def test_pool_bounds_parallel_drivers():
+    """Test that no more than size drivers exist at once and they run in parallel"""
+    pool = DriverPool(FakeDriver, size=2)
+    in_use = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def render():
+        nonlocal in_use, peak
+        with pool.acquire():
+            with lock:
+                in_use += 1
+                peak = max(peak, in_use)
+            time.sleep(0.05)
+            with lock:
+                in_use -= 1
+
+    threads = [threading.Thread(target=render) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert peak == 2
+    assert FakeDriver.created == 2
+
+def test_close_quits_idle_drivers():
+    """Test that closing the pool quits its drivers"""
+    pool = DriverPool(FakeDriver, size=1)
+    with pool.acquire() as driver:
+        pass
+    pool.close()
+    assert driver.quit_called
+    with pytest.raises(RuntimeError):
+        with pool.acquire():
+            pass
+
+def test_checker_renders_with_pooled_driver(sample_stock_checker, monkeypatch):
+    """Test that get_html_with_selenium reuses one driver across pages"""
+    class PageDriver(FakeDriver):
+        page_source = "<h1>Test Product Name</h1>"
+
+        def get(self, url):
+            pass
+
+        def find_elements(self, by, value):
+            return [object()]
+
+    monkeypatch.setattr(sample_stock_checker, 'create_selenium_driver', PageDriver)
+
+    for _ in range(3):
+        assert sample_stock_checker.get_html_with_selenium("https://teststore1.com/products/test-product-1")
+    assert FakeDriver.created == 1
@@ -0,0 +1,43 @@
+import pytest
+import responses
+from stock_checker import StockChecker
+from tests.test_data.mock_html_responses import MOCK_IN_STOCK_HTML
+
+def test_session_pool_configured_from_env(monkeypatch):
+    """Test that pool size and retry settings come from the environment"""
+    monkeypatch.setenv('HTTP_POOL_MAXSIZE', '4')
+    monkeypatch.setenv('HTTP_MAX_RETRIES', '5')
+    monkeypatch.setenv('HTTP_BACKOFF_FACTOR', '1.5')
+    checker = StockChecker(check_interval=1)
+
+    adapter = checker.session.get_adapter("https://teststore1.com/products/test-product-1")
+    assert adapter._pool_maxsize == 4
+    assert adapter._pool_block is True
+    assert adapter.max_retries.total == 5
+    assert adapter.max_retries.backoff_factor == 1.5
+    assert 502 in adapter.max_retries.status_forcelist
+    # Throttling answers are left to the per-host rate limiter
+    assert 429 not in adapter.max_retries.status_forcelist
+
+def test_session_sends_request_headers(sample_stock_checker):
+    """Test that the session carries the configured request headers"""
+    assert sample_stock_checker.session.headers['User-Agent'] == sample_stock_checker.headers['User-Agent']
+
+@responses.activate
+def test_session_reused_across_requests(sample_stock_checker):
+    """Test that repeated fetches go through the same session"""
+    test_url = "https://teststore1.com/products/test-product-1"
+    responses.add(responses.GET, test_url, body=MOCK_IN_STOCK_HTML, status=200)
+    session = sample_stock_checker.session
+
+    assert sample_stock_checker.get_html_from_url(test_url) == MOCK_IN_STOCK_HTML
+    assert sample_stock_checker.get_html_from_url(test_url) == MOCK_IN_STOCK_HTML
+    assert sample_stock_checker.session is session
+    assert len(responses.calls) == 2
+
+def test_context_manager_closes_session(monkeypatch):
+    """Test that leaving the context manager closes the session"""
+    with StockChecker(check_interval=1) as checker:
+        closed = []
+        monkeypatch.setattr(checker.session, 'close', lambda: closed.append(True))
+    assert closed == [True]
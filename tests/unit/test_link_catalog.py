@@ -0,0 +1,161 @@
+import os
+import pytest
+from link_catalog import LinkCatalog, LinkWatcher
+
+CSV_CONTENT = """key,site_name,url
+product_type_1,TestStore1,https://teststore1.com/products/test-product-1
+product_type_1,TestStore2,"https://teststore2.com/products/test-product-1"
+product_type_2,TestStore1,https://teststore1.com/products/test-product-2
+product_type_3,TestStore3,https://teststore3.com/products/test-product-3
+"""
+
+@pytest.fixture
+def catalog(tmp_path):
+    (tmp_path / "links.csv").write_text(CSV_CONTENT)
+    return LinkCatalog(tmp_path)
+
+@pytest.fixture
+def parse_count(monkeypatch):
+    calls = []
+    original = LinkCatalog.parse
+
+    def counting_parse(path, signature):
+        calls.append(path)
+        return original(path, signature)
+
+    monkeypatch.setattr(LinkCatalog, 'parse', staticmethod(counting_parse))
+    return calls
+
+def test_file_parsed_once_across_lookups(catalog, parse_count):
+    """Test that keys, columns and entries are served from one parse"""
+    assert catalog.get_keys("links.csv") == ["product_type_1", "product_type_2", "product_type_3"]
+    assert catalog.get_fieldnames("links.csv") == ["key", "site_name", "url"]
+    assert len(catalog.get_entries("links.csv", ["product_type_1"])["product_type_1"]) == 2
+    assert len(parse_count) == 1
+
+def test_multi_key_and_full_lookup(catalog):
+    """Test looking up several keys, unknown keys and the whole file"""
+    entries = catalog.get_entries("links.csv", ["product_type_2", "missing"])
+    assert list(entries) == ["product_type_2", "missing"]
+    assert entries["missing"] == []
+
+    everything = catalog.get_entries("links.csv")
+    assert sorted(everything) == ["product_type_1", "product_type_2", "product_type_3"]
+    assert everything["product_type_1"][1]['url'] == "https://teststore2.com/products/test-product-1"
+
+def test_lookups_return_copies(catalog):
+    """Test that modifying returned entries does not change the cache"""
+    catalog.get_entries("links.csv", ["product_type_2"])["product_type_2"][0]['url'] = "changed"
+    assert catalog.get_entries("links.csv", ["product_type_2"])["product_type_2"][0]['url'].startswith("https://")
+
+def test_changed_file_reloaded(catalog, tmp_path, parse_count):
+    """Test that a file is parsed again after it changes on disk"""
+    catalog.get_keys("links.csv")
+    path = tmp_path / "links.csv"
+    path.write_text(CSV_CONTENT + "product_type_4,TestStore4,https://teststore4.com/products/p4\n")
+    assert "product_type_4" in catalog.get_keys("links.csv")
+    assert len(parse_count) == 2
+
+    # Same size, new modification time
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    catalog.get_keys("links.csv")
+    assert len(parse_count) == 3
+
+def test_file_listing_follows_directory(catalog, tmp_path):
+    """Test that new CSV files show up in the listing"""
+    assert [path.name for path in catalog.list_files()] == ["links.csv"]
+    (tmp_path / "more.csv").write_text(CSV_CONTENT)
+    (tmp_path / "notes.txt").write_text("ignored")
+    assert [path.name for path in catalog.list_files()] == ["links.csv", "more.csv"]
+
+def test_missing_columns_rejected(tmp_path):
+    """Test that a file without the required columns raises KeyError"""
+    (tmp_path / "bad.csv").write_text("key,url\nproduct_type_1,https://teststore1.com\n")
+    with pytest.raises(KeyError):
+        LinkCatalog(tmp_path).get_keys("bad.csv")
+
+def test_csv_edit_visible_to_checker(sample_stock_checker, tmp_path):
+    """Test that the checker sees edits made to a CSV file"""
+    (tmp_path / "links.csv").write_text(CSV_CONTENT)
+    sample_stock_checker.catalog = LinkCatalog(tmp_path)
+    sample_stock_checker.links_directory = tmp_path
+    assert sample_stock_checker.get_url_list("links.csv", "product_type_3")
+    (tmp_path / "links.csv").write_text(CSV_CONTENT.replace("product_type_3", "product_type_5"))
+    assert sample_stock_checker.get_url_list("links.csv", "product_type_3") == []
+
+def test_watcher_reports_only_changes(catalog, tmp_path):
+    """Test that the watcher returns entries only after the file changes"""
+    watcher = LinkWatcher(catalog, "links.csv", ["product_type_1", "product_type_3"], interval=0)
+    assert watcher.poll() is None
+
+    (tmp_path / "links.csv").write_text(CSV_CONTENT + "product_type_3,TestStore1,https://teststore1.com/products/p3\n")
+    urls = watcher.poll()
+    assert [entry['site_name'] for entry in urls] == ["TestStore1", "TestStore2", "TestStore3", "TestStore1"]
+    assert watcher.poll() is None
+
+def test_watcher_keeps_list_while_file_missing(catalog, tmp_path):
+    """Test that a missing file is skipped rather than clearing the schedule"""
+    watcher = LinkWatcher(catalog, "links.csv", interval=0)
+    (tmp_path / "links.csv").unlink()
+    assert watcher.poll() is None
+
+def test_whole_catalog_merges_shared_urls(catalog, tmp_path):
+    """Test that a URL listed under several keys or files appears once with all its keys"""
+    (tmp_path / "more.csv").write_text(
+        "key,site_name,url\n"
+        "bundle,TestStore1,https://teststore1.com/products/test-product-2\n"
+        "bundle,TestStore9,https://teststore9.com/products/bundle\n"
+    )
+    watcher = LinkWatcher(catalog, interval=0)
+    urls = {entry['url']: entry for entry in watcher.get_urls()}
+
+    assert len(urls) == 5
+    assert urls["https://teststore1.com/products/test-product-2"]['keys'] == ["product_type_2", "bundle"]
+
+    selected = LinkWatcher(catalog, keys=["bundle"], interval=0).get_urls()
+    assert [entry['site_name'] for entry in selected] == ["TestStore1", "TestStore9"]
+
+def test_url_under_two_site_names_checked_once(catalog, tmp_path):
+    """Test that a URL listed with different site names is merged under the first one"""
+    (tmp_path / "more.csv").write_text(
+        "key,site_name,url\n"
+        "bundle,Test Store One,https://teststore1.com/products/test-product-1\n"
+    )
+    urls = LinkWatcher(catalog, interval=0).get_urls()
+    shared = [entry for entry in urls if entry['url'] == "https://teststore1.com/products/test-product-1"]
+
+    assert len(shared) == 1
+    assert shared[0]['site_name'] == "TestStore1"
+    assert shared[0]['keys'] == ["product_type_1", "bundle"]
+
+def test_whole_catalog_follows_new_and_deleted_files(catalog, tmp_path):
+    """Test that adding or deleting a CSV file changes the watched entries"""
+    watcher = LinkWatcher(catalog, interval=0)
+    (tmp_path / "more.csv").write_text("key,site_name,url\nbundle,TestStore9,https://teststore9.com/p\n")
+    assert len(watcher.poll()) == 5
+    (tmp_path / "more.csv").unlink()
+    assert len(watcher.poll()) == 4
+
+def test_update_replaces_file_after_closing_it(catalog, tmp_path, monkeypatch):
+    """Test that the CSV is closed before it is replaced, as Windows requires"""
+    import pathlib
+    opened = []
+    original_open, original_replace = pathlib.Path.open, os.replace
+
+    def tracking_open(self, *args, **kwargs):
+        opened.append(original_open(self, *args, **kwargs))
+        return opened[-1]
+
+    def windows_replace(source, destination):
+        if any(not handle.closed for handle in opened):
+            raise PermissionError("The process cannot access the file because it is being used")
+        original_replace(source, destination)
+
+    monkeypatch.setattr(pathlib.Path, 'open', tracking_open)
+    monkeypatch.setattr(os, 'replace', windows_replace)
+    report = catalog.update_urls("links.csv", {"product_type_3": "https://teststore3.com/products/new"})
+
+    assert len(report['changed']) == 1
+    assert "https://teststore3.com/products/new" in (tmp_path / "links.csv").read_text()
+    assert [path.name for path in tmp_path.iterdir()] == ["links.csv"]
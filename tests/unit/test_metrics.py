@@ -0,0 +1,144 @@
+import json
+import time
+import urllib.request
+import pytest
+import responses
+from metrics import MetricsRegistry, MetricsServer
+from stock_checker import StockChecker
+from tests.test_data.mock_html_responses import MOCK_IN_STOCK_HTML
+
+TEST_URL = "https://teststore1.com/products/test-product-1"
+
+def test_counters_rendered_in_prometheus_format():
+    """Test that counters are exposed with escaped, sorted labels"""
+    registry = MetricsRegistry()
+    registry.inc('requests_total', host="teststore1.com", status=200)
+    registry.inc('requests_total', host="teststore1.com", status=200)
+    registry.inc('errors_total', phase="parse", error='Bad "quote"')
+
+    text = registry.render()
+    assert "# TYPE stock_checker_requests_total counter" in text
+    assert 'stock_checker_requests_total{host="teststore1.com",status="200"} 2' in text
+    assert 'stock_checker_errors_total{error="Bad \\"quote\\"",phase="parse"} 1' in text
+
+def test_histogram_buckets_are_cumulative():
+    """Test that histogram buckets, sum and count follow the exposition format"""
+    registry = MetricsRegistry(buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5.0):
+        registry.observe('phase_seconds', value, phase="request")
+
+    text = registry.render()
+    assert 'stock_checker_phase_seconds_bucket{phase="request",le="0.1"} 1' in text
+    assert 'stock_checker_phase_seconds_bucket{phase="request",le="1"} 2' in text
+    assert 'stock_checker_phase_seconds_bucket{phase="request",le="+Inf"} 3' in text
+    assert 'stock_checker_phase_seconds_count{phase="request"} 3' in text
+
+def test_span_counts_errors_and_still_times_the_block():
+    """Test that a failing span records its time and the exception type"""
+    registry = MetricsRegistry()
+    with pytest.raises(ValueError):
+        with registry.span('parse', host="teststore1.com"):
+            raise ValueError("broken page")
+
+    snapshot = registry.snapshot()
+    assert snapshot['phases']['parse']['count'] == 1
+    assert snapshot['counters']['errors_total'] == {
+        '{error="ValueError",host="teststore1.com",phase="parse"}': 1
+    }
+
+def test_summary_only_reports_changes():
+    """Test that a summary holds the difference between two snapshots"""
+    registry = MetricsRegistry()
+    registry.inc('checks_total', result="in_stock")
+    registry.observe('phase_seconds', 1.0, phase="check")
+    before = registry.snapshot()
+    registry.inc('requests_total', status=200)
+    registry.observe('phase_seconds', 0.5, phase="check")
+    registry.observe('phase_seconds', 1.5, phase="check")
+
+    summary = MetricsRegistry.summarize(before, registry.snapshot())
+    assert summary['counters'] == {'requests_total': {'{status="200"}': 1}}
+    assert summary['phases'] == {'check': {'count': 2, 'seconds': 2.0, 'mean': 1.0}}
+
+def test_server_exposes_metrics_and_summary():
+    """Test that the endpoint serves the text format and a JSON snapshot"""
+    registry = MetricsRegistry()
+    registry.inc('checks_total', result="in_stock")
+    server = MetricsServer(registry, port=0)
+    server.start()
+    try:
+        base = f"http://127.0.0.1:{server.port}"
+        with urllib.request.urlopen(f"{base}/metrics", timeout=5) as response:
+            assert response.headers['Content-Type'].startswith("text/plain")
+            assert 'stock_checker_checks_total{result="in_stock"} 1' in response.read().decode()
+        with urllib.request.urlopen(f"{base}/summary", timeout=5) as response:
+            assert json.load(response)['counters']['checks_total'] == {'{result="in_stock"}': 1}
+    finally:
+        server.close()
+
+@responses.activate
+def test_requests_counted_per_host(sample_stock_checker):
+    """Test that fetches record status, bytes, 304s and the request phases per host"""
+    responses.add(responses.GET, TEST_URL, body=MOCK_IN_STOCK_HTML, status=200, headers={'ETag': '"v1"'})
+    responses.add(responses.GET, TEST_URL, status=304)
+    sample_stock_checker.check_stock(TEST_URL, "TestStore1")
+    sample_stock_checker.check_stock(TEST_URL, "TestStore1")
+
+    counters = sample_stock_checker.metrics.snapshot()['counters']
+    assert counters['requests_total'] == {
+        '{host="teststore1.com",status="200"}': 1,
+        '{host="teststore1.com",status="304"}': 1,
+    }
+    assert counters['not_modified_total'] == {'{host="teststore1.com"}': 1}
+    assert counters['response_bytes_total']['{host="teststore1.com"}'] == len(MOCK_IN_STOCK_HTML.encode())
+    phases = sample_stock_checker.metrics.snapshot()['phases']
+    for phase in ('rate_limit_wait', 'request', 'ttfb', 'transfer', 'parse'):
+        assert phase in phases
+
+def test_selenium_parse_timed(sample_stock_checker, monkeypatch):
+    """Test that parsing a rendered page is recorded as a parse phase"""
+    monkeypatch.setattr(sample_stock_checker, 'get_html_with_selenium', lambda url: MOCK_IN_STOCK_HTML)
+    sample_stock_checker.check_stock_with_selenium(TEST_URL, "TestStore1")
+
+    assert sample_stock_checker.metrics.snapshot()['phases']['parse']['count'] == 1
+
+@responses.activate
+def test_sweep_writes_summary_file(tmp_path, monkeypatch):
+    """Test that each sweep appends a machine-readable summary"""
+    summary_file = tmp_path / "summary.jsonl"
+    monkeypatch.setenv('METRICS_SUMMARY_FILE', str(summary_file))
+    responses.add(responses.GET, TEST_URL, body=MOCK_IN_STOCK_HTML, status=200)
+    checker = StockChecker(check_interval=1)
+    monkeypatch.setattr(checker, 'report_stock_status', lambda result, email=None: None)
+
+    checker.run_sweep([{'url': TEST_URL, 'site_name': "TestStore1"}])
+    checker.close()
+
+    summary = json.loads(summary_file.read_text().splitlines()[-1])
+    assert summary == checker.last_summary
+    assert summary['urls'] == 1 and summary['reported'] == 1
+    assert summary['counters']['checks_total'] == {'{host="teststore1.com",result="in_stock"}': 1}
+    assert summary['phases']['check']['count'] == 1
+
+@responses.activate
+def test_monitor_loop_writes_periodic_summaries(tmp_path, monkeypatch):
+    """Test that the monitor loop appends a summary every interval and one when it stops"""
+    summary_file = tmp_path / "summary.jsonl"
+    monkeypatch.setenv('METRICS_SUMMARY_FILE', str(summary_file))
+    monkeypatch.setenv('METRICS_SUMMARY_INTERVAL', '0.2')
+    monkeypatch.setenv('POLL_MIN_INTERVAL', '0.05')
+    responses.add(responses.GET, TEST_URL, body=MOCK_IN_STOCK_HTML, status=200)
+    checker = StockChecker(check_interval=0.05)
+    monkeypatch.setattr(checker, 'report_stock_status', lambda result, email=None: None)
+    deadline = time.monotonic() + 0.7
+
+    reported = checker.run_monitor_loop([{'url': TEST_URL, 'site_name': "TestStore1"}],
+                                        should_stop=lambda: time.monotonic() >= deadline)
+    checker.close()
+
+    summaries = [json.loads(line) for line in summary_file.read_text().splitlines()]
+    assert len(summaries) >= 3
+    assert all(summary['urls'] == 1 for summary in summaries)
+    assert sum(summary['reported'] for summary in summaries) == reported
+    checks = sum(sum(summary['counters'].get('checks_total', {}).values()) for summary in summaries)
+    assert checks == reported
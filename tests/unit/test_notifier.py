@@ -0,0 +1,170 @@
+import socketserver
+import threading
+import time
+import pytest
+from email import message_from_string
+from notifier import NotificationDispatcher
+
+
+class FakeSMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP to accept AUTH PLAIN and messages"""
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        server = self.server
+        server.connections += 1
+        self.reply("220 localhost ESMTP fake")
+        while True:
+            line = self.rfile.readline().decode().rstrip("\r\n")
+            if not line:
+                return
+            command = line.split(" ", 1)[0].upper()
+            if command == "EHLO":
+                self.reply("250-localhost")
+                self.reply("250 AUTH PLAIN")
+            elif command == "AUTH":
+                server.logins += 1
+                self.reply("235 Authentication successful")
+            elif command in ("MAIL", "RCPT", "RSET", "NOOP"):
+                self.reply("250 OK")
+            elif command == "DATA":
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while True:
+                    data = self.rfile.readline().decode().rstrip("\r\n")
+                    if data == ".":
+                        break
+                    lines.append(data[1:] if data.startswith("..") else data)
+                server.messages.append(message_from_string("\n".join(lines)))
+                if server.drop_after_message:
+                    server.drop_after_message = False
+                    return
+                self.reply("250 OK")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+@pytest.fixture
+def smtp_server():
+    """Local SMTP stand-in recording the messages it receives"""
+    server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), FakeSMTPHandler)
+    server.daemon_threads = True
+    server.messages = []
+    server.connections = 0
+    server.logins = 0
+    server.drop_after_message = False
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def make_dispatcher(server, **kwargs):
+    options = {'use_tls': False, 'digest_window': 0.2, 'idle_timeout': 5, 'timeout': 5}
+    options.update(kwargs)
+    return NotificationDispatcher("127.0.0.1", server.server_address[1], "bot@example.com", "secret", **options)
+
+def test_notify_does_not_wait_for_delivery(smtp_server):
+    """Test that queuing an alert returns before the email is sent"""
+    dispatcher = make_dispatcher(smtp_server, digest_window=1.0)
+    start = time.monotonic()
+    dispatcher.notify("test@example.com", "Test Product", "https://teststore1.com/p")
+    assert time.monotonic() - start < 0.5
+    assert smtp_server.messages == []
+
+    assert dispatcher.flush(timeout=5)
+    dispatcher.close()
+    message = smtp_server.messages[0]
+    assert message['Subject'] == "Stock Alert: Test Product"
+    assert "https://teststore1.com/p" in message.get_payload()
+
+def test_alerts_in_window_merged_into_digest(smtp_server):
+    """Test that alerts arriving together are sent as one email per recipient"""
+    dispatcher = make_dispatcher(smtp_server)
+    for i in range(3):
+        dispatcher.notify("test@example.com", f"Product {i}", f"https://teststore1.com/p{i}", "TestStore1")
+    dispatcher.notify("other@example.com", "Product 9", "https://teststore2.com/p9")
+    dispatcher.close(timeout=5)
+
+    subjects = sorted(message['Subject'] for message in smtp_server.messages)
+    assert subjects == ["Stock Alert: 3 products in stock", "Stock Alert: Product 9"]
+    digest = next(m for m in smtp_server.messages if m['To'] == "test@example.com").get_payload()
+    assert "Product 0 (TestStore1)" in digest and "https://teststore1.com/p2" in digest
+
+def test_connection_reused_across_emails(smtp_server):
+    """Test that separate emails share one authenticated connection"""
+    dispatcher = make_dispatcher(smtp_server, digest_window=0)
+    for i in range(3):
+        dispatcher.notify("test@example.com", f"Product {i}")
+        assert dispatcher.flush(timeout=5)
+    dispatcher.close(timeout=5)
+
+    assert len(smtp_server.messages) == 3
+    assert smtp_server.connections == 1
+    assert smtp_server.logins == 1
+
+def test_reconnects_after_server_drops_connection(smtp_server):
+    """Test that a dropped connection is reopened for the next email"""
+    dispatcher = make_dispatcher(smtp_server, digest_window=0)
+    smtp_server.drop_after_message = True
+    dispatcher.notify("test@example.com", "Product 1")
+    dispatcher.flush(timeout=10)
+    dispatcher.notify("test@example.com", "Product 2")
+    dispatcher.close(timeout=10)
+
+    subjects = [message['Subject'] for message in smtp_server.messages]
+    assert "Stock Alert: Product 2" in subjects
+    assert smtp_server.connections >= 2
+
+def test_unreachable_server_drops_alert(smtp_server):
+    """Test that delivery failures are counted and do not block the queue"""
+    dispatcher = NotificationDispatcher("127.0.0.1", 1, "bot@example.com", None, use_tls=False,
+                                        digest_window=0, max_attempts=1, timeout=1)
+    dispatcher.notify("test@example.com", "Product 1")
+    assert dispatcher.flush(timeout=5)
+    dispatcher.close()
+    assert dispatcher.get_stats()['failed'] == 1
+
+def test_sweep_queues_alert_with_product_url(smtp_server, monkeypatch):
+    """Test that a sweep hands restocks to the dispatcher with the checked URL"""
+    from stock_checker import StockChecker
+    monkeypatch.setenv('SMTP_SERVER', "127.0.0.1")
+    monkeypatch.setenv('SMTP_PORT', str(smtp_server.server_address[1]))
+    monkeypatch.setenv('SMTP_STARTTLS', "false")
+    monkeypatch.setenv('NOTIFY_DIGEST_WINDOW', "0.2")
+    checker = StockChecker(check_interval=1)
+    monkeypatch.setattr(checker, 'check_stock', lambda url=None, site_name=None: (True, "Test Product", site_name))
+
+    entry = {'url': "https://teststore1.com/products/test-product", 'site_name': "TestStore1"}
+    checker.run_sweep([entry], notification_email="test@example.com")
+    checker.close()
+
+    assert len(smtp_server.messages) == 1
+    assert entry['url'] in smtp_server.messages[0].get_payload()
+
+def test_undelivered_alert_sent_again_on_next_check(tmp_path, monkeypatch):
+    """Test that a restock whose email failed is not stored as notified"""
+    from stock_checker import StockChecker
+    monkeypatch.setenv('STATE_DB', str(tmp_path / "state.db"))
+    monkeypatch.setenv('SMTP_SERVER', "127.0.0.1")
+    monkeypatch.setenv('SMTP_PORT', "1")
+    monkeypatch.setenv('SMTP_STARTTLS', "false")
+    monkeypatch.setenv('SMTP_MAX_ATTEMPTS', "1")
+    monkeypatch.setenv('NOTIFY_DIGEST_WINDOW', "0")
+    checker = StockChecker(check_interval=1)
+    entry = {'url': "https://teststore1.com/products/test-product", 'site_name': "TestStore1"}
+    in_stock = (True, "Test Product", "TestStore1")
+
+    checker.handle_result(entry, in_stock, "test@example.com")
+    assert checker.get_notifier().flush(timeout=5)
+    checker.handle_result(entry, in_stock, "test@example.com")
+    notifier = checker.get_notifier()
+    assert notifier.flush(timeout=5)
+    checker.close()
+
+    assert notifier.get_stats()['queued'] == 2
@@ -0,0 +1,63 @@
+import pytest
+import responses
+from concurrent.futures.process import BrokenProcessPool
+from parse_pool import ParsePool
+from stock_checker import StockChecker
+from tests.test_data.mock_html_responses import (
+    MOCK_IN_STOCK_HTML,
+    MOCK_OUT_OF_STOCK_HTML,
+    MOCK_MULTIPLE_BUTTONS_HTML,
+    MOCK_NO_BUTTON_HTML
+)
+
+PAGES = [MOCK_IN_STOCK_HTML, MOCK_OUT_OF_STOCK_HTML, MOCK_MULTIPLE_BUTTONS_HTML, MOCK_NO_BUTTON_HTML]
+
+@pytest.fixture(scope="module")
+def parse_pool():
+    pool = ParsePool(2, 'html.parser', parse_only=True)
+    yield pool
+    pool.close()
+
+@pytest.mark.parametrize("html", PAGES)
+def test_worker_matches_in_process_parse(sample_stock_checker, parse_pool, html):
+    """Test that pages parsed in a worker give the same result as in-thread parsing"""
+    expected = sample_stock_checker.analyze_stock_page(html, "TestStore")
+    assert parse_pool.analyze(html.encode('utf-8'), 'utf-8', "TestStore") == expected
+    assert parse_pool.analyze(html, None, "TestStore") == expected
+
+def test_worker_decodes_body(parse_pool):
+    """Test that the raw body is decoded in the worker with the response encoding"""
+    html = MOCK_IN_STOCK_HTML.replace("Test Product Name", "Pokémon Box")
+    result, _ = parse_pool.analyze(html.encode('latin-1'), 'ISO-8859-1', "TestStore")
+    assert result == (True, "Pokémon Box", "TestStore")
+
+def test_broken_pool_falls_back_and_restarts(monkeypatch):
+    """Test that a broken pool is replaced and the page still gets parsed"""
+    pool = ParsePool(1, 'html.parser', parse_only=True)
+    broken = pool.executor
+
+    def fail(*args, **kwargs):
+        raise BrokenProcessPool("worker died")
+
+    monkeypatch.setattr(broken, 'submit', fail)
+    assert pool.analyze(MOCK_IN_STOCK_HTML, None, "TestStore")[0] == (True, "Test Product Name", "TestStore")
+    assert pool.executor is not broken
+    pool.close()
+
+@responses.activate
+def test_checker_parses_in_workers(monkeypatch):
+    """Test that PARSE_WORKERS sends fetched pages to the pool"""
+    monkeypatch.setenv('PARSE_WORKERS', '2')
+    url = "https://teststore1.com/products/test-product-1"
+    responses.add(responses.GET, url, body=MOCK_IN_STOCK_HTML.encode('utf-8'), status=200,
+                  content_type="text/html; charset=utf-8")
+
+    with StockChecker(check_interval=1) as checker:
+        sent = []
+        pool = checker.get_parse_pool()
+        analyze = pool.analyze
+        monkeypatch.setattr(pool, 'analyze', lambda page, *args: sent.append(type(page)) or analyze(page, *args))
+        assert checker.check_stock(url, "TestStore1") == (True, "Test Product Name", "TestStore1")
+
+    assert sent == [bytes]
+    assert checker.parse_pool is None
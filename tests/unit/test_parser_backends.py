@@ -0,0 +1,45 @@
+import pytest
+from bs4.builder import builder_registry
+from stock_checker import StockChecker
+from tests.test_data.mock_html_responses import (
+    MOCK_IN_STOCK_HTML,
+    MOCK_OUT_OF_STOCK_HTML,
+    MOCK_MULTIPLE_BUTTONS_HTML,
+    MOCK_NO_BUTTON_HTML
+)
+
+def test_auto_backend_prefers_lxml():
+    """Test that 'auto' picks lxml only when it is installed"""
+    expected = 'lxml' if builder_registry.lookup('lxml') else 'html.parser'
+    assert StockChecker.resolve_parser_backend('auto') == expected
+
+def test_missing_backend_falls_back():
+    """Test that an unavailable backend falls back to html.parser"""
+    assert StockChecker.resolve_parser_backend('not-a-parser') == 'html.parser'
+
+def test_backend_from_env(monkeypatch):
+    """Test that HTML_PARSER and SOUP_PARSE_ONLY are read from the environment"""
+    monkeypatch.setenv('HTML_PARSER', 'html.parser')
+    monkeypatch.setenv('SOUP_PARSE_ONLY', 'false')
+    checker = StockChecker(check_interval=1)
+    assert checker.parser_backend == 'html.parser'
+    assert checker.parse_only is None
+
+@pytest.mark.parametrize("backend", ['html.parser', 'lxml'])
+@pytest.mark.parametrize("parse_only", [True, False])
+@pytest.mark.parametrize("html,expected", [
+    (MOCK_IN_STOCK_HTML, True),
+    (MOCK_OUT_OF_STOCK_HTML, False),
+    (MOCK_MULTIPLE_BUTTONS_HTML, False),
+    (MOCK_NO_BUTTON_HTML, False),
+])
+def test_backends_agree_on_fixtures(monkeypatch, backend, parse_only, html, expected):
+    """Test that every backend and filter combination gives the same result"""
+    if builder_registry.lookup(backend) is None:
+        pytest.skip(f"{backend} is not installed")
+    monkeypatch.setenv('HTML_PARSER', backend)
+    monkeypatch.setenv('SOUP_PARSE_ONLY', str(parse_only))
+    checker = StockChecker(check_interval=1)
+
+    result = checker.parse_stock_status_with_soup(html, "TestStore")
+    assert result == (expected, "Test Product Name", "TestStore")
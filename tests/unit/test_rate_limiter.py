@@ -0,0 +1,128 @@
+import threading
+import time
+import pytest
+import responses
+from rate_limiter import HostPaused, HostRateLimiter, interleave_by_host, parse_host_limits, parse_retry_after
+
+URL_1 = "https://teststore1.com/products/test-product-1"
+URL_2 = "https://teststore2.com/products/test-product-1"
+
+def test_token_bucket_paces_one_host():
+    """Test that requests beyond the burst are spaced by the rate"""
+    limiter = HostRateLimiter(rate=20, burst=1, max_concurrency=4)
+    start = time.monotonic()
+    for _ in range(4):
+        with limiter.acquire(URL_1):
+            pass
+    assert time.monotonic() - start >= 3 / 20 * 0.9
+
+def test_hosts_limited_independently():
+    """Test that pacing one host does not delay another"""
+    limiter = HostRateLimiter(rate=1, burst=1, max_concurrency=1)
+    with limiter.acquire(URL_1):
+        pass
+    start = time.monotonic()
+    with limiter.acquire(URL_2):
+        pass
+    assert time.monotonic() - start < 0.1
+
+def test_concurrency_cap_per_host():
+    """Test that no more than max_concurrency requests to a host run at once"""
+    limiter = HostRateLimiter(rate=1000, burst=100, max_concurrency=2)
+    in_flight = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def request():
+        nonlocal in_flight, peak
+        with limiter.acquire(URL_1):
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            time.sleep(0.05)
+            with lock:
+                in_flight -= 1
+
+    threads = [threading.Thread(target=request) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert peak == 2
+
+def test_throttling_pauses_and_slows_host():
+    """Test that a 429 with Retry-After pauses the host and halves its rate"""
+    limiter = HostRateLimiter(rate=50, burst=1, max_concurrency=1)
+    assert limiter.record_response(URL_1, 429, "1") is True
+
+    stats = limiter.get_stats()["teststore1.com"]
+    assert stats['rate'] == 25
+    assert stats['paused_for'] > 0.5
+    assert stats['throttled'] == 1
+
+    # Successful responses bring the rate back up
+    for _ in range(20):
+        limiter.record_response(URL_1, 200)
+    assert limiter.get_stats()["teststore1.com"]['rate'] == 50
+
+def test_parse_retry_after():
+    """Test both Retry-After formats"""
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after(None) is None
+    assert parse_retry_after("soon") is None
+
+def test_parse_host_limits():
+    """Test per-host override parsing"""
+    assert parse_host_limits("teststore1.com=0.5:1, TestStore2.com=4,bogus") == {
+        "teststore1.com": {'rate': 0.5, 'max_concurrency': 1},
+        "teststore2.com": {'rate': 4.0},
+    }
+
+def test_interleave_by_host():
+    """Test that sweep order alternates between hosts"""
+    urls = [{'url': URL_1}, {'url': URL_1 + "a"}, {'url': URL_1 + "b"}, {'url': URL_2}]
+    ordered = interleave_by_host(urls)
+    assert [entry['url'] for entry in ordered] == [URL_1, URL_2, URL_1 + "a", URL_1 + "b"]
+
+@responses.activate
+def test_http_get_waits_out_429(sample_stock_checker):
+    """Test that http_get retries after the host's Retry-After pause"""
+    responses.add(responses.GET, URL_1, status=429, headers={'Retry-After': '0'})
+    responses.add(responses.GET, URL_1, body="ok", status=200)
+
+    response = sample_stock_checker.http_get(URL_1)
+
+    assert response.status_code == 200
+    assert len(responses.calls) == 2
+    assert sample_stock_checker.rate_limiter.get_stats()["teststore1.com"]['throttled'] == 1
+
+def test_paused_host_fails_fast_with_max_wait():
+    """Test that a long pause raises instead of sleeping past max_wait"""
+    limiter = HostRateLimiter(rate=50, burst=1, max_concurrency=1)
+    limiter.record_response(URL_1, 429, "3600")
+
+    start = time.monotonic()
+    with pytest.raises(HostPaused):
+        with limiter.acquire(URL_1, max_wait=0.1):
+            pass
+    assert time.monotonic() - start < 0.5
+    with limiter.acquire(URL_2, max_wait=0.1):
+        pass
+
+@responses.activate
+def test_http_get_does_not_sleep_through_long_retry_after(monkeypatch):
+    """Test that a Retry-After longer than HTTP_TIMEOUT returns the 429 instead of blocking the worker"""
+    monkeypatch.setenv('HTTP_TIMEOUT', '1')
+    from stock_checker import StockChecker
+    checker = StockChecker(check_interval=1)
+    responses.add(responses.GET, URL_1, status=429, headers={'Retry-After': '3600'})
+
+    start = time.monotonic()
+    assert checker.http_get(URL_1).status_code == 429
+    with pytest.raises(HostPaused):
+        checker.http_get(URL_1)
+    assert checker.check_stock(URL_1, "TestStore1") == (None, None, None)
+    assert time.monotonic() - start < 0.5
+    assert len(responses.calls) == 1
+    checker.close()
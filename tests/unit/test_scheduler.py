@@ -0,0 +1,152 @@
+import pytest
+from datetime import datetime
+from scheduler import AdaptiveScheduler, parse_drop_time
+
+ENTRY = {'url': "https://teststore1.com/products/test-product-1", 'site_name': "TestStore1"}
+OTHER = {'url': "https://teststore2.com/products/test-product-1", 'site_name': "TestStore2"}
+IN_STOCK = (True, "Test Product Name", "TestStore1")
+OUT_OF_STOCK = (False, "Test Product Name", "TestStore1")
+
+def make_scheduler(urls, **kwargs):
+    options = dict(base_interval=100, min_interval=10, max_interval=1000, jitter=0, backoff=2, now=0)
+    options.update(kwargs)
+    return AdaptiveScheduler(urls, **options)
+
+def test_all_urls_due_at_start():
+    """Test that every URL is checked right away"""
+    scheduler = make_scheduler([ENTRY, OTHER])
+    assert scheduler.pop_due(now=0) == [ENTRY, OTHER]
+
+def test_stable_page_backs_off_to_max():
+    """Test that unchanged results stretch the interval up to the maximum"""
+    scheduler = make_scheduler([ENTRY], stable_ratio=None)
+    now = 0
+    for _ in range(10):
+        scheduler.record_result(ENTRY, OUT_OF_STOCK, now=now)
+        now = scheduler.states[AdaptiveScheduler.key(ENTRY)]['next_due']
+    assert scheduler.get_intervals()[ENTRY['url']] == 1000
+
+def test_backoff_follows_time_since_change():
+    """Test that the interval only grows past the base once the page has been stable for long"""
+    scheduler = make_scheduler([ENTRY], stable_ratio=0.01)
+    now = 0
+    while now < 20000:
+        scheduler.record_result(ENTRY, OUT_OF_STOCK, now=now)
+        now = scheduler.states[AdaptiveScheduler.key(ENTRY)]['next_due']
+        if now <= 10000:
+            assert scheduler.get_intervals()[ENTRY['url']] == 100
+    assert 100 < scheduler.get_intervals()[ENTRY['url']] <= 200
+
+    while now < 200000:
+        scheduler.record_result(ENTRY, OUT_OF_STOCK, now=now)
+        now = scheduler.states[AdaptiveScheduler.key(ENTRY)]['next_due']
+    assert scheduler.get_intervals()[ENTRY['url']] == 1000
+
+def test_change_drops_to_min_interval():
+    """Test that a changed result makes the URL poll at the minimum interval"""
+    scheduler = make_scheduler([ENTRY])
+    scheduler.record_result(ENTRY, OUT_OF_STOCK, now=0)
+    scheduler.record_result(ENTRY, OUT_OF_STOCK, now=100)
+    scheduler.record_result(ENTRY, IN_STOCK, now=300)
+
+    assert scheduler.get_intervals()[ENTRY['url']] == 10
+    assert scheduler.pop_due(now=309) == []
+    assert scheduler.pop_due(now=310) == [ENTRY]
+
+def test_failed_check_keeps_interval():
+    """Test that a failed check is retried on the same interval"""
+    scheduler = make_scheduler([ENTRY])
+    scheduler.record_result(ENTRY, None, now=0)
+    assert scheduler.seconds_until_next(now=0) == 100
+
+def test_failed_fetch_result_not_a_change():
+    """Test that check_stock's (None, None, None) failure neither resets nor stretches the interval"""
+    scheduler = make_scheduler([ENTRY], stable_ratio=None)
+    scheduler.record_result(ENTRY, OUT_OF_STOCK, now=0)
+    scheduler.record_result(ENTRY, OUT_OF_STOCK, now=100)
+    scheduler.record_result(ENTRY, (None, None, None), now=300)
+    assert scheduler.get_intervals()[ENTRY['url']] == 200
+
+    scheduler.record_result(ENTRY, OUT_OF_STOCK, now=500)
+    assert scheduler.get_intervals()[ENTRY['url']] == 400
+
+def test_jitter_stays_within_bounds():
+    """Test that jitter spreads delays by at most the configured fraction"""
+    scheduler = make_scheduler([ENTRY], jitter=0.2)
+    for _ in range(50):
+        scheduler.record_result(ENTRY, None, now=0)
+        assert 80 <= scheduler.seconds_until_next(now=0) <= 120
+
+def test_drop_window_polls_at_min_interval():
+    """Test that URLs with a known drop poll fast around it and wake up for it"""
+    drop = {**ENTRY, 'drop_at': "2030-01-01T12:00:00"}
+    drop_at = parse_drop_time(drop['drop_at'])
+    scheduler = make_scheduler([drop], base_interval=3000, max_interval=5000,
+                               drop_lead=60, drop_window=600, now=drop_at - 1000)
+
+    # Before the window the next check is pulled forward to the window start
+    scheduler.record_result(drop, OUT_OF_STOCK, now=drop_at - 1000)
+    assert scheduler.seconds_until_next(now=drop_at - 1000) == 940
+
+    # Inside the window the minimum interval is used
+    scheduler.record_result(drop, OUT_OF_STOCK, now=drop_at)
+    assert scheduler.seconds_until_next(now=drop_at) == 10
+
+def test_parse_drop_time_invalid():
+    """Test that bad drop times are ignored"""
+    assert parse_drop_time("next tuesday") is None
+    assert parse_drop_time("") is None
+
+def test_monitor_loop_uses_schedule(sample_stock_checker, monkeypatch):
+    """Test that run_monitor_loop checks due URLs and stops when asked"""
+    checked = []
+
+    def fake_check(url=None, site_name=None):
+        checked.append(url)
+        return False, "Test Product Name", site_name
+
+    monkeypatch.setattr(sample_stock_checker, 'check_stock', fake_check)
+    monkeypatch.setattr(sample_stock_checker, 'report_stock_status', lambda result, email=None: None)
+
+    sample_stock_checker.run_monitor_loop([ENTRY, OTHER], should_stop=lambda: len(checked) >= 2)
+    assert sorted(checked) == sorted([ENTRY['url'], OTHER['url']])
+
+def test_sync_applies_only_changes():
+    """Test that sync adds, removes and updates entries without resetting the rest"""
+    scheduler = make_scheduler([ENTRY, OTHER], stable_ratio=None)
+    scheduler.pop_due(now=0)
+    scheduler.record_result(ENTRY, OUT_OF_STOCK, now=0)
+    scheduler.record_result(OTHER, OUT_OF_STOCK, now=0)
+    scheduler.pop_due(now=100)
+    scheduler.record_result(ENTRY, OUT_OF_STOCK, now=100)
+    scheduler.record_result(OTHER, OUT_OF_STOCK, now=100)
+
+    added = {'url': "https://teststore3.com/products/test-product-1", 'site_name': "TestStore3"}
+    changes = scheduler.sync([ENTRY, added], now=150)
+
+    assert changes == {'added': [added], 'removed': [OTHER], 'updated': []}
+    assert scheduler.get_intervals()[ENTRY['url']] == 200
+    # The unchanged entry keeps its due time, the new one is due at once
+    assert scheduler.pop_due(now=150) == [added]
+    assert scheduler.pop_due(now=300) == [ENTRY]
+
+def test_removed_in_flight_entry_not_rescheduled():
+    """Test that a check finishing after its entry was removed is dropped"""
+    scheduler = make_scheduler([ENTRY])
+    scheduler.pop_due(now=0)
+    scheduler.remove(ENTRY)
+    scheduler.record_result(ENTRY, OUT_OF_STOCK, now=1)
+    assert scheduler.pop_due(now=10000) == []
+
+def test_update_with_drop_time_pulls_check_forward():
+    """Test that adding a drop time to an entry moves its next check to the window start"""
+    scheduler = make_scheduler([ENTRY], max_interval=10000, base_interval=5000, drop_lead=100)
+    scheduler.pop_due(now=0)
+    scheduler.record_result(ENTRY, OUT_OF_STOCK, now=0)
+
+    drop_at = datetime.fromtimestamp(2000).isoformat()
+    changes = scheduler.sync([dict(ENTRY, drop_at=drop_at)], now=10)
+
+    assert len(changes['updated']) == 1
+    assert scheduler.pop_due(now=1899) == []
+    assert scheduler.pop_due(now=1900)[0]['drop_at'] == drop_at
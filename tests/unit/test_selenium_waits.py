@@ -0,0 +1,76 @@
+import time
+import pytest
+from selenium.webdriver.common.by import By
+from tests.test_data.mock_html_responses import MOCK_IN_STOCK_HTML
+
+TEST_URL = "https://teststore1.com/products/test-product-1"
+
+class RenderingDriver:
+    """Fake driver whose h1 and submit button appear after a delay"""
+
+    def __init__(self, render_delay):
+        self.render_delay = render_delay
+        self.loaded_at = None
+        self.page_source = MOCK_IN_STOCK_HTML
+        self.current_url = "about:blank"
+
+    def get(self, url):
+        self.loaded_at = time.monotonic()
+
+    def find_elements(self, by, value):
+        if time.monotonic() - self.loaded_at < self.render_delay:
+            return []
+        if by == By.TAG_NAME and value == 'h1':
+            return ['h1']
+        if by == By.CSS_SELECTOR and value == 'button[type="submit"]':
+            return ['button']
+        return []
+
+    def quit(self):
+        pass
+
+@pytest.fixture
+def use_driver(sample_stock_checker, monkeypatch):
+    """Make the checker render pages with a RenderingDriver"""
+    def install(render_delay):
+        monkeypatch.setattr(sample_stock_checker, 'create_selenium_driver', lambda: RenderingDriver(render_delay))
+        return sample_stock_checker
+    return install
+
+def test_returns_as_soon_as_page_is_ready(use_driver):
+    """Test that the wait ends when the product elements appear, not at a fixed delay"""
+    checker = use_driver(render_delay=0.1)
+    checker.selenium_config['max_wait'] = 5
+    checker.selenium_config['poll_interval'] = 0.01
+
+    start = time.monotonic()
+    html = checker.get_html_with_selenium(TEST_URL)
+    elapsed = time.monotonic() - start
+
+    assert html == MOCK_IN_STOCK_HTML
+    assert 0.1 <= elapsed < 1
+
+def test_max_wait_bounds_slow_pages(use_driver):
+    """Test that a page that never becomes ready is returned after max_wait"""
+    checker = use_driver(render_delay=60)
+    checker.selenium_config['max_wait'] = 0.2
+    checker.selenium_config['poll_interval'] = 0.01
+
+    assert checker.get_html_with_selenium(TEST_URL) == MOCK_IN_STOCK_HTML
+    stats = checker.get_ready_time_stats()['teststore1.com']
+    assert stats['timeouts'] == 1
+
+def test_ready_times_recorded_per_host(use_driver):
+    """Test that readiness times are summarized per host"""
+    checker = use_driver(render_delay=0)
+    checker.selenium_config['poll_interval'] = 0.01
+
+    checker.get_html_with_selenium(TEST_URL)
+    checker.get_html_with_selenium("https://teststore2.com/products/test-product-1")
+    checker.get_html_with_selenium(TEST_URL)
+
+    stats = checker.get_ready_time_stats()
+    assert stats['teststore1.com']['count'] == 2
+    assert stats['teststore2.com']['count'] == 1
+    assert stats['teststore1.com']['timeouts'] == 0
+    assert stats['teststore1.com']['max'] < 1
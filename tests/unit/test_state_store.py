@@ -0,0 +1,99 @@
+import sqlite3
+import pytest
+from state_store import StockStateStore
+from stock_checker import StockChecker
+
+ENTRY = {'url': "https://teststore1.com/products/test-product-1", 'site_name': "TestStore1"}
+IN_STOCK = (True, "Test Product Name", "TestStore1")
+OUT_OF_STOCK = (False, "Test Product Name", "TestStore1")
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "state.db")
+
+def test_only_out_to_in_transitions_notify(db_path):
+    """Test that record reports only transitions into stock"""
+    store = StockStateStore(db_path)
+    assert store.record(ENTRY, OUT_OF_STOCK) is False
+    assert store.record(ENTRY, IN_STOCK) is True
+    assert store.record(ENTRY, IN_STOCK) is False
+    assert store.record(ENTRY, OUT_OF_STOCK) is False
+    assert store.record(ENTRY, IN_STOCK) is True
+
+def test_first_in_stock_sighting_notifies(db_path):
+    """Test that a product seen in stock for the first time counts as a transition"""
+    store = StockStateStore(db_path)
+    assert store.record(ENTRY, IN_STOCK) is True
+
+def test_failed_checks_not_recorded(db_path):
+    """Test that failed checks leave the state alone"""
+    store = StockStateStore(db_path)
+    assert store.record(ENTRY, (None, None, None)) is False
+    assert store.get(ENTRY) is None
+
+def test_restart_resumes_without_realerting(db_path):
+    """Test that state survives a restart and does not re-alert"""
+    store = StockStateStore(db_path)
+    store.record(ENTRY, IN_STOCK, content_hash="abc", now=100)
+    store.close()
+
+    reopened = StockStateStore(db_path)
+    state = reopened.get(ENTRY)
+    assert state['is_in_stock'] is True
+    assert state['content_hash'] == "abc"
+    assert state['last_changed'] == 100
+    assert reopened.record(ENTRY, IN_STOCK, now=200) is False
+
+def test_writes_batched_until_flush(db_path):
+    """Test that results are only written to disk on flush, in WAL mode"""
+    store = StockStateStore(db_path)
+    for i in range(5):
+        store.record({'url': f"https://teststore1.com/products/p{i}", 'site_name': "TestStore1"}, OUT_OF_STOCK)
+
+    reader = sqlite3.connect(db_path)
+    assert reader.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+    assert reader.execute("SELECT COUNT(*) FROM stock_state").fetchone()[0] == 0
+
+    assert store.flush() == 5
+    assert reader.execute("SELECT COUNT(*) FROM stock_state").fetchone()[0] == 5
+
+def test_sweep_notifies_once_per_restock(db_path, monkeypatch):
+    """Test that repeated in-stock sweeps send a single notification"""
+    monkeypatch.setenv('STATE_DB', db_path)
+    checker = StockChecker(check_interval=1)
+    sent = []
+    monkeypatch.setattr(checker, 'check_stock', lambda url=None, site_name=None: IN_STOCK)
+    monkeypatch.setattr(checker, 'send_notification', lambda email, product, **kwargs: sent.append(product))
+
+    for _ in range(3):
+        checker.run_sweep([ENTRY], notification_email="test@example.com")
+    checker.close()
+
+    restarted = StockChecker(check_interval=1)
+    monkeypatch.setattr(restarted, 'check_stock', lambda url=None, site_name=None: IN_STOCK)
+    monkeypatch.setattr(restarted, 'send_notification', lambda email, product, **kwargs: sent.append(product))
+    restarted.run_sweep([ENTRY], notification_email="test@example.com")
+
+    assert sent == ["Test Product Name"]
+
+def test_load_refreshes_only_given_entries(db_path):
+    """Test that reloading entries picks up rows written by another store"""
+    other = {'url': "https://teststore2.com/products/test-product-1", 'site_name': "TestStore2"}
+    store = StockStateStore(db_path)
+    writer = StockStateStore(db_path)
+    writer.record(ENTRY, IN_STOCK)
+    writer.record(other, IN_STOCK)
+    writer.flush()
+
+    store.load([ENTRY])
+    assert store.record(ENTRY, IN_STOCK) is False
+    assert store.record(other, IN_STOCK) is True
+
+def test_undelivered_restock_notifies_again(db_path):
+    """Test that marking an alert undelivered makes the next in-stock result a transition"""
+    store = StockStateStore(db_path)
+    assert store.record(ENTRY, IN_STOCK) is True
+    assert store.mark_undelivered(ENTRY) is True
+    assert store.record(ENTRY, IN_STOCK) is True
+    assert store.record(ENTRY, IN_STOCK) is False
+    assert store.mark_undelivered({**ENTRY, 'url': "https://teststore9.com/p"}) is False
@@ -0,0 +1,66 @@
+import pytest
+from stock_detector import detect_stock_status
+from tests.test_data.mock_html_responses import (
+    MOCK_IN_STOCK_HTML,
+    MOCK_OUT_OF_STOCK_HTML,
+    MOCK_MULTIPLE_BUTTONS_HTML,
+    MOCK_NO_BUTTON_HTML
+)
+
+FIXTURES = [
+    MOCK_IN_STOCK_HTML,
+    MOCK_OUT_OF_STOCK_HTML,
+    MOCK_MULTIPLE_BUTTONS_HTML,
+    MOCK_NO_BUTTON_HTML,
+]
+
+EDGE_CASES = [
+    "<div><p>No heading</p><button type='submit'>Add to cart</button></div>",
+    "<h1>  Spaced\n  <span>Name</span>\n  <span>Here</span> </h1>",
+    "<h1>A&amp;B <!-- note --> Box<script>var x = 1;</script></h1>",
+    "<div><h1>Unclosed heading</div><button type=submit>Add to cart</button>",
+    "<button type='submit' disabled>Add to cart</button>",
+    "<button type='button'>Add to cart</button>",
+    "<button type='submit'>Add <br> to <b>cart</b></button><h1>Late Name</h1>",
+    "<h1>First</h1><h1>Second</h1><button type=submit>Add to cart</button>",
+    "<form><button type='submit'>Add to cart",
+    "<h1>Name</h1><template><button type=submit>Add to cart</button></template>",
+    "<template><h1>T</h1></template><h1>Real</h1>",
+    "<h1>Na<rt>me</rt></h1>",
+    "<h1>Name<rp>(</rp><rt><b>hidden</b></rt></h1><button type=submit>Add to <rp>x</rp>cart</button>",
+]
+
+@pytest.mark.parametrize("html", FIXTURES + EDGE_CASES)
+def test_matches_beautifulsoup(sample_stock_checker, html):
+    """Test that the fast path agrees with the BeautifulSoup parser"""
+    sample_stock_checker.parser_backend = 'html.parser'
+    sample_stock_checker.parse_only = None
+    expected = sample_stock_checker.parse_stock_status_with_soup(html, "TestStore")
+    detected = detect_stock_status(html)
+
+    assert detected is not None
+    assert (*detected, "TestStore") == expected
+
+def test_parse_stock_status_uses_fast_path(sample_stock_checker, monkeypatch):
+    """Test that parse_stock_status does not build a soup when the detector is sure"""
+    def fail(*args):
+        raise AssertionError("BeautifulSoup fallback should not be used")
+
+    monkeypatch.setattr(sample_stock_checker, 'parse_stock_status_with_soup', fail)
+    result = sample_stock_checker.parse_stock_status(MOCK_IN_STOCK_HTML, "TestStore")
+    assert result == (True, "Test Product Name", "TestStore")
+
+def test_stops_after_enabled_button(monkeypatch):
+    """Test that the detector stops reading once the result is known"""
+    html = MOCK_IN_STOCK_HTML + "<h1" * 1000
+    assert detect_stock_status(html) == (True, "Test Product Name")
+
+@pytest.mark.parametrize("html", [
+    "<button type='submit'>Add <button type='submit'>to cart</button></button>",
+    "<h1>Name<h1>Nested</h1></h1>",
+])
+def test_unsure_falls_back(sample_stock_checker, html):
+    """Test that ambiguous markup is handed to the BeautifulSoup parser"""
+    assert detect_stock_status(html) is None
+    assert sample_stock_checker.parse_stock_status(html, "TestStore") == \
+        sample_stock_checker.parse_stock_status_with_soup(html, "TestStore")
@@ -0,0 +1,72 @@
+import json
+import logging
+import threading
+import time
+import pytest
+from structured_logging import setup_logging, stop_logging
+
+@pytest.fixture
+def logger():
+    """A private logger, so the root logger and pytest's handlers are left alone"""
+    logger = logging.getLogger(f"test.structured.{time.monotonic_ns()}")
+    yield logger
+    stop_logging()
+
+def test_records_written_as_json_lines(logger, tmp_path):
+    """Test that each record is one JSON object with the message and extra fields"""
+    log_file = tmp_path / "checker.log"
+    listener = setup_logging(filename=str(log_file), logger=logger)
+    logger.info("Error checking %s: %s", "https://teststore1.com/p", "timeout",
+                extra={'url': "https://teststore1.com/p"})
+    stop_logging(listener)
+
+    entry = json.loads(log_file.read_text().splitlines()[0])
+    assert entry['message'] == "Error checking https://teststore1.com/p: timeout"
+    assert entry['level'] == "INFO"
+    assert entry['url'] == "https://teststore1.com/p"
+    assert 'args' not in entry and 'msg' not in entry
+
+def test_log_file_rotated_by_size(logger, tmp_path):
+    """Test that the log file is rotated once it reaches the size limit"""
+    log_file = tmp_path / "checker.log"
+    listener = setup_logging(filename=str(log_file), max_bytes=500, backup_count=2, logger=logger)
+    for i in range(50):
+        logger.info("Checked product %d", i)
+    stop_logging(listener)
+
+    assert (tmp_path / "checker.log.1").exists()
+    assert (tmp_path / "checker.log.2").exists()
+    assert not (tmp_path / "checker.log.3").exists()
+
+def test_logging_does_not_wait_for_slow_writer(logger, tmp_path, monkeypatch):
+    """Test that a stalled log file does not hold up the logging thread"""
+    release = threading.Event()
+    listener = setup_logging(filename=str(tmp_path / "checker.log"), logger=logger)
+    handler = listener.handlers[0]
+    emit = handler.emit
+    monkeypatch.setattr(handler, 'emit', lambda record: (release.wait(5), emit(record)))
+
+    start = time.monotonic()
+    for i in range(20):
+        logger.info("Checked product %d", i)
+    assert time.monotonic() - start < 0.5
+    release.set()
+    stop_logging(listener)
+    assert len((tmp_path / "checker.log").read_text().splitlines()) == 20
+
+def test_disabled_messages_never_formatted(logger, tmp_path):
+    """Test that arguments of debug calls are not formatted when DEBUG is off"""
+    class Expensive:
+        def __str__(self):
+            raise AssertionError("formatted")
+
+    setup_logging(filename=str(tmp_path / "checker.log"), level='INFO', logger=logger)
+    logger.debug("Parsed %s", Expensive())
+
+def test_already_configured_logger_left_alone(logger, tmp_path):
+    """Test that an existing handler configuration is kept, like basicConfig"""
+    handler = logging.NullHandler()
+    logger.addHandler(handler)
+    assert setup_logging(filename=str(tmp_path / "checker.log"), logger=logger) is None
+    assert logger.handlers == [handler]
+    assert not (tmp_path / "checker.log").exists()